@@ -0,0 +1,109 @@
+# benchmarks/bench_json_codec.py
+"""
+Micro-benchmark of the JSON codecs on inventory_changes pages.
+
+Uso:
+    python -m benchmarks.bench_json_codec [pagina.json ...] [--repeat N]
+
+Each file is a recorded GraphQL response of the inventory_changes query.
+Without files, a synthetic 100-edge page with the same shape is used.
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.codec import JSONCodec, OrjsonCodec, orjson
+
+
+def synthetic_page(edges: int = 100) -> Dict[str, Any]:
+    """Build a page shaped like the default inventory_changes selection."""
+    return {
+        "data": {"inventory_changes": {
+            "request_id": "6707f5c1a7b2c3d4e5f60718",
+            "complexity": 101,
+            "data": {
+                "pageInfo": {
+                    "hasNextPage": True,
+                    "hasPreviousPage": False,
+                    "startCursor": "YXJyYXljb25uZWN0aW9uOjA=",
+                    "endCursor": "YXJyYXljb25uZWN0aW9uOjk5"
+                },
+                "edges": [{
+                    "node": {
+                        "user_id": "VXNlcjoxMjM0NQ==",
+                        "account_id": "QWNjb3VudDo2Nzg5",
+                        "warehouse_id": "V2FyZWhvdXNlOjEwMTE=",
+                        "sku": f"SKU-{index:06d}",
+                        "previous_on_hand": 100 + index,
+                        "change_in_on_hand": -(index % 7),
+                        "reason": "Order shipped (#100234)",
+                        "cycle_counted": index % 10 == 0,
+                        "location_id": f"TG9jYXRpb246{index:05d}",
+                        "created_at": "2024-10-01T12:34:56.789012",
+                        "location": {
+                            "name": f"A-{index % 40:02d}-{index % 5}",
+                            "zone": "A",
+                            "pickable": True,
+                            "sellable": True,
+                            "temperature": None,
+                            "last_counted": "2024-09-28T08:00:00"
+                        }
+                    },
+                    "cursor": f"YXJyYXljb25uZWN0aW9uOj{index}"
+                } for index in range(edges)]
+            }
+        }}
+    }
+
+
+def load_pages(paths: List[str]) -> List[bytes]:
+    """Read recorded pages as raw bytes, or synthesize one."""
+    if not paths:
+        return [json.dumps(synthetic_page()).encode("utf-8")]
+    pages = []
+    for path in paths:
+        with open(path, "rb") as file:
+            pages.append(file.read())
+    return pages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSON codec micro-benchmark")
+    parser.add_argument("pages", nargs="*", help="Recorded inventory_changes responses")
+    parser.add_argument("--repeat", type=int, default=200, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    decoded = [JSONCodec().loads(page) for page in pages]
+    total_bytes = sum(len(page) for page in pages)
+
+    codecs = [JSONCodec()]
+    if orjson is not None:
+        codecs.append(OrjsonCodec())
+    else:
+        print("orjson no está instalado: solo se mide la librería estándar")
+
+    print(f"{len(pages)} page(s), {total_bytes / 1024:.1f} KiB, {args.repeat} iterations")
+    print(f"{'codec':<8} {'decode ms':>10} {'encode ms':>10} {'decode MB/s':>12}")
+    baseline = None
+    for codec in codecs:
+        decode = min(timeit.repeat(
+            lambda: [codec.loads(page) for page in pages], number=args.repeat, repeat=3
+        )) / args.repeat
+        encode = min(timeit.repeat(
+            lambda: [codec.dumps(page) for page in decoded], number=args.repeat, repeat=3
+        )) / args.repeat
+        throughput = total_bytes / decode / 1e6
+        speedup = "" if baseline is None else f"  x{baseline / decode:.1f} decode"
+        baseline = baseline or decode
+        print(f"{codec.name:<8} {decode * 1000:>10.3f} {encode * 1000:>10.3f} {throughput:>12.1f}{speedup}")
+
+
+if __name__ == "__main__":
+    main()
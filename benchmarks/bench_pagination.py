@@ -0,0 +1,68 @@
+# benchmarks/bench_pagination.py
+"""
+Offline benchmark of inventory_changes pagination and flattening.
+
+Uso:
+    # Grabar una vez contra la API real
+    SHIPHERO_CASSETTE=cambios.json.gz SHIPHERO_CASSETTE_MODE=record \\
+        python main.py --module inventory --action get_changes --date-from 2024-10-01
+    # Medir sin red, tantas veces como haga falta
+    python -m benchmarks.bench_pagination cambios.json.gz [--repeat N] [--stream] [--latency-scale 1.0]
+
+Every run replays the same recorded pages through the real client, so
+retries, JSON decoding and flattening are measured exactly as in production.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.token_manager as token_manager
+from modules.inventory_changes import InventoryChanges
+from utils.cassette import CassetteAdapter, use_cassette
+from utils.rate_limiter import CreditBucket
+from utils.token_manager import TokenManager, TokenStore
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a cassette through get_inventory_changes")
+    parser.add_argument("cassette", help="Cassette recorded with SHIPHERO_CASSETTE")
+    parser.add_argument("--repeat", type=int, default=5, help="Replays to measure")
+    parser.add_argument("--stream", action="store_true", help="Decode pages incrementally")
+    parser.add_argument("--max-records", type=int, default=50000, help="max_records passed to the fetcher")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added per response")
+    parser.add_argument("--latency-scale", type=float, default=0.0, help="Fraction of the recorded timing added")
+    args = parser.parse_args()
+
+    # Sin red: ni renovación de token ni espera de créditos
+    token_manager._manager = TokenManager(
+        access_token="replay",
+        store=TokenStore(os.path.join(tempfile.mkdtemp(), "tokens.sqlite"))
+    )
+    module = InventoryChanges()
+    module.rate_limiter = CreditBucket(capacity=1e12, refill_rate=1e12)
+
+    timings = []
+    rows = 0
+    for _ in range(args.repeat):
+        with use_cassette(args.cassette, CassetteAdapter.REPLAY,
+                          latency=args.latency, latency_scale=args.latency_scale):
+            started = time.perf_counter()
+            df = module.get_inventory_changes(
+                "1970-01-01", "2100-01-01", max_records=args.max_records, stream=args.stream
+            )
+            timings.append(time.perf_counter() - started)
+            rows = len(df)
+
+    print(f"{rows} rows, {args.repeat} replays, stream={args.stream}")
+    print(f"best {min(timings) * 1000:.1f} ms, median {statistics.median(timings) * 1000:.1f} ms, "
+          f"{rows / min(timings):,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
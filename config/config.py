@@ -2,6 +2,7 @@
 
 from datetime import timedelta
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,15 +17,88 @@ class Config:
     REFRESH_TOKEN = os.getenv("SHIPHERO_REFRESH_TOKEN")
     EMAIL = os.getenv("SHIPHERO_EMAIL")
     
-    # Rate Limiting
-    MAX_REQUESTS_PER_MINUTE = 100
+    # Tokens (compartidos por todos los procesos del host)
+    TOKEN_STORE = os.getenv(
+        "SHIPHERO_TOKEN_STORE",
+        os.path.join(tempfile.gettempdir(), "shiphero_tokens.sqlite")
+    )
+    TOKEN_STORE_LOCK_TIMEOUT = 120  # seconds; a refresh holds the lock during the request
+    TOKEN_REFRESH_MARGIN = 300  # seconds before expiry to refresh
+    TOKEN_REFRESH_RETRY_DELAY = 60  # seconds between failed background refreshes
+    TOKEN_DEFAULT_TTL = 3600  # seconds, when the new token carries no expiry
+    
+    # HTTP Connection Pool
+    HTTP_POOL_CONNECTIONS = 10  # host pools kept alive
+    HTTP_POOL_MAXSIZE = 10  # connections per host
+    HTTP_CONNECT_TIMEOUT = 10  # seconds
+    HTTP_READ_TIMEOUT = 100  # seconds
+    # "auto" ofrece gzip, deflate y br (si brotli está instalado); "identity" desactiva la compresión
+    HTTP_ACCEPT_ENCODING = os.getenv("SHIPHERO_ACCEPT_ENCODING", "auto")
+    # Respuestas grandes se decodifican de a bloques de este tamaño
+    JSON_STREAM_CHUNK_SIZE = 64 * 1024  # bytes
+    # Codec JSON: "auto" usa orjson si está instalado, si no la librería estándar
+    JSON_CODEC = os.getenv("SHIPHERO_JSON_CODEC", "auto")
+    
+    # Async Client
+    ASYNC_MAX_CONCURRENCY = 4  # requests in flight at once
+    
+    # Rate Limiting (modelo de créditos de ShipHero)
+    CREDIT_CAPACITY = 4004  # max credits per account
+    CREDIT_REFILL_RATE = 60  # credits restored per second
+    CREDIT_DEFAULT_COST = 101  # assumed cost of a query not seen yet
+    # "memory" (un proceso) o "sqlite" (compartido por todos los procesos del host)
+    RATE_LIMITER_BACKEND = os.getenv("SHIPHERO_RATE_LIMITER", "memory")
+    RATE_LIMITER_DB = os.getenv(
+        "SHIPHERO_RATE_LIMITER_DB",
+        os.path.join(tempfile.gettempdir(), "shiphero_rate_limiter.sqlite")
+    )
+    RATE_LIMITER_LOCK_TIMEOUT = 30  # seconds waiting for the shared store
     
     # Cache Configuration
+    CACHE_ENABLED = True
     CACHE_TTL = timedelta(minutes=5)
+    # Solo se cachean estas operaciones (nunca mutations); TTL por operación
+    CACHE_TTL_OVERRIDES = {
+        "account": timedelta(hours=1),
+        "products": CACHE_TTL,
+        "product": CACHE_TTL
+    }
+    CACHE_INVALIDATED_BY_MUTATIONS = ["product", "products"]  # cached queries any mutation makes stale (kits)
+    CACHE_MAX_ENTRIES = 512  # responses kept in memory
+    CACHE_DIR = os.getenv("SHIPHERO_CACHE_DIR")  # on-disk tier, disabled if unset
+    CACHE_DISK_MAX_BYTES = 256 * 1024 * 1024
+    
+    # Batching (consultas agrupadas con alias)
+    BATCH_MAX_SIZE = 50  # aliases per request
+    BATCH_MAX_COMPLEXITY = 500  # credits a single batch may cost
+    BATCH_DEFAULT_ITEM_COST = 5  # assumed credits per alias until observed
+    
+    # Pagination Configuration
+    PAGINATION_CHUNK_SIZE = 10000  # rows per DataFrame yielded by the iter_* fetchers
+    PAGINATION_PREFETCH = int(os.getenv("SHIPHERO_PREFETCH_PAGES", "0"))  # pages read ahead while the current one is processed
+    INVENTORY_CHANGES_WINDOWS = int(os.getenv("SHIPHERO_INVENTORY_WINDOWS", "1"))  # date windows paginated at once
+    INVENTORY_CHANGES_MAX_WINDOWS = 8  # windows in flight at most (below HTTP_POOL_MAXSIZE)
+    INVENTORY_CHANGES_WIDEN_BELOW = 0.25  # a window under this share of max_records doubles the next one
+    INVENTORY_CHANGES_UPSERT = os.getenv("SHIPHERO_INVENTORY_UPSERT", "0") == "1"  # upsert on the content hash; migrate_upsert_key first
+    # Tamaño de página adaptativo: `first` crece o se achica según la complejidad informada
+    PAGE_SIZE_ADAPTIVE = os.getenv("SHIPHERO_PAGE_SIZE_ADAPTIVE", "0") == "1"  # opt-in: pages may grow past the fetcher sizes
+    PAGE_MAX_SIZE = 1000  # nodes per page at most
+    PAGE_MIN_SIZE = 1  # smallest page tried after complexity or timeout errors
+    PAGE_MAX_COMPLEXITY = int(os.getenv("SHIPHERO_PAGE_MAX_COMPLEXITY", "1000"))  # credits a single page may cost
+    PAGE_CREDIT_SHARE = 0.25  # share of CREDIT_CAPACITY a single page may cost
+    PAGE_SIZE_GROWTH = 4  # max growth factor from one page to the next
     
     # Retry Configuration
     MAX_RETRIES = 3
-    RETRY_DELAY = 1  # seconds
+    RETRY_DELAY = 1  # seconds, base of the exponential backoff
+    RETRY_MAX_DELAY = 60  # seconds, cap for a single wait
+    RETRY_BUDGETS = {  # retries allowed per error class
+        "network": MAX_RETRIES,
+        "server": MAX_RETRIES,
+        "rate_limit": 5,
+        "throttle": 5,
+        "auth": 1
+    }
     
     # Output Configuration
     CSV_SEPARATOR = ","
@@ -36,6 +110,21 @@ class Config:
     LOG_FORMAT = "[%(asctime)s] [%(levelname)s] [%(module)s] - %(message)s"
     LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
     LOG_RETENTION_DAYS = 30
+    LOG_LEVEL = os.getenv("SHIPHERO_LOG_LEVEL", "DEBUG")
+    
+    # Metrics Configuration
+    METRICS_DIR = os.getenv("SHIPHERO_METRICS_DIR", "metrics")  # shiphero.prom + JSON summary per run
+    METRICS_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)  # seconds
+    
+    # Tracing Configuration
+    TRACE_FILE = os.getenv("SHIPHERO_TRACE_FILE")  # Chrome trace JSON; tracing disabled if unset
+    TRACE_MAX_EVENTS = 200000  # spans kept per run, later ones are dropped
+    
+    # Record/replay Configuration
+    CASSETTE = os.getenv("SHIPHERO_CASSETTE")  # gzip JSON cassette; main.py records or replays through it
+    CASSETTE_MODE = os.getenv("SHIPHERO_CASSETTE_MODE")  # "record" | "replay"; default replays if the file exists
+    CASSETTE_LATENCY = float(os.getenv("SHIPHERO_CASSETTE_LATENCY", "0"))  # seconds added per replayed response
+    CASSETTE_LATENCY_SCALE = float(os.getenv("SHIPHERO_CASSETTE_LATENCY_SCALE", "0"))  # 1.0 = recorded timing
     
     @classmethod
     def validate_config(cls):
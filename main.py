@@ -2,11 +2,13 @@
 
 import os
 import sys
+import json
 import argparse
 from datetime import datetime, timedelta
 import pandas as pd
 from typing import Optional
 import time
+import asyncio
 
 from modules.inventory_changes import InventoryChanges
 from modules.kits_manager import KitsManager
@@ -14,8 +16,15 @@ from modules.inventory_status import InventoryStatus
 from modules.products import Products
 from modules.warehouse import Warehouse
 from modules.inventory_snapshot import InventorySnapshot
+from modules.async_client import AsyncShipHeroAPI
 from utils.logger import setup_logger
 from utils.helpers import validate_date_format
+from utils.metrics import get_metrics
+from utils.tracing import get_tracer, traced
+from utils.cassette import use_cassette
+from utils.sync_state import SyncStateStore
+from utils.rate_limiter import get_rate_limiter
+from utils.token_manager import get_token_manager
 from config.config import Config
 
 from utils.database import Database
@@ -56,7 +65,7 @@ def setup_argparse() -> argparse.ArgumentParser:
     
     parser.add_argument(
         '--sku',
-        help='SKU específico',
+        help='SKU específico (en kits se aceptan varios separados por coma)',
         required=False
     )
     
@@ -72,13 +81,46 @@ def setup_argparse() -> argparse.ArgumentParser:
         required=False
     )
     
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        help='Cantidad máxima de consultas en paralelo',
+        required=False
+    )
+    
+    parser.add_argument(
+        '--windows',
+        type=int,
+        default=Config.INVENTORY_CHANGES_WINDOWS,
+        help='Ventanas de fechas que se consultan en paralelo (inventory)',
+        required=False
+    )
+    
+    parser.add_argument(
+        '--prefetch',
+        type=int,
+        default=Config.PAGINATION_PREFETCH,
+        help='Páginas que se piden por adelantado mientras se procesa la actual (inventory)',
+        required=False
+    )
+    
+    parser.add_argument(
+        '--trace-file',
+        help='Guardar un trace (formato Chrome trace JSON) de las fases de la corrida',
+        default=Config.TRACE_FILE,
+        required=False
+    )
+    
     return parser
 
+@traced(cat="main")
 def process_inventory_changes(
     action: str,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
-    sku: Optional[str] = None
+    sku: Optional[str] = None,
+    windows: int = 1,
+    prefetch: int = 0
 ) -> None:
     """
     Procesa los cambios de inventario.
@@ -88,6 +130,8 @@ def process_inventory_changes(
         date_from (str, optional): Fecha inicio
         date_to (str, optional): Fecha fin
         sku (str, optional): SKU específico
+        windows (int): Ventanas de fechas consultadas en paralelo
+        prefetch (int): Páginas leídas por adelantado
     """
     inventory_module = InventoryChanges()
     
@@ -103,7 +147,9 @@ def process_inventory_changes(
         df = inventory_module.get_inventory_changes(
             date_from=date_from,
             date_to=date_to,
-            sku=sku
+            sku=sku,
+            windows=windows,
+            prefetch=prefetch
         )
         
         # Mostrar resumen
@@ -119,45 +165,57 @@ def process_inventory_changes(
     if action == "load_database":
             
         logger.info(f"Obteniendo transacciones del inventario")
-        date_from = None
-        with db.get_db() as session:
-            date_from = db.get_max_created_at(session,SphTransacciones)
-            if date_from:
-                date_from = date_from + timedelta(seconds=1)
-                date_from = date_from
+        # Marca de agua de sph_sync_state: una lectura por clave, sin MAX() sobre la tabla
+        state = SyncStateStore(db.engine).get(SyncStateStore.INVENTORY_CHANGES)
+        date_from = state['high_water_mark'] if state else None
+        if date_from is None:
+            # Primera carga con sph_sync_state: se toma una única vez MAX(created_at)
+            with db.get_db() as session:
+                date_from = db.get_max_created_at(session,SphTransacciones)
+        if date_from and not Config.INVENTORY_CHANGES_UPSERT:
+            # Sin upsert, el segundo de la marca de agua se saltea para no duplicar filas
+            date_from = date_from + timedelta(seconds=1)
         
         if date_from is None:
             date_from = datetime(2024, 10, 1)
 
         date_to = (date_from + timedelta(days=30))
         
-        df = inventory_module.get_inventory_changes(
+        # Solo se piden a la API las columnas que se guardan
+        columnas_deseadas = ["warehouse_id","sku","previous_on_hand","change_in_on_hand","current_on_hand","reason","cycle_counted","location_id","created_at","location_name","location_zone"]
+        # Se inserta por chunks con checkpoint; si la corrida anterior se cortó,
+        # se retoma su ventana desde el último cursor confirmado. Una ventana
+        # que llega a max_records cambios se corta en el último confirmado: no se pierden filas
+        total = inventory_module.load_inventory_changes(
+            'sph_transacciones',
             date_from=date_from.isoformat(),
             date_to=date_to.isoformat(),
             #reason='Purchase Order',
-            max_records=50000
+            max_records=50000,
+            fields=columnas_deseadas,
+            stream=True,
+            windows=windows,
+            engine=db.engine,
+            prefetch=prefetch
         )
 
         # Mostrar resumen
         print("\nResumen de cambios de inventario:")
-        print(f"Total de registros: {len(df)}")
-        if len(df) == 0:
-            print("\nProceso finalizo correctamente")
-            return True
-        print("\nMuestra de datos:")
-        print(df.head())
-        
-        # Exportar a CSV
-        
-        columnas_deseadas = ["warehouse_id","sku","previous_on_hand","change_in_on_hand","current_on_hand","reason","cycle_counted","location_id","created_at","location_name","location_zone"]
-        df_filtrado = df[columnas_deseadas].copy()
+        print(f"Total de registros: {total}")
+        print("\nProceso finalizo correctamente")
+        return True
 
-        inventory_module.insert_df_to_db(df_filtrado,'sph_transacciones')
+    elif action == "migrate_upsert_key":
+        # Una sola vez antes de SHIPHERO_INVENTORY_UPSERT=1: completa change_hash y crea el índice único
+        total = inventory_module.migrate_upsert_key('sph_transacciones', engine=db.engine)
+        print(f"\nchange_hash completado en {total} registros de sph_transacciones")
+        return True
 
     else:
         logger.error(f"Acción no reconocida: {action}")
         sys.exit(1)
 
+@traced(cat="main")
 def process_kits(
     action: str,
     sku: Optional[str] = None,
@@ -178,8 +236,13 @@ def process_kits(
             logger.error("Se requiere SKU para obtener detalles del kit")
             sys.exit(1)
             
-        logger.info(f"Obteniendo detalles del kit: {sku}")
-        df = kits_module.get_kit_details(sku)
+        skus = [kit_sku.strip() for kit_sku in sku.split(",") if kit_sku.strip()]
+        logger.info(f"Obteniendo detalles de {len(skus)} kit(s): {sku}")
+        if len(skus) == 1:
+            df = kits_module.get_kit_details(skus[0])
+        else:
+            # Varios kits por request usando alias de GraphQL
+            df = kits_module.get_kits_details(skus)
         
         print("\nDetalles del kit:")
         print(df)
@@ -200,6 +263,7 @@ def process_kits(
         logger.error(f"Acción no reconocida: {action}")
         sys.exit(1)
 
+@traced(cat="main")
 def process_products(
     action: str,
     sku: Optional[str] = None
@@ -233,12 +297,12 @@ def process_products(
     elif action == "get_all":
             
         logger.info(f"Consultando todos los productos")
-        df = products_module.get_all()
         columnas_deseadas = ["name","sku","barcode","kit","active","kit_components"]
+        df = products_module.get_all(fields=columnas_deseadas)
         df_filtrado = df[columnas_deseadas].copy()
         df_filtrado["kit_components"] = df_filtrado["kit_components"].apply(str)
         #products_module.export_to_csv(df_filtrado)
-        products_module.insert_df_to_db(df_filtrado,'sph_producto')
+        products_module.insert_df_to_db(df_filtrado,'sph_producto', stream=SyncStateStore.PRODUCTS)
 
         with db.get_db() as db_session:
             try:
@@ -264,6 +328,7 @@ def process_products(
         logger.error(f"Acción no reconocida: {action}")
         sys.exit(1)
 
+@traced(cat="main")
 def process_account(
     action: str,
     warehouse_id: Optional[str] = None
@@ -305,14 +370,24 @@ def process_account(
         csv_path = warehouse_module.export_to_csv(df)
         print(f"\nDatos exportados a: {csv_path}")
         
+    elif action == "credits":
+        # Presupuesto de créditos compartido entre procesos
+        print(json.dumps(get_rate_limiter().usage(), indent=2))
+        
+    elif action == "token":
+        # Estado del token compartido (expiración, store, renovaciones)
+        print(json.dumps(get_token_manager().status(), indent=2))
+        
     else:
         logger.error(f"Acción no reconocida: {action}")
         sys.exit(1)
 
+@traced(cat="main")
 def process_snapshot(
     action: str,
     warehouse_id: Optional[str] = None,
-    snapshot_id: Optional[str] = None
+    snapshot_id: Optional[str] = None,
+    concurrency: Optional[int] = None
 ) -> None:
     """
     Procesa operaciones de products.
@@ -320,6 +395,7 @@ def process_snapshot(
     Args:
         action (str): Acción a realizar
         sku (str, optional): SKU del kit
+        concurrency (int, optional): Warehouses procesados en paralelo
     """
     inventory_snapshot_module = InventorySnapshot()
     
@@ -353,58 +429,85 @@ def process_snapshot(
             )
             print(f"Registro insertado con ID: {sph_version_id}")
         
-        for index, row in df_warehouses.iterrows():
-            try:
-                snapshot_id = process_snapshot('generate_snapshot',row['warehouse_id'])
-                snapshot_url = None
-                max_intentos = 10
-                intentos = 0
-
-                while not snapshot_url and intentos < max_intentos:
-                    # Realiza las acciones necesarias dentro del ciclo
-                    print(f"intento nro {intentos}")
-                    time.sleep(5)
-                    df_snapshot = process_snapshot('get_snapshot',None, snapshot_id)
-                    snapshot_url = df_snapshot.at[0, "snapshot_url"]
-                    print('snapshot_url', snapshot_url)
-                    intentos += 1
-
-                if not snapshot_url:
-                    inventory_snapshot_module.abort_snapshot(snapshot_id=snapshot_id)
-
-                df_snapshot['sph_version_id'] = sph_version_id
-                df_snapshot['warehouse_name'] = row['address_name']
-                
-                data = df_snapshot.iloc[0].to_dict()
-
-                # Eliminar columnas no definidas en el modelo (opcional)
-                valid_keys = {col.name for col in SphSnapshotInventario.__table__.columns}
-                filtered_data = {key: value for key, value in data.items() if key in valid_keys}
-                sph_snapshot_inventario_id= None
-                with db.get_db() as session:
-                    sph_snapshot_inventario_id = db.insert_record(
-                        db_session=session,
-                        model=SphSnapshotInventario,
-                        **filtered_data
-                    )
-                #inventory_snapshot_module.insert_df_to_db(df_snapshot,'sph_snapshot_inventario')
-
-                logger.info(f"Consumo la url con el json")
-                df_inventory = inventory_snapshot_module.get_inventory_snapshot_by_url(
-                    snapshot_url=snapshot_url
-                )
-                df_inventory['sph_snapshot_inventario_id'] = sph_snapshot_inventario_id
-                #inventory_snapshot_module.export_to_csv(df_inventory,f'{row["address_name"]}_inventario')
-                inventory_snapshot_module.insert_df_to_db(df_inventory,'sph_inventario_detalle')
-            except Exception as e:
-                logger.error(f"Error procesando el warehouse {row['address_name']}: {str(e)}")
-                continue
+        async def load_all_warehouses():
+            # Los warehouses se procesan en paralelo: casi todo el tiempo es espera de red
+            async with AsyncShipHeroAPI(max_concurrency=concurrency) as client:
+                await asyncio.gather(*(
+                    client.run(load_warehouse_snapshot, inventory_snapshot_module, row, sph_version_id)
+                    for _, row in df_warehouses.iterrows()
+                ))
+
+        asyncio.run(load_all_warehouses())
 
         
     else:
         logger.error(f"Acción no reconocida: {action}")
         sys.exit(1)
 
+@traced(cat="main")
+def load_warehouse_snapshot(
+    inventory_snapshot_module: InventorySnapshot,
+    row: pd.Series,
+    sph_version_id: int
+) -> None:
+    """
+    Genera, espera y carga el snapshot de inventario de un warehouse.
+    
+    Args:
+        inventory_snapshot_module (InventorySnapshot): Módulo de snapshots
+        row (pd.Series): Fila de get_warehouses con los datos del warehouse
+        sph_version_id (int): ID de la versión a la que pertenece la carga
+    """
+    try:
+        snapshot_id = process_snapshot('generate_snapshot',row['warehouse_id'])
+        snapshot_url = None
+        max_intentos = 10
+        intentos = 0
+
+        while not snapshot_url and intentos < max_intentos:
+            # Realiza las acciones necesarias dentro del ciclo
+            print(f"intento nro {intentos}")
+            with get_tracer().span("snapshot poll sleep", cat="wait", warehouse=row['address_name']):
+                time.sleep(5)
+            df_snapshot = process_snapshot('get_snapshot',None, snapshot_id)
+            snapshot_url = df_snapshot.at[0, "snapshot_url"]
+            print('snapshot_url', snapshot_url)
+            intentos += 1
+
+        if not snapshot_url:
+            inventory_snapshot_module.abort_snapshot(snapshot_id=snapshot_id)
+
+        df_snapshot['sph_version_id'] = sph_version_id
+        df_snapshot['warehouse_name'] = row['address_name']
+
+        data = df_snapshot.iloc[0].to_dict()
+
+        # Eliminar columnas no definidas en el modelo (opcional)
+        valid_keys = {col.name for col in SphSnapshotInventario.__table__.columns}
+        filtered_data = {key: value for key, value in data.items() if key in valid_keys}
+        sph_snapshot_inventario_id= None
+        with db.get_db() as session:
+            sph_snapshot_inventario_id = db.insert_record(
+                db_session=session,
+                model=SphSnapshotInventario,
+                **filtered_data
+            )
+        #inventory_snapshot_module.insert_df_to_db(df_snapshot,'sph_snapshot_inventario')
+
+        logger.info(f"Consumo la url con el json")
+        # Se inserta por chunks a medida que se descarga: la memoria no depende del tamaño del snapshot
+        inventory_snapshot_module.load_inventory_snapshot_by_url(
+            snapshot_url,
+            'sph_inventario_detalle',
+            columns={'sph_snapshot_inventario_id': sph_snapshot_inventario_id},
+            stream=SyncStateStore.INVENTORY_SNAPSHOT,
+            engine=db.engine
+        )
+    except Exception as e:
+        logger.error(f"Error procesando el warehouse {row['address_name']}: {str(e)}")
+        return
+
+@traced(cat="main")
 def process_inventory_status(
     action: str,
     sku: Optional[str] = None,
@@ -449,8 +552,44 @@ def process_inventory_status(
         logger.error(f"Acción no reconocida: {action}")
         sys.exit(1)
 
+def export_metrics(module: str, action: str, started: float) -> None:
+    """
+    Exporta las métricas de la corrida como textfile de Prometheus y resumen JSON.
+    
+    Args:
+        module (str): Módulo ejecutado
+        action (str): Acción ejecutada
+        started (float): time.monotonic() al inicio de la corrida
+    """
+    metrics = get_metrics()
+    metrics.set("shiphero_run_duration_seconds", time.monotonic() - started, module=module, action=action)
+    metrics.set("shiphero_run_timestamp_seconds", time.time(), module=module, action=action)
+    try:
+        paths = metrics.export(prefix=f"shiphero_{module}_{action}")
+        logger.info(f"Métricas exportadas a {paths['prometheus']} y {paths['json']}")
+    except OSError as e:
+        # Las métricas no deben hacer fallar la corrida
+        logger.error(f"No se pudieron exportar las métricas: {str(e)}")
+
+def export_trace(path: str) -> None:
+    """
+    Guarda el trace de la corrida para abrirlo en chrome://tracing o Perfetto.
+    
+    Args:
+        path (str): Archivo de salida
+    """
+    tracer = get_tracer()
+    tracer.stop()
+    try:
+        tracer.write(path)
+        logger.info(f"Trace exportado a {path} ({len(tracer.events())} spans, {tracer.dropped} descartados)")
+    except OSError as e:
+        logger.error(f"No se pudo exportar el trace: {str(e)}")
+
 def main():
     """Función principal de ejecución."""
+    started = time.monotonic()
+    args = None
     try:
         # Verificar configuración
         Config.validate_config()
@@ -458,6 +597,8 @@ def main():
         # Configurar argumentos
         parser = setup_argparse()
         args = parser.parse_args()
+        if args.trace_file:
+            get_tracer().start()
         
         # Validar fechas si se proporcionan
         if args.date_from and not validate_date_format(args.date_from):
@@ -477,7 +618,9 @@ def main():
                 args.action,
                 args.date_from,
                 args.date_to,
-                args.sku
+                args.sku,
+                args.windows,
+                args.prefetch
             )
         elif args.module == "kits":
             process_kits(
@@ -505,7 +648,8 @@ def main():
             process_snapshot(
                 args.action,
                 args.warehouse_id,
-                args.snapshot_id
+                args.snapshot_id,
+                args.concurrency
             )
         else:
             logger.error(f"Módulo no reconocido: {args.module}")
@@ -514,6 +658,22 @@ def main():
     except Exception as e:
         logger.error(f"Error en la ejecución: {str(e)}")
         sys.exit(1)
+    
+    finally:
+        if args is not None:
+            export_metrics(args.module, args.action, started)
+            if args.trace_file:
+                export_trace(args.trace_file)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if Config.CASSETTE:
+        # Corrida offline: SHIPHERO_CASSETTE graba los intercambios o los reproduce
+        with use_cassette(
+            Config.CASSETTE,
+            Config.CASSETTE_MODE,
+            latency=Config.CASSETTE_LATENCY,
+            latency_scale=Config.CASSETTE_LATENCY_SCALE
+        ):
+            main()
+    else:
+        main()
\ No newline at end of file
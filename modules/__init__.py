@@ -3,5 +3,6 @@ from .base import ShipHeroAPI
 from .inventory_changes import InventoryChanges
 from .kits_manager import KitsManager
 from .inventory_status import InventoryStatus
+from .async_client import AsyncShipHeroAPI
 
-__all__ = ['ShipHeroAPI', 'InventoryChanges', 'KitsManager', 'InventoryStatus']
\ No newline at end of file
+__all__ = ['ShipHeroAPI', 'InventoryChanges', 'KitsManager', 'InventoryStatus', 'AsyncShipHeroAPI']
\ No newline at end of file
@@ -0,0 +1,186 @@
+# modules/async_client.py
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+import pandas as pd
+from modules.base import ShipHeroAPI
+from modules.inventory_changes import InventoryChanges
+from modules.inventory_status import InventoryStatus
+from modules.products import Products
+from utils.pagination import Paginator
+
+class AsyncShipHeroAPI(ShipHeroAPI):
+    """
+    asyncio counterpart of ShipHeroAPI.
+
+    Requests are dispatched to a bounded worker pool that runs the regular
+    _make_request, so retries, token refresh and GraphQL error handling are
+    exactly the same as in the synchronous client. Many queries can be
+    awaited at once; at most max_concurrency are on the wire at a time.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None):
+        """
+        Initialize the async client.
+
+        Args:
+            max_concurrency (int, optional): Max requests in flight at once
+        """
+        super().__init__()
+        self.max_concurrency = max_concurrency or self.config.ASYNC_MAX_CONCURRENCY
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="shiphero-async"
+        )
+
+        # Los módulos sincrónicos arman los paginadores; el cliente solo los recorre en su pool
+        self._inventory_changes = InventoryChanges()
+        self._products = Products()
+        self._inventory_status = InventoryStatus()
+
+        self.logger.info(f"AsyncShipHeroAPI initialized (max_concurrency={self.max_concurrency})")
+
+    async def __aenter__(self) -> "AsyncShipHeroAPI":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the worker pool."""
+        self._executor.shutdown(wait=True)
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking callable under the client's concurrency limit.
+
+        Args:
+            func (Callable): Blocking function, e.g. a module method
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Any: Whatever func returns
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def _make_request_async(
+        self,
+        query: str,
+        variables: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """
+        Make a GraphQL request without blocking the event loop.
+
+        Args:
+            query (str): GraphQL query
+            variables (Dict, optional): Query variables
+
+        Returns:
+            Dict[str, Any]: API response
+        """
+        return await self.run(self._make_request, query, variables)
+
+    async def _paginate(
+        self,
+        paginator: Paginator,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Fetch every page of a paginator without blocking the event loop.
+
+        The whole walk runs in a single run() call, so every page is
+        requested and flattened on the same worker thread and the tracer's
+        per-thread span stack stays consistent.
+
+        Args:
+            paginator (Paginator): Paginator built by one of the sync modules
+            columns (List[str], optional): DataFrame columns
+
+        Returns:
+            pd.DataFrame: Flattened rows
+        """
+        return await self.run(paginator.to_dataframe, columns)
+
+    async def get_inventory_changes(
+        self,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        sku: Optional[str] = None,
+        location_id: Optional[str] = None,
+        reason: Optional[str] = None,
+        max_records: int = 1000,
+        fields: Optional[List[str]] = None,
+        stream: bool = False,
+        windows: int = 1,
+        prefetch: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Async version of InventoryChanges.get_inventory_changes.
+
+        Args:
+            date_from (str, optional): Start date in ISO format
+            date_to (str, optional): End date in ISO format
+            sku (str, optional): Specific SKU to filter
+            location_id (str, optional): Specific location ID to filter
+            reason (str, optional): Change reason to filter
+            max_records (int): Maximum number of records to fetch
+            fields (List[str], optional): Output columns to fetch; None fetches all
+            stream (bool): Decode each page incrementally instead of loading it whole
+            windows (int): Split the date range into this many windows and
+                paginate them concurrently; requires date_from and date_to
+            prefetch (int, optional): Pages read ahead while the current one is
+                flattened, Config.PAGINATION_PREFETCH by default
+
+        Returns:
+            pd.DataFrame: DataFrame containing inventory changes
+        """
+        if windows > 1:
+            # Las ventanas ya se reparten en su propio pool
+            return await self.run(
+                self._inventory_changes.get_inventory_changes,
+                date_from, date_to, sku, location_id, reason, max_records, fields, stream, windows, prefetch
+            )
+        paginator = self._inventory_changes._inventory_changes_paginator(
+            date_from, date_to, sku, location_id, reason, max_records, fields, stream, prefetch
+        )
+        return InventoryChanges._convert_types(await self._paginate(paginator, fields))
+
+    async def get_all_products(
+        self,
+        max_records: int = 99999,
+        fields: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Async version of Products.get_all.
+
+        Args:
+            max_records (int): Maximum number of products to fetch
+            fields (List[str], optional): Output columns to fetch; None fetches all
+
+        Returns:
+            pd.DataFrame: Products details
+        """
+        return await self._paginate(self._products._products_paginator(max_records, 200, fields), fields)
+
+    async def get_inventory_status(
+        self,
+        sku: Optional[str] = None,
+        max_records: int = 1000,
+        fields: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Async version of InventoryStatus.get_inventory_status.
+
+        Args:
+            sku (str, optional): Specific SKU to query
+            max_records (int): Maximum number of records to fetch
+            fields (List[str], optional): Output columns to fetch; None fetches all
+
+        Returns:
+            pd.DataFrame: Current inventory status
+        """
+        return await self._paginate(self._inventory_status._inventory_paginator(sku, max_records, fields), fields)
@@ -1,15 +1,28 @@
 # modules/base.py
 
+import logging
 import time
 import requests
-from typing import Dict, Optional, Any
-from datetime import datetime, timedelta
+from contextlib import closing
+from typing import Dict, Iterator, List, Optional, Any
+from datetime import timedelta
 import json
 from utils.logger import setup_logger
 from utils.exceptions import AuthenticationError, APIError, RateLimitError
+from utils.http import get_http_client
+from utils.token_manager import get_token_manager
+from utils.codec import get_json_codec
+from utils.rate_limiter import get_rate_limiter
+from utils.metrics import get_metrics
+from utils.tracing import get_tracer
+from utils.cache import get_response_cache
+from utils.singleflight import get_single_flight
+from utils.helpers import get_operation_name, generate_cache_key, is_mutation
+from utils.graphql import build_aliased_query, split_aliased_response
+from utils.json_stream import JSONStreamReader
+from utils.pagination import Flatten, Paginator
+from utils.retry import RetryPolicy, RetryableError, parse_retry_after, parse_time_remaining
 from config.config import Config
-from dotenv import set_key
-import os
 
 
 class ShipHeroAPI:
@@ -21,82 +34,74 @@ class ShipHeroAPI:
         self.config = Config
         self.config.validate_config()
         
-        self.access_token = self.config.ACCESS_TOKEN
-        self.refresh_token = self.config.REFRESH_TOKEN
-        self.email = self.config.EMAIL
+        # Pool de conexiones compartido por todos los módulos del proceso
+        self.http = get_http_client()
+        # Codec JSON de requests y respuestas (orjson si está instalado)
+        self.codec = get_json_codec()
+        # Bucket de créditos compartido: todas las instancias consumen de la misma cuenta
+        self.rate_limiter = get_rate_limiter()
+        # Política de reintentos; se puede reemplazar por instancia
+        self.retry_policy = RetryPolicy()
+        # Caché de respuestas de queries compartida por el proceso
+        self.cache = get_response_cache()
+        # Queries idénticas en vuelo comparten una sola llamada de red
+        self.single_flight = get_single_flight()
+        # Costo observado por alias en consultas agrupadas, por campo raíz
+        self._batch_item_costs: Dict[str, float] = {}
+        # Costo por nodo y tope aprendidos por los paginadores, por consulta
+        self._page_sizes: Dict[str, Dict[str, float]] = {}
 
-        # Ruta del archivo actual
-        current_file_path = os.path.abspath(__file__)
-        # Directorio del archivo actual
-        current_dir = os.path.dirname(current_file_path)
-        # Ruta al directorio raíz del proyecto
-        project_root = os.path.abspath(os.path.join(current_dir, ".."))
-        # Ruta a la carpeta "config" y al archivo ".env"
-        self.env_path = os.path.join(project_root, "config", ".env")
-        
-        self._last_request_time = 0
-        self._request_count = 0
-        self._token_expires_at = None
-        
-        # Initialize headers with current access token
-        self.headers = self._get_headers()
+        # Token compartido por el proceso; se renueva antes de expirar
+        self.tokens = get_token_manager()
+        # Latencias, créditos, reintentos y filas; se exportan al final de cada corrida
+        self.metrics = get_metrics()
+        # Spans de cada fase (request, aplanado, carga); inactivo salvo --trace-file
+        self.tracer = get_tracer()
 
     def _get_headers(self) -> Dict[str, str]:
         """Get headers for API requests."""
         return {
-            "Authorization": f"Bearer {self.access_token}",
+            "Authorization": f"Bearer {self.tokens.get_token()}",
             "Content-Type": "application/json"
         }
 
-    def _refresh_access_token(self) -> None:
+    def _refresh_access_token(self, stale_token: Optional[str] = None) -> None:
         """
-        Refresh the access token using the refresh token.
+        Refresh the shared access token.
+        
+        Args:
+            stale_token (str, optional): Token rejected by the API; if another
+                caller already replaced it, no new refresh is made
         
         Raises:
             AuthenticationError: If token refresh fails
         """
-        try:
-            response = requests.post(
-                f"{self.config.BASE_URL_AUTH}/auth/refresh",
-                json={
-                    "refresh_token": self.refresh_token,
-                    "email": self.email
-                }
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                self.access_token = data["access_token"]
-                self._token_expires_at = datetime.now() + timedelta(hours=1)
-                self.headers = self._get_headers()
-
-                # Actualiza el .env con el nuevo token
-                set_key(self.env_path, "SHIPHERO_ACCESS_TOKEN", self.access_token)
-                
-                self.logger.info("Access token refreshed successfully")
-            else:
-                error_msg = f"Failed to refresh access token. Status: {response.status_code}"
-                if response.text:
-                    error_msg += f", Response: {response.text}"
-                raise AuthenticationError(error_msg)
-                
-        except Exception as e:
-            self.logger.error(f"Error refreshing access token: {str(e)}")
-            raise AuthenticationError(f"Token refresh failed: {str(e)}")
+        self.tokens.refresh(stale_token=stale_token)
 
     def _make_request(
         self,
         query: str,
         variables: Optional[Dict] = None,
-        retry_count: int = 0
+        cache_ttl: Optional[timedelta] = None,
+        allow_partial: bool = False
     ) -> Dict[str, Any]:
         """
         Make a GraphQL request to ShipHero API with retry logic and token refresh.
         
+        Failed attempts are retried in a loop according to self.retry_policy,
+        which keeps a separate budget for each class of error. Queries listed
+        in Config.CACHE_TTL_OVERRIDES are served from the response cache, and
+        identical queries issued concurrently share a single network call.
+        Mutations drop the cached responses of
+        Config.CACHE_INVALIDATED_BY_MUTATIONS, even when they fail.
+        
         Args:
             query (str): GraphQL query
             variables (Dict, optional): Query variables
-            retry_count (int): Current retry attempt number
+            cache_ttl (timedelta, optional): Cache this query for the given time,
+                overriding the configured TTL; timedelta(0) bypasses the cache
+            allow_partial (bool): Return responses that carry both data and
+                GraphQL errors instead of raising
             
         Returns:
             Dict[str, Any]: API response
@@ -106,109 +111,627 @@ class ShipHeroAPI:
             RateLimitError: If rate limit is exceeded
             AuthenticationError: If authentication fails
         """
-        if retry_count >= self.config.MAX_RETRIES:
-            raise APIError("Max retries exceeded")
+        operation = get_operation_name(query)
+        with self.tracer.span(f"graphql {operation}", cat="api", operation=operation) as span:
+            ttl = self._get_cache_ttl(query, cache_ttl)
+            cache_key = generate_cache_key(query, variables)
+            if ttl:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    self.logger.debug(f"Cache hit for {operation}")
+                    span.set(cache="hit", request_id=self._extract_request_id(cached))
+                    return cached
+            
+            if is_mutation(query):
+                try:
+                    response_data = self._request_with_retries(query, variables, allow_partial)
+                finally:
+                    # Una mutación fallida pudo aplicarse igual: se invalida siempre
+                    for stale in self.config.CACHE_INVALIDATED_BY_MUTATIONS:
+                        self.cache.invalidate(stale)
+                span.set(request_id=self._extract_request_id(response_data))
+                return response_data
+            
+            def fetch() -> Dict[str, Any]:
+                response_data = self._request_with_retries(query, variables, allow_partial)
+                if ttl and 'errors' not in response_data:
+                    self.cache.set(cache_key, response_data, ttl, self._extract_complexity(response_data))
+                return response_data
             
-        self._handle_rate_limiting()
+            flight_key = f"{cache_key}:partial" if allow_partial else cache_key
+            response_data = self.single_flight.do(flight_key, fetch)
+            span.set(request_id=self._extract_request_id(response_data))
+            return response_data
+
+    def _request_with_retries(
+        self,
+        query: str,
+        variables: Optional[Dict] = None,
+        allow_partial: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Send a GraphQL request, retrying failed attempts per self.retry_policy.
         
-        try:
-            # Check if token refresh is needed
-            if self._token_expires_at and datetime.now() >= self._token_expires_at:
-                self._refresh_access_token()
+        Args:
+            query (str): GraphQL query
+            variables (Dict, optional): Query variables
+            allow_partial (bool): Return partial data instead of raising on GraphQL errors
+            
+        Returns:
+            Dict[str, Any]: API response
+        """
+        cost_key = self._get_cost_key(query, variables)
+        retry_state = self.retry_policy.start()
+        
+        while True:
+            try:
+                with self.tracer.span("attempt", cat="api", cost_key=cost_key):
+                    return self._send_request(query, variables, cost_key, allow_partial)
+            except RetryableError as e:
+                delay = self.retry_policy.next_delay(retry_state, e.error_class, e.retry_after)
+                if delay is None:
+                    self.logger.error(f"Retry budget exhausted for {e.error_class} errors")
+                    raise e.error
+                
+                self.logger.warning(
+                    f"Retrying after {e.error_class} error in {delay:.2f}s "
+                    f"(retry {retry_state[e.error_class]}/{self.retry_policy.budgets[e.error_class]})"
+                )
+                self._record_retry(cost_key, e.error_class, delay)
+                with self.tracer.span("retry sleep", cat="wait", error_class=e.error_class, seconds=delay):
+                    time.sleep(delay)
+
+    def _get_cache_ttl(
+        self,
+        query: str,
+        cache_ttl: Optional[timedelta] = None
+    ) -> Optional[timedelta]:
+        """
+        Decide how long a query may be cached. Mutations are never cached.
+        
+        Args:
+            query (str): GraphQL query
+            cache_ttl (timedelta, optional): Explicit TTL from the caller
+            
+        Returns:
+            Optional[timedelta]: TTL, or None if the response must not be cached
+        """
+        if not self.config.CACHE_ENABLED or is_mutation(query):
+            return None
+        if cache_ttl is not None:
+            return cache_ttl if cache_ttl.total_seconds() > 0 else None
+        return self.config.CACHE_TTL_OVERRIDES.get(get_operation_name(query))
+
+    def _send_request(
+        self,
+        query: str,
+        variables: Optional[Dict],
+        cost_key: str,
+        allow_partial: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Send a single GraphQL request attempt.
+        
+        Args:
+            query (str): GraphQL query
+            variables (Dict, optional): Query variables
+            cost_key (str): Query identifier from _get_cost_key
+            allow_partial (bool): Return partial data instead of raising on GraphQL errors
             
+        Returns:
+            Dict[str, Any]: API response
+            
+        Raises:
+            RetryableError: If the attempt failed in a way that may be retried
+            APIError: If the request failed permanently
+        """
+        reserved = self._handle_rate_limiting(cost_key)
+        complexity = None
+        status = "error"
+        started = time.monotonic()
+        
+        try:
             payload = {
                 "query": query,
                 "variables": variables or {}
             }
             
             # Log the request details (without sensitive info)
-            self.logger.debug(f"Making GraphQL request with variables: {json.dumps(variables or {})}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Making GraphQL request with variables: {json.dumps(variables or {})}")
             
-            response = requests.post(
-                self.config.BASE_URL,
-                headers=self.headers,
-                json=payload
-            )
-            
-            self._request_count += 1
+            try:
+                response = self.http.post(
+                    self.config.BASE_URL,
+                    headers=self._get_headers(),
+                    data=self.codec.dumps(payload)
+                )
+            except requests.RequestException as e:
+                error_msg = f"Request error: {str(e)}"
+                self.logger.error(error_msg)
+                raise RetryableError(RetryPolicy.NETWORK, APIError(error_msg))
             
             # Log response status and details
             self.logger.debug(f"Response status: {response.status_code}")
             
-            if response.status_code == 429:  # Rate limit exceeded
-                raise RateLimitError("Rate limit exceeded")
-                
-            if response.status_code == 401:  # Unauthorized
-                self._refresh_access_token()
-                return self._make_request(query, variables, retry_count + 1)
-                
-            if response.status_code != 200:
-                error_msg = f"API request failed with status {response.status_code}"
-                try:
-                    error_detail = response.json()
-                    error_msg += f"\nResponse: {json.dumps(error_detail, indent=2)}"
-                except:
-                    error_msg += f"\nResponse Text: {response.text}"
-                
-                self.logger.error(error_msg)
-                raise APIError(
-                    error_msg,
-                    status_code=response.status_code,
-                    response=response.json() if response.text else None
-                )
+            self._check_response_status(response)
             
-            response_data = response.json()
+            response_data = self.codec.loads(response.content)
+            complexity = self._extract_complexity(response_data)
             
-            # Check for GraphQL errors
-            if 'errors' in response_data:
-                error_msg = f"GraphQL errors: {json.dumps(response_data['errors'], indent=2)}"
-                self.logger.error(error_msg)
-                
-                # Handle insufficient credits error
-                for error in response_data['errors']:
-                    if error.get("code") == 30:
-                        time_remaining = error.get("time_remaining")
-                        if time_remaining:
-                            # Extract the time in seconds from the message
-                            # seconds_to_wait = int(time_remaining.split()[0])
-                            seconds_to_wait = int(10)
-                            self.logger.info(f"Waiting {seconds_to_wait} seconds due to insufficient credits")
-                            time.sleep(seconds_to_wait)
-                            return self._make_request(query, variables, retry_count + 1)
-                
-                raise APIError(error_msg)
+            try:
+                self._check_graphql_errors(response_data, cost_key, allow_partial)
+            except RetryableError:
+                # El saldo informado reemplaza al local: no hay reserva que devolver
+                reserved = 0
+                raise
             
+            status = "ok"
             return response_data
             
-        except requests.RequestException as e:
-            error_msg = f"Request error: {str(e)}"
+        except (RetryableError, APIError, RateLimitError, AuthenticationError):
+            raise
+            
+        except Exception as e:
+            error_msg = f"Unexpected error: {str(e)}"
             self.logger.error(error_msg)
-            if retry_count < self.config.MAX_RETRIES:
-                time.sleep(self.config.RETRY_DELAY * (retry_count + 1))
-                return self._make_request(query, variables, retry_count + 1)
             raise APIError(error_msg)
             
-        except (RateLimitError, AuthenticationError) as e:
-            raise e
+        finally:
+            self.rate_limiter.settle(cost_key, reserved, complexity)
+            self._record_attempt(cost_key, started, status, complexity)
+        
+    def _stream_request(
+        self,
+        query: str,
+        variables: Optional[Dict],
+        items_path: List[str],
+        document: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Any]:
+        """
+        Send a GraphQL request and yield the items at items_path as they are decoded.
+        
+        The response is parsed off the socket incrementally, so memory depends
+        on the size of one item rather than the whole page. Streamed queries
+        skip the response cache and the single-flight group. Failed attempts
+        are retried like in _request_with_retries, but only until the first
+        item has been yielded.
+        
+        Args:
+            query (str): GraphQL query
+            variables (Dict, optional): Query variables
+            items_path (List[str]): Keys leading to the list to stream,
+                e.g. ['data', 'products', 'data', 'edges']
+            document (Dict, optional): Filled with the rest of the response
+                (pageInfo, complexity...) once the items are consumed
+            
+        Yields:
+            Any: Each item of the list at items_path
+        """
+        cost_key = self._get_cost_key(query, variables)
+        retry_state = self.retry_policy.start()
+        
+        while True:
+            yielded = 0
+            try:
+                attempt = self._send_streaming_request(query, variables, cost_key, items_path, document)
+                # closing(): si el consumidor corta antes, la conexión se libera ya
+                with closing(attempt), \
+                        self.tracer.span(f"graphql {cost_key.split(':', 1)[0]} (stream)", cat="api") as span:
+                    for item in attempt:
+                        yielded += 1
+                        yield item
+                    span.set(items=yielded, request_id=self._extract_request_id(document or {}))
+                return
+            except RetryableError as e:
+                if yielded:
+                    # Los items ya entregados no se pueden deshacer
+                    raise e.error
+                delay = self.retry_policy.next_delay(retry_state, e.error_class, e.retry_after)
+                if delay is None:
+                    self.logger.error(f"Retry budget exhausted for {e.error_class} errors")
+                    raise e.error
+                
+                self.logger.warning(
+                    f"Retrying after {e.error_class} error in {delay:.2f}s "
+                    f"(retry {retry_state[e.error_class]}/{self.retry_policy.budgets[e.error_class]})"
+                )
+                self._record_retry(cost_key, e.error_class, delay)
+                with self.tracer.span("retry sleep", cat="wait", error_class=e.error_class, seconds=delay):
+                    time.sleep(delay)
+
+    def _send_streaming_request(
+        self,
+        query: str,
+        variables: Optional[Dict],
+        cost_key: str,
+        items_path: List[str],
+        document: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Any]:
+        """
+        Send a single streamed GraphQL request attempt.
+        
+        Args:
+            query (str): GraphQL query
+            variables (Dict, optional): Query variables
+            cost_key (str): Query identifier from _get_cost_key
+            items_path (List[str]): Keys leading to the list to stream
+            document (Dict, optional): Filled with the rest of the response
+            
+        Yields:
+            Any: Each item of the list at items_path
+            
+        Raises:
+            RetryableError: If the attempt failed in a way that may be retried
+            APIError: If the request failed permanently
+        """
+        reserved = self._handle_rate_limiting(cost_key)
+        complexity = None
+        response = None
+        status = "error"
+        started = time.monotonic()
+        
+        try:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Making streamed GraphQL request with variables: {json.dumps(variables or {})}")
+            
+            try:
+                response = self.http.post(
+                    self.config.BASE_URL,
+                    headers=self._get_headers(),
+                    data=self.codec.dumps({"query": query, "variables": variables or {}}),
+                    stream=True
+                )
+            except requests.RequestException as e:
+                error_msg = f"Request error: {str(e)}"
+                self.logger.error(error_msg)
+                raise RetryableError(RetryPolicy.NETWORK, APIError(error_msg))
+            
+            self.logger.debug(f"Response status: {response.status_code}")
+            self._check_response_status(response)
+            
+            reader = JSONStreamReader(self.http.iter_content(response, self.config.JSON_STREAM_CHUNK_SIZE))
+            try:
+                for _, item in reader.items(items_path):
+                    yield item
+            except requests.RequestException as e:
+                error_msg = f"Request error while streaming the response: {str(e)}"
+                self.logger.error(error_msg)
+                raise RetryableError(RetryPolicy.NETWORK, APIError(error_msg))
+            
+            response_data = reader.document if isinstance(reader.document, dict) else {}
+            complexity = self._extract_complexity(response_data)
+            if document is not None:
+                document.clear()
+                document.update(response_data)
+            
+            try:
+                self._check_graphql_errors(response_data, cost_key)
+            except RetryableError:
+                # El saldo informado reemplaza al local: no hay reserva que devolver
+                reserved = 0
+                raise
+            
+            status = "ok"
+            
+        except GeneratorExit:
+            # El consumidor dejó de leer: la consulta se cobró igual
+            complexity = reserved
+            status = "cancelled"
+            raise
+            
+        except (RetryableError, APIError, RateLimitError, AuthenticationError):
+            raise
             
         except Exception as e:
             error_msg = f"Unexpected error: {str(e)}"
             self.logger.error(error_msg)
             raise APIError(error_msg)
+            
+        finally:
+            if response is not None:
+                response.close()
+            self.rate_limiter.settle(cost_key, reserved, complexity)
+            self._record_attempt(cost_key, started, status, complexity)
+
+    def _check_response_status(self, response: requests.Response) -> None:
+        """
+        Raise for an HTTP status other than 200.
+        
+        Args:
+            response (requests.Response): Response of a GraphQL request
+            
+        Raises:
+            RetryableError: For 429, 401 (after refreshing the token) and 5xx
+            APIError: For any other status
+        """
+        if response.status_code == 429:  # Rate limit exceeded
+            raise RetryableError(
+                RetryPolicy.RATE_LIMIT,
+                RateLimitError("Rate limit exceeded"),
+                parse_retry_after(response.headers.get("Retry-After"))
+            )
+
+        if response.status_code == 401:  # Unauthorized
+            self._refresh_access_token(self._request_token(response))
+            # El token nuevo se usa de inmediato, sin esperar
+            raise RetryableError(
+                RetryPolicy.AUTH,
+                AuthenticationError("Unauthorized after token refresh"),
+                0
+            )
+
+        if response.status_code != 200:
+            error_msg = f"API request failed with status {response.status_code}"
+            error_detail = None
+            try:
+                error_detail = self.codec.loads(response.content)
+                error_msg += f"\nResponse: {json.dumps(error_detail, indent=2)}"
+            except ValueError:
+                error_msg += f"\nResponse Text: {response.text}"
+
+            self.logger.error(error_msg)
+            error = APIError(
+                error_msg,
+                status_code=response.status_code,
+                response=error_detail
+            )
+            if response.status_code >= 500:
+                raise RetryableError(
+                    RetryPolicy.SERVER,
+                    error,
+                    parse_retry_after(response.headers.get("Retry-After"))
+                )
+            raise error
+
+    @staticmethod
+    def _request_token(response: requests.Response) -> Optional[str]:
+        """Access token the request of a response was sent with."""
+        request = getattr(response, "request", None)
+        if request is None:
+            return None
+        authorization = request.headers.get("Authorization", "")
+        return authorization[len("Bearer "):] if authorization.startswith("Bearer ") else None
+
+    def _check_graphql_errors(
+        self,
+        response_data: Dict[str, Any],
+        cost_key: str,
+        allow_partial: bool = False
+    ) -> None:
+        """
+        Raise for the GraphQL errors of a decoded response.
+        
+        Args:
+            response_data (Dict[str, Any]): Decoded API response
+            cost_key (str): Query identifier from _get_cost_key
+            allow_partial (bool): Accept errors when some data came back
+            
+        Raises:
+            RetryableError: For insufficient credits, after syncing the rate limiter
+            APIError: For any other GraphQL error
+        """
+        if 'errors' in response_data:
+            error_msg = f"GraphQL errors: {json.dumps(response_data['errors'], indent=2)}"
+            self.logger.error(error_msg)
+
+            # Handle insufficient credits error
+            for error in response_data['errors']:
+                if error.get("code") == 30:
+                    # El saldo informado reemplaza al local; el próximo acquire
+                    # espera exactamente lo necesario para juntar los créditos
+                    self.rate_limiter.sync(
+                        error.get("remaining_credits"),
+                        cost_key,
+                        error.get("required_credits")
+                    )
+                    raise RetryableError(
+                        RetryPolicy.THROTTLE,
+                        APIError(error_msg, response=response_data),
+                        parse_time_remaining(error.get("time_remaining"))
+                    )
+
+            if allow_partial and response_data.get('data'):
+                self.logger.warning(f"Returning partial data with {len(response_data['errors'])} GraphQL errors")
+                return
+
+            raise APIError(error_msg, response=response_data)
+
+    def _make_batched_request(
+        self,
+        field: str,
+        selection: str,
+        arguments: Dict[str, str],
+        items: List[Dict[str, Any]],
+        max_complexity: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Query many entities with aliased GraphQL documents, a batch per round trip.
+        
+        The batch size follows a complexity budget: it starts from
+        Config.BATCH_DEFAULT_ITEM_COST per item and adapts to the complexity
+        the API reports for each batch.
+        
+        Args:
+            field (str): Root field queried once per item, e.g. 'product'
+            selection (str): Selection set of the field, without the outer braces
+            arguments (Dict[str, str]): Argument name -> GraphQL type
+            items (List[Dict[str, Any]]): Argument values for each item
+            max_complexity (float, optional): Credits a single batch may cost
+            
+        Returns:
+            List[Dict[str, Any]]: One {"data": ..., "errors": [...]} per item, in order
+        """
+        budget = max_complexity or self.config.BATCH_MAX_COMPLEXITY
+        results = []
+        start = 0
+        
+        while start < len(items):
+            item_cost = self._batch_item_costs.get(field, self.config.BATCH_DEFAULT_ITEM_COST)
+            batch_size = int(max(1, min(self.config.BATCH_MAX_SIZE, budget // item_cost)))
+            batch = items[start:start + batch_size]
+            
+            query, variables, aliases = build_aliased_query(field, selection, arguments, batch)
+            self.logger.debug(f"Batching {len(batch)} '{field}' queries in one request")
+            response = self._make_request(query, variables, allow_partial=True)
+            
+            complexity = self._extract_complexity(response)
+            if complexity:
+                self._batch_item_costs[field] = complexity / len(batch)
+            
+            split = split_aliased_response(response, aliases)
+            results.extend(split[alias] for alias in aliases)
+            start += len(batch)
+        
+        return results
+
+    def _handle_rate_limiting(self, cost_key: str) -> float:
+        """
+        Wait until the credit bucket can cover the expected cost of a query.
+        
+        Args:
+            cost_key (str): Query identifier from _get_cost_key
+            
+        Returns:
+            float: Credits reserved for the request
+        """
+        return self.rate_limiter.acquire(cost_key)
+
+    def _paginator(
+        self,
+        query: str,
+        variables: Dict[str, Any],
+        connection_path: List[str],
+        flatten: Flatten,
+        max_records: int,
+        page_size: int,
+        stream: bool = False,
+        adaptive: Optional[bool] = None,
+        size_key: Optional[str] = None,
+        prefetch: Optional[int] = None
+    ) -> Paginator:
+        """
+        Create a lazy paginator over a cursor-based connection.
+        
+        Args:
+            query (str): GraphQL query taking $first and $after
+            variables (Dict[str, Any]): Query variables without first/after
+            connection_path (List[str]): Keys from the response to the connection
+            flatten (Callable | ColumnarFlattener): Turns a node into a record or a
+                list of records, or a page of nodes into column buffers
+            max_records (int): Maximum number of nodes to fetch
+            page_size (int): Nodes per page, or the first page size when adaptive
+            stream (bool): Decode each page incrementally instead of loading it whole
+            adaptive (bool, optional): Size pages from the reported complexity,
+                Config.PAGE_SIZE_ADAPTIVE by default
+            size_key (str, optional): Groups paginators that share learned page
+                sizes; the operation name by default
+            prefetch (int, optional): Pages fetched ahead of the consumer,
+                Config.PAGINATION_PREFETCH by default
+            
+        Returns:
+            Paginator: Iterate it for records, or use .chunks() for DataFrames
+        """
+        return Paginator(
+            self, query, variables, connection_path, flatten, max_records, page_size,
+            stream, adaptive, size_key, prefetch
+        )
+
+    def _record_attempt(
+        self,
+        cost_key: str,
+        started: float,
+        status: str,
+        complexity: Optional[float]
+    ) -> None:
+        """
+        Record the latency and credits of one request attempt.
+        
+        Args:
+            cost_key (str): Query identifier from _get_cost_key
+            started (float): time.monotonic() when the attempt was sent
+            status (str): 'ok', 'error' or 'cancelled'
+            complexity (float, optional): Credits charged by the API
+        """
+        operation = cost_key.split(":", 1)[0]
+        self.metrics.observe(
+            "shiphero_request_duration_seconds",
+            time.monotonic() - started,
+            operation=operation,
+            status=status
+        )
+        if complexity:
+            self.metrics.inc("shiphero_credits_used_total", complexity, operation=operation)
+
+    def _record_retry(self, cost_key: str, error_class: str, delay: float) -> None:
+        """Count a retry and the time slept before it."""
+        operation = cost_key.split(":", 1)[0]
+        self.metrics.inc("shiphero_retries_total", operation=operation, error_class=error_class)
+        self.metrics.inc(
+            "shiphero_retry_sleep_seconds_total", delay, operation=operation, error_class=error_class
+        )
+
+    def _record_page(self, operation: str, rows: int) -> None:
+        """
+        Count one page fetched by a paginated fetcher and the rows it produced.
+        
+        Args:
+            operation (str): Fetcher name, e.g. 'inventory_changes'
+            rows (int): Rows produced from the page
+        """
+        self.metrics.inc("shiphero_pages_total", operation=operation)
+        self.metrics.inc("shiphero_rows_total", rows, operation=operation)
+
+    @staticmethod
+    def _get_cost_key(query: str, variables: Optional[Dict] = None) -> str:
+        """
+        Identify a query for credit accounting: operation name plus page size.
+        
+        Args:
+            query (str): GraphQL query
+            variables (Dict, optional): Query variables
+            
+        Returns:
+            str: Cost key
+        """
+        operation = get_operation_name(query)
+        first = (variables or {}).get("first")
+        return f"{operation}:{first}" if first else operation
+
+    @staticmethod
+    def _extract_request_id(response_data: Dict[str, Any]) -> Optional[str]:
+        """
+        Read the request_id that ShipHero reports for every root field of a response.
         
-    def _handle_rate_limiting(self) -> None:
-        """Handle rate limiting by implementing delay if necessary."""
-        current_time = time.time()
-        time_diff = current_time - self._last_request_time
-        
-        if time_diff < 60:  # Within the same minute
-            if self._request_count >= self.config.MAX_REQUESTS_PER_MINUTE:
-                sleep_time = 60 - time_diff
-                self.logger.warning(f"Rate limit approached, sleeping for {sleep_time:.2f} seconds")
-                time.sleep(sleep_time)
-                self._request_count = 0
-                self._last_request_time = time.time()
-        else:
-            # Reset counters for new minute
-            self._request_count = 0
-            self._last_request_time = current_time
\ No newline at end of file
+        Args:
+            response_data (Dict[str, Any]): Decoded API response
+            
+        Returns:
+            Optional[str]: Request id, comma-separated for aliased queries, or None
+        """
+        data = response_data.get("data") or {}
+        request_ids = [
+            value["request_id"]
+            for value in data.values()
+            if isinstance(value, dict) and value.get("request_id")
+        ]
+        return ",".join(request_ids) if request_ids else None
+
+    @staticmethod
+    def _extract_complexity(response_data: Dict[str, Any]) -> Optional[float]:
+        """
+        Sum the complexity reported by every root field of a response.
+        
+        Args:
+            response_data (Dict[str, Any]): Decoded API response
+            
+        Returns:
+            Optional[float]: Credits charged, or None if not reported
+        """
+        data = response_data.get("data") or {}
+        costs = [
+            value["complexity"]
+            for value in data.values()
+            if isinstance(value, dict) and value.get("complexity") is not None
+        ]
+        return float(sum(costs)) if costs else None
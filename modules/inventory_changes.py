@@ -1,12 +1,25 @@
 # modules/inventory_changes.py
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 import pandas as pd
 from datetime import datetime
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from modules.base import ShipHeroAPI
+from utils.pagination import Paginator
+from utils.columnar import ColumnarFlattener
+from utils.checkpoint import DONE, CheckpointStore
+from utils.sync_state import SyncStateStore, latest_timestamp
 from utils.exceptions import ValidationError
-from sqlalchemy import create_engine
+from utils.tracing import traced
+from utils.graphql import build_selection, resolve_field_paths
+from utils.helpers import (
+    content_hash, ensure_unique_key, has_unique_key, migrate_unique_key, parse_datetime, split_time_range,
+    upsert_dataframe
+)
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import SQLAlchemyError
 
 class InventoryChanges(ShipHeroAPI):
@@ -14,6 +27,44 @@ class InventoryChanges(ShipHeroAPI):
     Module for handling inventory changes in ShipHero.
     Inherits from ShipHeroAPI base class.
     """
+
+    # Columna de salida -> campos de GraphQL necesarios para construirla
+    FIELDS = {
+        'user_id': ['user_id'],
+        'account_id': ['account_id'],
+        'warehouse_id': ['warehouse_id'],
+        'sku': ['sku'],
+        'previous_on_hand': ['previous_on_hand'],
+        'change_in_on_hand': ['change_in_on_hand'],
+        'current_on_hand': ['previous_on_hand', 'change_in_on_hand'],
+        'reason': ['reason'],
+        'cycle_counted': ['cycle_counted'],
+        'location_id': ['location_id'],
+        'created_at': ['created_at'],
+        'location_name': ['location.name'],
+        'location_zone': ['location.zone'],
+        'location_pickable': ['location.pickable'],
+        'location_sellable': ['location.sellable'],
+        'location_temperature': ['location.temperature'],
+        'location_last_counted': ['location.last_counted']
+    }
+    
+    # Columna de salida -> ruta del campo en el nodo; current_on_hand se calcula por frame
+    COLUMNS = ColumnarFlattener(
+        {
+            column: paths[0] for column, paths in FIELDS.items() if column != 'current_on_hand'
+        },
+        derived={
+            'current_on_hand': lambda df: (
+                pd.to_numeric(df['previous_on_hand']).fillna(0) + pd.to_numeric(df['change_in_on_hand']).fillna(0)
+            )
+        },
+        order=list(FIELDS)
+    )
+    
+    # Columnas que identifican un cambio; su hash es la clave del upsert
+    HASH_COLUMNS = ['sku', 'warehouse_id', 'location_id', 'created_at', 'change_in_on_hand', 'reason']
+    HASH_KEY = 'change_hash'
     
     def __init__(self):
         """Initialize the InventoryChanges module."""
@@ -27,7 +78,8 @@ class InventoryChanges(ShipHeroAPI):
         sku: Optional[str] = None,
         location_id: Optional[str] = None,
         first: int = 100,
-        reason: Optional[str] = None
+        reason: Optional[str] = None,
+        fields: Optional[List[str]] = None
     ) -> str:
         """
         Build GraphQL query for inventory changes.
@@ -38,10 +90,15 @@ class InventoryChanges(ShipHeroAPI):
             sku (str, optional): Specific SKU to filter
             location_id (str, optional): Specific location ID to filter
             first (int): Number of records to fetch per page
+            fields (List[str], optional): Output columns to request; None requests all
             
         Returns:
             str: GraphQL query string
         """
+        selection = build_selection(
+            resolve_field_paths(self.FIELDS, fields),
+            indent=" " * 28
+        )
         return """
         query($dateFrom: ISODateTime, $dateTo: ISODateTime, $sku: String, $first: Int, $after: String, $reason: String) {
             inventory_changes(
@@ -64,30 +121,7 @@ class InventoryChanges(ShipHeroAPI):
                     }
                     edges {
                         node {
-                            user_id
-                            account_id
-                            warehouse_id
-                            sku
-                            previous_on_hand
-                            change_in_on_hand
-                            reason
-                            cycle_counted
-                            location_id
-                            created_at
-                            location {
-                                id
-                                legacy_id
-                                account_id
-                                warehouse_id
-                                name
-                                zone
-                                pickable
-                                sellable
-                                is_cart
-                                temperature
-                                last_counted
-                                created_at
-                            }
+""" + selection + """
                         }
                         cursor
                     }
@@ -96,38 +130,67 @@ class InventoryChanges(ShipHeroAPI):
         }
         """
 
-    def _flatten_inventory_change(self, node: Dict[str, Any]) -> Dict[str, Any]:
+    def _inventory_changes_paginator(
+        self,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        sku: Optional[str] = None,
+        location_id: Optional[str] = None,
+        reason: Optional[str] = None,
+        max_records: int = 1000,
+        fields: Optional[List[str]] = None,
+        stream: bool = False,
+        prefetch: Optional[int] = None
+    ) -> Paginator:
+        """Build the paginator behind get_inventory_changes and iter_inventory_changes."""
+        return self._paginator(
+            self._build_inventory_changes_query(fields=fields),
+            {
+                "dateFrom": date_from,
+                "dateTo": date_to,
+                "sku": sku,
+                "locationId": location_id,
+                "reason": reason
+            },
+            ['data', 'inventory_changes', 'data'],
+            self.COLUMNS,
+            max_records,
+            page_size=100,
+            stream=stream,
+            prefetch=prefetch
+        )
+
+    @staticmethod
+    def _in_window(df: pd.DataFrame, window_start: datetime, window_end: datetime, last: bool) -> pd.DataFrame:
+        """Keep the changes with window_start <= created_at < window_end, or <= for the last window."""
+        if not len(df):
+            return df
+        created_at = InventoryChanges._created_at(df)
+        keep = (created_at >= window_start) & ((created_at < window_end) | last)
+        return df[keep]
+
+    @staticmethod
+    def _created_at(df: pd.DataFrame) -> pd.Series:
+        """Get created_at as naive UTC, comparable with the window bounds."""
+        created_at = df['created_at']
+        if created_at.dt.tz is not None:
+            created_at = created_at.dt.tz_convert('UTC').dt.tz_localize(None)
+        return created_at
+
+    @staticmethod
+    def _convert_types(df: pd.DataFrame) -> pd.DataFrame:
         """
-        Flatten a single inventory change record.
+        Parse created_at of a page of inventory changes.
         
-        Args:
-            node (Dict[str, Any]): Raw inventory change node
-            
-        Returns:
-            Dict[str, Any]: Flattened record
+        Values become naive UTC floored to whole seconds, the precision of
+        sph_transacciones.created_at (DATETIME): the row written, its
+        change_hash and the hash migrate_upsert_key computes back from the
+        stored row all come from the same value.
         """
-        location = node.get('location', {})
-        
-        return {
-            'user_id': node.get('user_id'),
-            'account_id': node.get('account_id'),
-            'warehouse_id': node.get('warehouse_id'),
-            'sku': node.get('sku'),
-            'previous_on_hand': node.get('previous_on_hand'),
-            'change_in_on_hand': node.get('change_in_on_hand'),
-            'current_on_hand': (node.get('previous_on_hand', 0) + 
-                              node.get('change_in_on_hand', 0)),
-            'reason': node.get('reason'),
-            'cycle_counted': node.get('cycle_counted'),
-            'location_id': node.get('location_id'),
-            'created_at': node.get('created_at'),
-            'location_name': location.get('name'),
-            'location_zone': location.get('zone'),
-            'location_pickable': location.get('pickable'),
-            'location_sellable': location.get('sellable'),
-            'location_temperature': location.get('temperature'),
-            'location_last_counted': location.get('last_counted')
-        }
+        if len(df) and 'created_at' in df.columns:
+            created_at = pd.to_datetime(df['created_at'], utc=True, format='ISO8601')
+            df['created_at'] = created_at.dt.tz_localize(None).dt.floor('s')
+        return df
 
     def get_inventory_changes(
         self,
@@ -136,7 +199,11 @@ class InventoryChanges(ShipHeroAPI):
         sku: Optional[str] = None,
         location_id: Optional[str] = None,
         reason: Optional[str] = None,
-        max_records: int = 1000
+        max_records: int = 1000,
+        fields: Optional[List[str]] = None,
+        stream: bool = False,
+        windows: int = 1,
+        prefetch: Optional[int] = None
     ) -> pd.DataFrame:
         """
         Fetch inventory changes with pagination support.
@@ -147,68 +214,145 @@ class InventoryChanges(ShipHeroAPI):
             sku (str, optional): Specific SKU to filter
             location_id (str, optional): Specific location ID to filter
             max_records (int): Maximum number of records to fetch
+            fields (List[str], optional): Output columns to fetch; None fetches all
+            stream (bool): Decode each page incrementally instead of loading it whole
+            windows (int): Split the date range into this many windows and
+                paginate them concurrently; requires date_from and date_to
+            prefetch (int, optional): Pages read ahead while the current one is
+                flattened, Config.PAGINATION_PREFETCH by default
             
         Returns:
             pd.DataFrame: DataFrame containing inventory changes
         """
-        all_changes = []
-        after_cursor = None
-        records_fetched = 0
-        page_size = min(100, max_records)
+        if windows > 1:
+            return self._get_inventory_changes_sharded(
+                date_from, date_to, sku, location_id, reason, max_records, fields, stream, windows, prefetch
+            )
+        paginator = self._inventory_changes_paginator(
+            date_from, date_to, sku, location_id, reason, max_records, fields, stream, prefetch
+        )
+        return self._convert_types(paginator.to_dataframe(columns=fields))
+
+    def _get_inventory_changes_sharded(
+        self,
+        date_from: Optional[str],
+        date_to: Optional[str],
+        sku: Optional[str],
+        location_id: Optional[str],
+        reason: Optional[str],
+        max_records: int,
+        fields: Optional[List[str]],
+        stream: bool,
+        windows: int,
+        prefetch: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Paginate consecutive sub-windows of [date_from, date_to] concurrently.
+        
+        Each window keeps only the changes with window_start <= created_at <
+        window_end (the last one also keeps date_to), so a change at a shared
+        boundary is counted once. Every window draws from the shared credit
+        bucket, so adding windows stops helping once credits are the limit.
+        The result is merged in created_at order and cut to max_records.
+        
+        Only the earliest max_records changes are returned, so a window stops
+        paginating as soon as it and the windows before it hold max_records
+        changes, and a window whose predecessors already do is not fetched:
+        the credits spent stay close to those of a single cursor instead of
+        up to one max_records per window.
+        
+        Returns:
+            pd.DataFrame: DataFrame containing inventory changes
+        """
+        if not date_from or not date_to:
+            raise ValidationError("date_from and date_to are required to split the range into windows")
+        start, end = parse_datetime(date_from), parse_datetime(date_to)
+        bounds = split_time_range(start, end, windows)
         
-        query = self._build_inventory_changes_query()
+        # created_at hace falta para recortar las ventanas y ordenar el resultado
+        query_fields = fields if fields is None or 'created_at' in fields else fields + ['created_at']
         
-        while records_fetched < max_records:
-            variables = {
-                "dateFrom": date_from,
-                "dateTo": date_to,
-                "sku": sku,
-                "locationId": location_id,
-                "first": page_size,
-                "after": after_cursor,
-                "reason": reason
-            }
-            
-            response = self._make_request(query, variables)
-            
-            try:
-                inventory_changes = response['data']['inventory_changes']
-                inventory_changes_data = inventory_changes['data']
-                if not inventory_changes_data:
-                    break
-                edges = inventory_changes_data['edges']
-                
-                if not edges:
-                    break
-                    
-                # Flatten and collect records
-                for edge in edges:
-                    all_changes.append(self._flatten_inventory_change(edge['node']))
-                    records_fetched += 1
-                
-                # Check pagination
-                if not 'pageInfo' in inventory_changes_data:
-                    break
-                
-                page_info = inventory_changes_data['pageInfo']
-                if not page_info['hasNextPage']:
-                    break
-                    
-                after_cursor = page_info['endCursor']
-                
-            except KeyError as e:
-                self.logger.error(f"Unexpected response format: {str(e)}")
-                raise ValidationError(f"Invalid response format: {str(e)}")
+        # Cambios ya traídos por cada ventana, para cortar las que no entran en max_records
+        fetched = [0] * len(bounds)
+        fetched_lock = threading.Lock()
+        
+        def enough(index: int) -> bool:
+            with fetched_lock:
+                return sum(fetched[:index + 1]) >= max_records
         
-        df = pd.DataFrame(all_changes)  # Envolver en una lista para crear un DataFrame de una fila
+        def fetch_window(index: int) -> pd.DataFrame:
+            window_start, window_end = bounds[index]
+            pages = []
+            if enough(index):
+                return pd.DataFrame([], columns=query_fields)
+            with self.tracer.span("inventory_changes window", cat="api",
+                                  date_from=window_start.isoformat(), date_to=window_end.isoformat()):
+                for df in self._inventory_changes_paginator(
+                    window_start.isoformat(), window_end.isoformat(), sku, location_id, reason,
+                    max_records, query_fields, stream, prefetch
+                ).frames(columns=query_fields):
+                    df = self._in_window(self._convert_types(df), window_start, window_end, window_end == end)
+                    pages.append(df)
+                    with fetched_lock:
+                        fetched[index] += len(df)
+                    if enough(index):
+                        break
+            return pd.concat(pages, ignore_index=True) if pages else pd.DataFrame([], columns=query_fields)
+        
+        self.logger.info(f"Fetching inventory changes from {date_from} to {date_to} in {len(bounds)} windows")
+        with ThreadPoolExecutor(
+            max_workers=min(len(bounds), self.config.INVENTORY_CHANGES_MAX_WINDOWS),
+            thread_name_prefix="shiphero-window"
+        ) as pool:
+            frames = [df for df in pool.map(fetch_window, range(len(bounds))) if len(df)]
+        
+        if not frames:
+            return pd.DataFrame([], columns=fields)
+        df = pd.concat(frames, ignore_index=True)
+        df = df.sort_values('created_at', kind='mergesort', ignore_index=True).head(max_records)
+        return df[fields] if fields else df
 
-        if len(all_changes) == 0:
-            return df
-        # Convertir el snapshot en un DataFrame
+    def iter_inventory_changes(
+        self,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        sku: Optional[str] = None,
+        location_id: Optional[str] = None,
+        reason: Optional[str] = None,
+        max_records: int = 1000,
+        fields: Optional[List[str]] = None,
+        stream: bool = False,
+        chunk_size: Optional[int] = None,
+        prefetch: Optional[int] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Fetch inventory changes lazily, in DataFrames of at most chunk_size rows.
         
-        df['created_at'] = pd.to_datetime(df['created_at'])
-        return df
+        Only one chunk is held in memory at a time, so millions of rows can
+        be exported or loaded without building a single huge DataFrame.
+        
+        Args:
+            date_from (str, optional): Start date in ISO format
+            date_to (str, optional): End date in ISO format
+            sku (str, optional): Specific SKU to filter
+            location_id (str, optional): Specific location ID to filter
+            max_records (int): Maximum number of records to fetch
+            fields (List[str], optional): Output columns to fetch; None fetches all
+            stream (bool): Decode each page incrementally instead of loading it whole
+            chunk_size (int, optional): Rows per DataFrame, Config.PAGINATION_CHUNK_SIZE by default
+            prefetch (int, optional): Pages read ahead while the caller processes
+                the current chunk, Config.PAGINATION_PREFETCH by default
+            
+        Yields:
+            pd.DataFrame: Next chunk of inventory changes
+        """
+        paginator = self._inventory_changes_paginator(
+            date_from, date_to, sku, location_id, reason, max_records, fields, stream, prefetch
+        )
+        for df in paginator.chunks(chunk_size, columns=fields):
+            yield self._convert_types(df)
 
+    @traced(cat="export")
     def export_to_csv(
         self,
         df: pd.DataFrame,
@@ -242,6 +386,7 @@ class InventoryChanges(ShipHeroAPI):
         self.logger.info(f"Exported {len(df)} records to {filepath}")
         return filepath
     
+    @traced(cat="db")
     def insert_df_to_db(self,df,nombre_tabla):
         if not nombre_tabla:
             raise ValidationError(f"Se necesita un nombre de tabla")
@@ -267,4 +412,266 @@ class InventoryChanges(ShipHeroAPI):
             except Exception as e:
                 # Manejo de otros errores
                 self.logger.error(f"Error inesperado: {e}")
-                raise ValidationError(f"Error inesperado: {e}")
\ No newline at end of file
+                raise ValidationError(f"Error inesperado: {e}")
+    
+    @traced(cat="db")
+    def load_inventory_changes(
+        self,
+        table: str,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        sku: Optional[str] = None,
+        location_id: Optional[str] = None,
+        reason: Optional[str] = None,
+        max_records: int = 1000,
+        fields: Optional[List[str]] = None,
+        stream: bool = False,
+        windows: int = 1,
+        chunk_size: Optional[int] = None,
+        engine: Optional[Engine] = None,
+        prefetch: Optional[int] = None,
+        upsert: Optional[bool] = None
+    ) -> int:
+        """
+        Insert inventory changes into a table chunk by chunk, resuming interrupted syncs.
+        
+        The range is loaded as consecutive sub-windows of about max_records
+        changes: one that reaches the cap ends at the created_at of its last
+        committed chunk and the next starts there, and one well below it
+        doubles the next, so dense periods are never truncated or fetched
+        twice and quiet ones take few calls. Pages are inserted as they arrive,
+        in chunks of whole pages, each in one transaction with its checkpoint
+        (utils.checkpoint) and the 'inventory_changes' high-water mark
+        (utils.sync_state). If the table has windows left unfinished by a
+        previous run, those are resumed, from their last committed cursor if
+        they had started inserting, and date_from/date_to are ignored.
+        
+        With upsert, every row carries a change_hash of HASH_COLUMNS and is
+        written with INSERT ... ON DUPLICATE KEY UPDATE on a unique key over
+        it, so overlapping windows, retries and reruns never duplicate rows.
+        A new table gets the key; an existing one must have been migrated
+        with migrate_upsert_key first.
+        
+        Args:
+            table (str): Target table, also the name of the sync
+            date_from (str, optional): Start date in ISO format
+            date_to (str, optional): End date in ISO format
+            sku (str, optional): Specific SKU to filter
+            location_id (str, optional): Specific location ID to filter
+            max_records (int): Changes per sub-window before it is cut short
+            fields (List[str], optional): Columns to insert; None inserts all
+            stream (bool): Decode each page incrementally instead of loading it whole
+            windows (int): Date windows loaded concurrently, each with its own checkpoint
+            chunk_size (int, optional): Minimum rows per transaction, Config.PAGINATION_CHUNK_SIZE by default
+            engine (Engine, optional): Target database, DATABASE_URL by default
+            prefetch (int, optional): Pages read ahead while a chunk is inserted,
+                Config.PAGINATION_PREFETCH by default
+            upsert (bool, optional): Upsert on the content hash instead of appending,
+                Config.INVENTORY_CHANGES_UPSERT by default
+            
+        Returns:
+            int: Rows committed for the windows of this sync, including earlier runs
+            
+        Raises:
+            ValidationError: If the dates are missing, the table was not
+                migrated for upserts or an insert fails
+        """
+        if not table:
+            raise ValidationError("Se necesita un nombre de tabla")
+        engine = engine or create_engine(os.getenv("DATABASE_URL"))
+        upsert = self.config.INVENTORY_CHANGES_UPSERT if upsert is None else upsert
+        if upsert and inspect(engine).has_table(table):
+            with engine.connect() as connection:
+                if not has_unique_key(connection, table, self.HASH_KEY):
+                    raise ValidationError(
+                        f"{table} has no unique key on {self.HASH_KEY}: "
+                        f"run migrate_upsert_key (main.py --module inventory --action migrate_upsert_key) first"
+                    )
+        store = CheckpointStore(engine)
+        state = SyncStateStore(engine)
+        state.ensure(SyncStateStore.INVENTORY_CHANGES)
+        
+        checkpoints = store.pending(table)
+        if checkpoints:
+            self.logger.info(
+                f"Resuming {len(checkpoints)} unfinished windows of {table} "
+                f"from {checkpoints[0]['window_from']} ({sum(cp['rows_committed'] for cp in checkpoints)} rows already committed)"
+            )
+        else:
+            if not date_from or not date_to:
+                raise ValidationError("date_from and date_to are required to start a sync")
+            bounds = split_time_range(parse_datetime(date_from), parse_datetime(date_to), windows)
+            checkpoints = store.start(table, bounds)
+        end = max(cp['window_to'] for cp in checkpoints)
+        
+        # created_at hace falta para recortar las ventanas, y el upsert necesita las columnas del hash
+        required = ['created_at'] + (self.HASH_COLUMNS if upsert else [])
+        query_fields = fields if fields is None else fields + [f for f in required if f not in fields]
+        
+        def table_rows(df: pd.DataFrame) -> pd.DataFrame:
+            """Columns written to the table, plus the hash key when upserting."""
+            frame = df[fields] if fields else df
+            if upsert:
+                frame = frame.assign(**{self.HASH_KEY: content_hash(df, self.HASH_COLUMNS)})
+            return frame
+        
+        # Si la tabla no existe, to_sql la crea (y con upsert, su clave única se
+        # verifica una vez): hasta entonces las ventanas insertan de a una
+        table_lock = threading.Lock()
+        table_ready = threading.Event()
+        if not upsert and inspect(engine).has_table(table):
+            table_ready.set()
+        
+        def commit_chunk(
+            df: pd.DataFrame,
+            checkpoint: Dict[str, Any],
+            position: Tuple[Optional[str], int, bool],
+            split_at: Optional[datetime] = None,
+            cut_at: Optional[datetime] = None,
+            remainder: Optional[Dict[str, Any]] = None
+        ) -> Optional[Dict[str, Any]]:
+            with engine.begin() as connection:
+                if split_at is not None:
+                    # El resto de la ventana queda registrado en la misma transacción
+                    remainder = store.split(connection, checkpoint, split_at)
+                if cut_at is not None:
+                    # La ventana llena termina antes: el resto (o el corte anterior) arranca en cut_at
+                    remainder = store.split(connection, checkpoint, cut_at, remainder)
+                if len(df) and upsert:
+                    upsert_dataframe(connection, table_rows(df), table, [self.HASH_KEY])
+                elif len(df):
+                    table_rows(df).to_sql(table, con=connection, if_exists="append", index=False, chunksize=1000)
+                cursor, nodes_fetched, done = position
+                store.save(connection, checkpoint, cursor, nodes_fetched, len(df), done)
+                if len(df):
+                    state.advance(connection, SyncStateStore.INVENTORY_CHANGES, len(df),
+                                  latest_timestamp(df['created_at']), cursor)
+            return remainder
+        
+        def commit(df: pd.DataFrame, checkpoint: Dict[str, Any], position: Tuple[Optional[str], int, bool],
+                   *cut: Any) -> Optional[Dict[str, Any]]:
+            try:
+                if table_ready.is_set():
+                    return commit_chunk(df, checkpoint, position, *cut)
+                with table_lock:
+                    if upsert and len(df) and not table_ready.is_set():
+                        with engine.begin() as connection:
+                            ensure_unique_key(connection, table_rows(df.head(0)), table, self.HASH_KEY)
+                    remainder = commit_chunk(df, checkpoint, position, *cut)
+                    if len(df):
+                        table_ready.set()
+                    return remainder
+            except SQLAlchemyError as e:
+                self.logger.error(f"Error al insertar los datos: {e}")
+                raise ValidationError(f"Error al insertar los datos: {e}")
+        
+        def walk(checkpoint: Dict[str, Any]) -> int:
+            """
+            Load a pending window as sub-windows of about max_records changes.
+            
+            Every chunk is committed as it arrives. A sub-window that reaches
+            max_records with pages left ends at the created_at of its last
+            chunk: that instant's rows are dropped from the chunk and the next
+            sub-window starts there, with the span that fitted, so only those
+            rows are fetched twice. A sub-window well below the cap doubles the
+            span of the next one. Windows resumed from a previous run, and ones
+            that cannot be cut (a single instant over the cap, or pages not
+            sorted by created_at), finish uncapped.
+            """
+            committed = 0
+            uncapped = bool(checkpoint['cursor'] or checkpoint['rows_committed'])
+            span = checkpoint['window_to'] - checkpoint['window_from']
+            remainder = None
+            while True:
+                window_start, segment_end = checkpoint['window_from'], checkpoint['window_to']
+                started = bool(checkpoint['cursor'] or checkpoint['rows_committed'])
+                window_end = segment_end if started else min(window_start + span, segment_end)
+                split_at = window_end if window_end < segment_end else None
+                cut_at, last_seen = None, None
+                with self.tracer.span("inventory_changes window", cat="api",
+                                      date_from=window_start.isoformat(), date_to=window_end.isoformat()):
+                    paginator = self._inventory_changes_paginator(
+                        window_start.isoformat(), window_end.isoformat(), sku, location_id, reason,
+                        float('inf') if uncapped else max_records, query_fields, stream, prefetch
+                    ).resume(checkpoint['cursor'], checkpoint['nodes_fetched'])
+                    for df in paginator.page_chunks(chunk_size, columns=query_fields):
+                        df = self._in_window(self._convert_types(df), window_start, window_end, window_end == end)
+                        position = (paginator.after_cursor, paginator.records_fetched, not paginator.has_next_page)
+                        if len(df):
+                            created_at = self._created_at(df)
+                            # El corte supone páginas ordenadas por created_at
+                            if not created_at.is_monotonic_increasing or (
+                                    last_seen is not None and created_at.iloc[0] < last_seen):
+                                uncapped = True
+                            last_seen = created_at.iloc[-1]
+                        if paginator.exhausted and paginator.has_next_page and not uncapped \
+                                and last_seen is not None and last_seen > window_start:
+                            cut_at = last_seen
+                            df = df[self._created_at(df) < cut_at]
+                            position = position[:2] + (True,)
+                        remainder = commit(df, checkpoint, position, split_at, cut_at, remainder)
+                        split_at = None
+                if cut_at is None and paginator.has_next_page:
+                    # Tope alcanzado sin poder cortar: la misma ventana sigue desde su cursor
+                    self.logger.info(f"{table} {window_start} - {window_end} cannot be cut, loading it uncapped")
+                    uncapped = True
+                    continue
+                if checkpoint['status'] != DONE:
+                    remainder = commit(pd.DataFrame(), checkpoint,
+                                       (paginator.after_cursor, paginator.records_fetched, True), split_at) or remainder
+                loaded = checkpoint['rows_committed']
+                committed += loaded
+                self.logger.info(f"{table} {window_start} - {checkpoint['window_to']}: {loaded} rows committed")
+                
+                if remainder is None:
+                    return committed
+                checkpoint, remainder = remainder, None
+                uncapped = False
+                if cut_at is not None:
+                    span = cut_at - window_start
+                elif loaded < max_records * self.config.INVENTORY_CHANGES_WIDEN_BELOW:
+                    span *= 2
+        
+        if len(checkpoints) == 1:
+            return walk(checkpoints[0])
+        with ThreadPoolExecutor(
+            max_workers=min(len(checkpoints), self.config.INVENTORY_CHANGES_MAX_WINDOWS),
+            thread_name_prefix="shiphero-window"
+        ) as pool:
+            return sum(pool.map(walk, checkpoints))
+
+    @traced(cat="db")
+    def migrate_upsert_key(self, table: str, engine: Optional[Engine] = None, chunk_size: Optional[int] = None) -> int:
+        """
+        Prepare an existing table of inventory changes for upserts.
+        
+        Adds change_hash, backfills it from the stored HASH_COLUMNS of every
+        row (hashing them as the loader hashes fetched pages), drops repeated
+        changes left by overlapping appends and creates the unique index, in
+        that order (utils.helpers.migrate_unique_key). Run it once before
+        enabling SHIPHERO_INVENTORY_UPSERT on a table loaded without it.
+        
+        Args:
+            table (str): Table to migrate
+            engine (Engine, optional): Target database, DATABASE_URL by default
+            chunk_size (int, optional): Rows backfilled per transaction,
+                Config.PAGINATION_CHUNK_SIZE by default
+            
+        Returns:
+            int: Rows backfilled
+            
+        Raises:
+            ValidationError: If the table cannot be migrated
+        """
+        engine = engine or create_engine(os.getenv("DATABASE_URL"))
+        try:
+            backfilled = migrate_unique_key(
+                engine, table, self.HASH_KEY, self.HASH_COLUMNS,
+                lambda df: content_hash(self._convert_types(df), self.HASH_COLUMNS),
+                chunk_size or self.config.PAGINATION_CHUNK_SIZE
+            )
+        except (ValueError, SQLAlchemyError) as e:
+            self.logger.error(f"Error al migrar {table}: {e}")
+            raise ValidationError(f"Error al migrar {table}: {e}")
+        self.logger.info(f"{table}: {self.HASH_KEY} backfilled on {backfilled} rows, unique key in place")
+        return backfilled
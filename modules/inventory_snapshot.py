@@ -1,13 +1,18 @@
 # modules/inventory_snapshot.py
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+from contextlib import contextmanager
 import pandas as pd
 from datetime import datetime
 import os
 import requests
 from modules.base import ShipHeroAPI
 from utils.exceptions import ValidationError
-from sqlalchemy import create_engine
+from utils.tracing import traced
+from utils.json_stream import JSONStreamReader
+from utils.sync_state import SyncStateStore, latest_timestamp
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import SQLAlchemyError
 
 class InventorySnapshot(ShipHeroAPI):
@@ -134,22 +139,14 @@ class InventorySnapshot(ShipHeroAPI):
     }
     """
 
-    def _build_inventory_snapshot_query(
-        self,
-        snapshot_id: Optional[str] = None
-    ) -> str:
+    def _build_inventory_snapshot_selection(self) -> str:
         """
-        Build GraphQL query for inventory changes.
+        Build the selection set of the inventory_snapshot query.
         
-        Args:
-            snapshot_id (str, optional): Specific snapshot_id to filter
-            
         Returns:
-            str: GraphQL query string
+            str: GraphQL selection set, without the outer braces
         """
         return """
-        query($snapshot_id: String!) {
-  inventory_snapshot(snapshot_id: $snapshot_id) {
     request_id
     complexity
     snapshot {
@@ -171,6 +168,25 @@ class InventorySnapshot(ShipHeroAPI):
       snapshot_url
       snapshot_expiration
     }
+        """
+
+    def _build_inventory_snapshot_query(
+        self,
+        snapshot_id: Optional[str] = None
+    ) -> str:
+        """
+        Build GraphQL query for inventory changes.
+        
+        Args:
+            snapshot_id (str, optional): Specific snapshot_id to filter
+            
+        Returns:
+            str: GraphQL query string
+        """
+        return """
+        query($snapshot_id: String!) {
+  inventory_snapshot(snapshot_id: $snapshot_id) {
+        """ + self._build_inventory_snapshot_selection() + """
   }
 }
         """
@@ -333,6 +349,43 @@ class InventorySnapshot(ShipHeroAPI):
             raise ValidationError(f"Fallo al obtener el snapshot: {str(e)}")
 
         
+    def get_snapshots_by_id(self, snapshot_ids: List[str]) -> pd.DataFrame:
+        """
+        Obtiene el estado de varios snapshots, agrupando varios IDs por request.
+        
+        Los snapshots con error no cortan el lote: se devuelven como una fila
+        con la columna `request_error` informada.
+        
+        Args:
+            snapshot_ids (List[str]): IDs de los snapshots a consultar.
+        
+        Returns:
+            pd.DataFrame: Una fila por snapshot, en el orden recibido.
+        """
+        results = self._make_batched_request(
+            "inventory_snapshot",
+            self._build_inventory_snapshot_selection(),
+            {"snapshot_id": "String!"},
+            [{"snapshot_id": snapshot_id} for snapshot_id in snapshot_ids]
+        )
+        
+        snapshots = []
+        for snapshot_id, result in zip(snapshot_ids, results):
+            snapshot = (result["data"] or {}).get("snapshot")
+            if result["errors"] or not isinstance(snapshot, dict):
+                error = "; ".join(error.get("message", "") for error in result["errors"])
+                error = error or "Formato de respuesta inválido: Falta la clave 'snapshot' o no es válida."
+                self.logger.warning(f"Error al obtener el snapshot {snapshot_id}: {error}")
+                snapshots.append({"snapshot_id": snapshot_id, "request_error": error})
+                continue
+            snapshots.append(dict(snapshot, request_error=None))
+        
+        df = pd.DataFrame(snapshots)
+        for column in ("created_at", "enqueued_at", "updated_at"):
+            if column in df.columns:
+                df[column] = pd.to_datetime(df[column])
+        return df
+
     def get_inventory(
         self
     ) -> str:
@@ -364,43 +417,242 @@ class InventorySnapshot(ShipHeroAPI):
             
         return snapshot_url
         
+    @contextmanager
+    def _snapshot_reader(self, snapshot_url: str) -> Iterator[JSONStreamReader]:
+        """
+        Open the snapshot download as an incremental JSON reader.
+        
+        Args:
+            snapshot_url (str): url donde esta alojado el json del inventario
+            
+        Yields:
+            JSONStreamReader: Reader over the response body
+            
+        Raises:
+            ValidationError: If the request fails or times out
+        """
+        headers = {
+            "Content-Type": "application/json"
+        }
+        # Solo el request: los errores del cuerpo del with son del consumidor
+        try:
+            response = self.http.get(snapshot_url, headers=headers, timeout=100, stream=True)
+            try:
+                response.raise_for_status()  # Levanta una excepción si el status code no es 200-299
+            except requests.exceptions.RequestException:
+                response.close()
+                raise
+        except requests.exceptions.Timeout as e:
+            self.logger.error("Error: La solicitud excedió el tiempo de espera.")
+            raise ValidationError("Error: La solicitud excedió el tiempo de espera.") from e
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Error al realizar la solicitud GET: {e}")
+            raise ValidationError(f"Error al realizar la solicitud GET: {e}") from e
+        
+        with response:
+            yield JSONStreamReader(self.http.iter_content(response, self.config.JSON_STREAM_CHUNK_SIZE))
+
+    def _snapshot_products(self, reader: JSONStreamReader) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Decode the products of a snapshot one by one.
+        
+        Only the decoding is guarded: a malformed payload or a download cut
+        while reading the body becomes a ValidationError, and whatever the
+        consumer raises between items is left untouched.
+        
+        Args:
+            reader (JSONStreamReader): Reader from _snapshot_reader
+            
+        Yields:
+            Tuple[str, Dict[str, Any]]: SKU and product data
+            
+        Raises:
+            ValidationError: If the payload is not valid JSON or the download fails
+        """
+        products = reader.items(["products"])
+        while True:
+            try:
+                item = next(products)
+            except StopIteration:
+                return
+            except ValueError as e:
+                self.logger.error(f"Error: No se pudo parsear la respuesta como JSON: {e}")
+                raise ValidationError(f"Error: No se pudo parsear la respuesta como JSON: {e}") from e
+            except requests.exceptions.RequestException as e:
+                self.logger.error(f"Error al descargar el snapshot: {e}")
+                raise ValidationError(f"Error al descargar el snapshot: {e}") from e
+            yield item
+
+    def _snapshot_chunks(self, reader: JSONStreamReader, chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Flatten the products of a snapshot into DataFrames of about chunk_size rows.
+        
+        Los datos generales del snapshot se toman de reader.header, es decir
+        de lo leído antes del chunk: si el payload los trae después de
+        products, esos chunks quedan sin ellos.
+        
+        Args:
+            reader (JSONStreamReader): Reader from _snapshot_reader
+            chunk_size (int, optional): Rows per DataFrame, Config.PAGINATION_CHUNK_SIZE by default
+            
+        Yields:
+            pd.DataFrame: Next chunk of rows; a single empty one for a snapshot without products
+        """
+        chunk_size = chunk_size or self.config.PAGINATION_CHUNK_SIZE
+        products = self._snapshot_products(reader)
+        total = 0
+        while True:
+            # Un span por chunk (descarga y aplanado), nunca uno por producto
+            with self.tracer.span("inventory_snapshot chunk", cat="flatten") as span:
+                rows: List[Dict[str, Any]] = []
+                for sku, product_data in products:
+                    rows.extend(self._flatten_snapshot_product(sku, product_data))
+                    if len(rows) >= chunk_size:
+                        break
+                else:
+                    products = None
+                span.set(rows=len(rows))
+            total += len(rows)
+            if products is None:
+                break
+            yield self._build_snapshot_dataframe(rows, reader.header)
+        self._record_page("inventory_snapshot", total)
+        if rows or total == len(rows):
+            yield self._build_snapshot_dataframe(rows, reader.document or {})
+
+    @traced(cat="flatten")
     def get_inventory_snapshot_by_url(
         self,
         snapshot_url: str
-    ) -> str:
+    ) -> pd.DataFrame:
         """
         Get current inventory status with pagination support.
         
+        El JSON se decodifica a medida que llega, pero el resultado es un único
+        DataFrame con todo el snapshot: para snapshots grandes usar
+        iter_inventory_snapshot_by_url o load_inventory_snapshot_by_url.
+        
         Args:
             snapshot_url (str, optional): url donde esta alojado el json del inventario
             
         Returns:
             pd.DataFrame: Current inventory status
         """
-        try:
-            headers = {
-                "Content-Type": "application/json"
-            }
-            response = requests.get(snapshot_url, headers=headers, timeout=100)
-            response.raise_for_status()  # Levanta una excepción si el status code no es 200-299
+        with self._snapshot_reader(snapshot_url) as reader:
+            flattened_data = []
+            for sku, product_data in self._snapshot_products(reader):
+                flattened_data.extend(self._flatten_snapshot_product(sku, product_data))
+            self._record_page("inventory_snapshot", len(flattened_data))
 
-            # Intenta parsear la respuesta como JSON
-            snapshot_json = response.json()
+        return self._build_snapshot_dataframe(flattened_data, reader.document or {})
 
-            return self.flatten_inventory_snapshot(snapshot_json)
+    def iter_inventory_snapshot_by_url(
+        self,
+        snapshot_url: str,
+        chunk_size: Optional[int] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Get a snapshot lazily, in DataFrames of about chunk_size rows.
+        
+        Cada chunk se entrega apenas se completa, así que la memoria depende de
+        chunk_size y no del tamaño del snapshot. snapshot_id y las fechas del
+        snapshot quedan vacías en los chunks leídos antes de que lleguen (ver
+        load_inventory_snapshot_by_url).
+        
+        Args:
+            snapshot_url (str): url donde esta alojado el json del inventario
+            chunk_size (int, optional): Rows per DataFrame, Config.PAGINATION_CHUNK_SIZE by default
+            
+        Yields:
+            pd.DataFrame: Next chunk of inventory rows
+        """
+        with self._snapshot_reader(snapshot_url) as reader:
+            yield from self._snapshot_chunks(reader, chunk_size)
 
-        except requests.exceptions.Timeout:
-            self.logger.error("Error: La solicitud excedió el tiempo de espera.")
-            raise ValidationError("Error: La solicitud excedió el tiempo de espera.")
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"Error al realizar la solicitud POST: {e}")
-            raise ValidationError(f"Error al realizar la solicitud POST: {e}")
-        except ValueError:
-            self.logger.error(f"Error: No se pudo parsear la respuesta como JSON")
-            raise ValidationError(f"Error: No se pudo parsear la respuesta como JSON")
+    @traced(cat="db")
+    def load_inventory_snapshot_by_url(
+        self,
+        snapshot_url: str,
+        nombre_tabla: str,
+        columns: Optional[Dict[str, Any]] = None,
+        stream: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        engine: Optional[Engine] = None
+    ) -> int:
+        """
+        Insert a snapshot into a table chunk by chunk, as it downloads.
+        
+        Every chunk is inserted in one transaction, so the table never has
+        part of a snapshot. If the payload lists snapshot_id and its dates
+        after the products, the rows inserted before them are completed with
+        an UPDATE on the same transaction, matched by `columns`.
         
-        return None
+        Args:
+            snapshot_url (str): url donde esta alojado el json del inventario
+            nombre_tabla (str): Target table
+            columns (Dict[str, Any], optional): Constant columns added to every row,
+                e.g. {'sph_snapshot_inventario_id': 1}
+            stream (str, optional): Stream of sph_sync_state advanced with the load
+            chunk_size (int, optional): Rows per insert, Config.PAGINATION_CHUNK_SIZE by default
+            engine (Engine, optional): Target database, DATABASE_URL by default
+            
+        Returns:
+            int: Rows inserted
+            
+        Raises:
+            ValidationError: If the download or an insert fails
+        """
+        if not nombre_tabla:
+            raise ValidationError(f"Se necesita un nombre de tabla")
+        columns = columns or {}
+        engine = engine or create_engine(os.getenv("DATABASE_URL"))
+        state = SyncStateStore(engine) if stream else None
+        if state:
+            state.ensure(stream)
+
+        total = 0
+        incomplete = False
+        try:
+            with engine.begin() as connection, self._snapshot_reader(snapshot_url) as reader:
+                for df in self._snapshot_chunks(reader, chunk_size):
+                    if len(df) and "snapshot_finished_at" not in reader.header:
+                        incomplete = True
+                    if len(df):
+                        df.assign(**columns).to_sql(
+                            nombre_tabla, con=connection, if_exists="append", index=False, chunksize=1000
+                        )
+                    total += len(df)
+
+                header = reader.document or {}
+                finished_at = pd.to_datetime(header.get("snapshot_finished_at"))
+                finished_at = None if pd.isna(finished_at) else finished_at.to_pydatetime()
+                if incomplete:
+                    # Los datos generales llegaron después de products: se completan las filas ya insertadas
+                    started_at = pd.to_datetime(header.get("snapshot_started_at"))
+                    match = "".join(f" AND {column} = :{column}" for column in columns)
+                    connection.execute(
+                        text(
+                            f"UPDATE {nombre_tabla} SET snapshot_id = :snapshot_id, "
+                            f"snapshot_started_at = :started_at, snapshot_finished_at = :finished_at "
+                            f"WHERE snapshot_finished_at IS NULL{match}"
+                        ),
+                        dict(
+                            columns,
+                            snapshot_id=header.get("snapshot_id", ""),
+                            started_at=None if pd.isna(started_at) else started_at.to_pydatetime(),
+                            finished_at=finished_at
+                        )
+                    )
+                if state:
+                    state.advance(connection, stream, total, finished_at or datetime.now())
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error al insertar los datos: {e}")
+            raise ValidationError(f"Error al insertar los datos: {e}")
+
+        self.logger.info(f"{total} filas del snapshot insertadas en {nombre_tabla}")
+        return total
     
+    @traced(cat="flatten")
     def flatten_inventory_snapshot(self,snapshot_json: dict) -> pd.DataFrame:
         """
         Convierte un JSON de inventario anidado en un DataFrame plano.
@@ -413,111 +665,140 @@ class InventorySnapshot(ShipHeroAPI):
         """
         flattened_data = []
 
-        # Extraer el ID del snapshot y detalles generales
-        snapshot_id = snapshot_json.get("snapshot_id", "")
-        warehouse_id = snapshot_json.get("warehouse_id", "")
-        snapshot_started_at = snapshot_json.get("snapshot_started_at", "")
-        snapshot_finished_at = snapshot_json.get("snapshot_finished_at", "")
-
         # Procesar los productos
         products = snapshot_json.get("products", {})
         for sku, product_data in products.items():
-            account_id = product_data.get("account_id", "")
-            vendors = product_data.get("vendors", {})
-            
-            # Procesar warehouse_products
-            warehouse_products = product_data.get("warehouse_products", {})
-            for warehouse_id, warehouse_data in warehouse_products.items():
-                on_hand = warehouse_data.get("on_hand", 0)
-                allocated = warehouse_data.get("allocated", 0)
-                backorder = warehouse_data.get("backorder", 0)
-                available = warehouse_data.get("available", 0)
-                reserve = warehouse_data.get("reserve", 0)
-                non_sellable = warehouse_data.get("non_sellable", 0)
+            flattened_data.extend(self._flatten_snapshot_product(sku, product_data))
+
+        return self._build_snapshot_dataframe(flattened_data, snapshot_json)
+
+    def _flatten_snapshot_product(self, sku: str, product_data: dict) -> List[Dict[str, Any]]:
+        """
+        Aplana un producto del snapshot: una fila por warehouse.
+
+        Los datos generales del snapshot se completan en _build_snapshot_dataframe.
+
+        Args:
+            sku (str): SKU del producto.
+            product_data (dict): Entrada products.<sku> del snapshot.
+
+        Returns:
+            List[Dict[str, Any]]: Filas del producto.
+        """
+        flattened_data = []
+        account_id = product_data.get("account_id", "")
+        vendors = product_data.get("vendors", {})
+        
+        # Procesar warehouse_products
+        warehouse_products = product_data.get("warehouse_products", {})
+        for warehouse_id, warehouse_data in warehouse_products.items():
+            on_hand = warehouse_data.get("on_hand", 0)
+            allocated = warehouse_data.get("allocated", 0)
+            backorder = warehouse_data.get("backorder", 0)
+            available = warehouse_data.get("available", 0)
+            reserve = warehouse_data.get("reserve", 0)
+            non_sellable = warehouse_data.get("non_sellable", 0)
+            flattened_data.append({
+                    "snapshot_id": None,
+                    "warehouse_id": warehouse_id,
+                    "snapshot_started_at": None,
+                    "snapshot_finished_at": None,
+                    "sku": sku,
+                    "account_id": account_id,
+                    "vendor_id": "",
+                    "vendor_name": "",
+                    "on_hand": on_hand,
+                    "allocated": allocated,
+                    "backorder": backorder,
+                    "available": available,
+                    "reserve": reserve,
+                    "non_sellable": non_sellable
+                })
+            # Procesar item_bins
+            """item_bins = warehouse_data.get("item_bins", {})
+            for bin_id, bin_data in item_bins.items():
+                location_id = bin_data.get("location_id", "")
+                location_name = bin_data.get("location_name", "")
+                lot_id = bin_data.get("lot_id", "")
+                lot_name = bin_data.get("lot_name", "")
+                expiration_date = bin_data.get("expiration_date", "")
+                sellable = bin_data.get("sellable", False)
+                quantity = bin_data.get("quantity", 0)
+
+                # Agregar fila al DataFrame
+                flattened_data.append({
+                    "snapshot_id": snapshot_id,
+                    "warehouse_id": warehouse_id,
+                    "snapshot_started_at": snapshot_started_at,
+                    "snapshot_finished_at": snapshot_finished_at,
+                    "sku": sku,
+                    "account_id": account_id,
+                    "vendor_id": vendors.get("vendor_id", ""),
+                    "vendor_name": vendors.get("vendor_name", ""),
+                    "on_hand": on_hand,
+                    "allocated": allocated,
+                    "backorder": backorder,
+                    "available": available,
+                    "reserve": reserve,
+                    "non_sellable": non_sellable,
+                    "location_id": location_id,
+                    "location_name": location_name,
+                    "lot_id": lot_id,
+                    "lot_name": lot_name,
+                    "expiration_date": expiration_date,
+                    "sellable": sellable,
+                    "quantity": quantity,
+                })
+
+            # Si no hay bins, agregar una fila base
+            if not item_bins:
                 flattened_data.append({
-                        "snapshot_id": snapshot_id,
-                        "warehouse_id": warehouse_id,
-                        "snapshot_started_at": snapshot_started_at,
-                        "snapshot_finished_at": snapshot_finished_at,
-                        "sku": sku,
-                        "account_id": account_id,
-                        "vendor_id": "",
-                        "vendor_name": "",
-                        "on_hand": on_hand,
-                        "allocated": allocated,
-                        "backorder": backorder,
-                        "available": available,
-                        "reserve": reserve,
-                        "non_sellable": non_sellable
-                    })
-                # Procesar item_bins
-                """item_bins = warehouse_data.get("item_bins", {})
-                for bin_id, bin_data in item_bins.items():
-                    location_id = bin_data.get("location_id", "")
-                    location_name = bin_data.get("location_name", "")
-                    lot_id = bin_data.get("lot_id", "")
-                    lot_name = bin_data.get("lot_name", "")
-                    expiration_date = bin_data.get("expiration_date", "")
-                    sellable = bin_data.get("sellable", False)
-                    quantity = bin_data.get("quantity", 0)
-
-                    # Agregar fila al DataFrame
-                    flattened_data.append({
-                        "snapshot_id": snapshot_id,
-                        "warehouse_id": warehouse_id,
-                        "snapshot_started_at": snapshot_started_at,
-                        "snapshot_finished_at": snapshot_finished_at,
-                        "sku": sku,
-                        "account_id": account_id,
-                        "vendor_id": vendors.get("vendor_id", ""),
-                        "vendor_name": vendors.get("vendor_name", ""),
-                        "on_hand": on_hand,
-                        "allocated": allocated,
-                        "backorder": backorder,
-                        "available": available,
-                        "reserve": reserve,
-                        "non_sellable": non_sellable,
-                        "location_id": location_id,
-                        "location_name": location_name,
-                        "lot_id": lot_id,
-                        "lot_name": lot_name,
-                        "expiration_date": expiration_date,
-                        "sellable": sellable,
-                        "quantity": quantity,
-                    })
-
-                # Si no hay bins, agregar una fila base
-                if not item_bins:
-                    flattened_data.append({
-                        "snapshot_id": snapshot_id,
-                        "warehouse_id": warehouse_id,
-                        "snapshot_started_at": snapshot_started_at,
-                        "snapshot_finished_at": snapshot_finished_at,
-                        "sku": sku,
-                        "account_id": account_id,
-                        "vendor_id": "",
-                        "vendor_name": "",
-                        "on_hand": on_hand,
-                        "allocated": allocated,
-                        "backorder": backorder,
-                        "available": available,
-                        "reserve": reserve,
-                        "non_sellable": non_sellable,
-                        "location_id": "",
-                        "location_name": "",
-                        "lot_id": "",
-                        "lot_name": "",
-                        "expiration_date": "",
-                        "sellable": "",
-                        "quantity": "",
-                    })"""
+                    "snapshot_id": snapshot_id,
+                    "warehouse_id": warehouse_id,
+                    "snapshot_started_at": snapshot_started_at,
+                    "snapshot_finished_at": snapshot_finished_at,
+                    "sku": sku,
+                    "account_id": account_id,
+                    "vendor_id": "",
+                    "vendor_name": "",
+                    "on_hand": on_hand,
+                    "allocated": allocated,
+                    "backorder": backorder,
+                    "available": available,
+                    "reserve": reserve,
+                    "non_sellable": non_sellable,
+                    "location_id": "",
+                    "location_name": "",
+                    "lot_id": "",
+                    "lot_name": "",
+                    "expiration_date": "",
+                    "sellable": "",
+                    "quantity": "",
+                })"""
 
+        return flattened_data
+
+    def _build_snapshot_dataframe(self, flattened_data: List[Dict[str, Any]], snapshot_json: dict) -> pd.DataFrame:
+        """
+        Arma el DataFrame del snapshot y completa sus datos generales.
+
+        Args:
+            flattened_data (List[Dict[str, Any]]): Filas de _flatten_snapshot_product.
+            snapshot_json (dict): Snapshot sin productos (o completo).
+
+        Returns:
+            pd.DataFrame: DataFrame con la información del inventario.
+        """
         # Convertir los datos planos a un DataFrame
         df = pd.DataFrame(flattened_data)
-        df['snapshot_started_at'] = pd.to_datetime(df['snapshot_started_at'])
-        df['snapshot_finished_at'] = pd.to_datetime(df['snapshot_finished_at'])
+        
+        # Extraer el ID del snapshot y detalles generales
+        df['snapshot_id'] = snapshot_json.get("snapshot_id", "")
+        df['snapshot_started_at'] = pd.to_datetime(snapshot_json.get("snapshot_started_at", ""))
+        df['snapshot_finished_at'] = pd.to_datetime(snapshot_json.get("snapshot_finished_at", ""))
         return df
 
+    @traced(cat="export")
     def export_to_csv(
         self,
         df: pd.DataFrame,
@@ -551,7 +832,8 @@ class InventorySnapshot(ShipHeroAPI):
         self.logger.info(f"Exported {len(df)} records to {filepath}")
         return filepath
     
-    def insert_df_to_db(self,df,nombre_tabla):
+    @traced(cat="db")
+    def insert_df_to_db(self,df,nombre_tabla,stream: Optional[str] = None):
         if not nombre_tabla:
             raise ValidationError(f"Se necesita un nombre de tabla")
         
@@ -562,11 +844,21 @@ class InventorySnapshot(ShipHeroAPI):
         # Crear una conexión usando SQLAlchemy
         engine = create_engine(DATABASE_URI)
         
+        # Estado del stream en sph_sync_state, confirmado junto con la carga
+        state = SyncStateStore(engine) if stream else None
+        if state:
+            state.ensure(stream)
+        
         # Inicia una transacción
-        with engine.begin():
+        with engine.begin() as connection:
             try:
                 # Inserta los datos en la base de datos, usando chunksize para manejar grandes volúmenes de datos
-                df.to_sql(nombre_tabla, con=engine, if_exists="append", index=False, chunksize=1000)
+                df.to_sql(nombre_tabla, con=connection, if_exists="append", index=False, chunksize=1000)
+                if state:
+                    high_water_mark = None
+                    if 'snapshot_finished_at' in df.columns:
+                        high_water_mark = latest_timestamp(df['snapshot_finished_at'])
+                    state.advance(connection, stream, len(df), high_water_mark or datetime.now())
                 self.logger.info("Datos insertados exitosamente en la tabla.")
             
             except SQLAlchemyError as e:
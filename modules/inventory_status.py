@@ -1,16 +1,61 @@
 # modules/inventory_status.py
 
-from typing import Dict, List, Optional, Any
+from typing import Iterator, List, Optional
 import pandas as pd
 from datetime import datetime
 import os
 from modules.base import ShipHeroAPI
-from utils.exceptions import ValidationError
+from utils.pagination import Paginator
+from utils.columnar import ColumnarFlattener
+from utils.tracing import traced
+from utils.graphql import build_selection, resolve_field_paths
 
 class InventoryStatus(ShipHeroAPI):
     """
     Module for querying current inventory status in ShipHero.
     """
+
+    # Columna de salida -> campos de GraphQL necesarios para construirla
+    FIELDS = {
+        'sku': ['sku'],
+        'product_id': ['id'],
+        'product_name': ['product.name'],
+        'barcode': ['product.barcode'],
+        'vendor_sku': ['product.vendor_sku'],
+        'retail_price': ['product.retail_price'],
+        'wholesale_price': ['product.wholesale_price'],
+        'warehouse_id': ['warehouse_products.warehouse_id'],
+        'warehouse_name': ['warehouse_products.warehouse.name'],
+        'warehouse_legacy_id': ['warehouse_products.warehouse.legacy_id'],
+        'on_hand': ['warehouse_products.on_hand'],
+        'available': ['warehouse_products.available'],
+        'reserved': ['warehouse_products.reserved'],
+        'replenishable': ['warehouse_products.replenishable'],
+        'timestamp': []
+    }
+    
+    # Un registro por warehouse_products; timestamp se asigna una vez por frame
+    COLUMNS = ColumnarFlattener(
+        {
+            'sku': 'sku',
+            'product_id': 'id',
+            'product_name': 'product.name',
+            'barcode': 'product.barcode',
+            'vendor_sku': 'product.vendor_sku',
+            'retail_price': 'product.retail_price',
+            'wholesale_price': 'product.wholesale_price',
+            'warehouse_id': 'warehouse_products.warehouse_id',
+            'warehouse_name': 'warehouse_products.warehouse.name',
+            'warehouse_legacy_id': 'warehouse_products.warehouse.legacy_id',
+            'on_hand': 'warehouse_products.on_hand',
+            'available': 'warehouse_products.available',
+            'reserved': 'warehouse_products.reserved',
+            'replenishable': 'warehouse_products.replenishable'
+        },
+        derived={'timestamp': lambda df: datetime.now().isoformat()},
+        defaults={'on_hand': 0, 'available': 0, 'reserved': 0, 'replenishable': 0},
+        explode='warehouse_products'
+    )
     
     def __init__(self):
         """Initialize the InventoryStatus module."""
@@ -20,7 +65,8 @@ class InventoryStatus(ShipHeroAPI):
     def _build_inventory_query(
         self,
         sku: Optional[str] = None,
-        first: int = 100
+        first: int = 100,
+        fields: Optional[List[str]] = None
     ) -> str:
         """
         Build GraphQL query for inventory status.
@@ -28,10 +74,14 @@ class InventoryStatus(ShipHeroAPI):
         Args:
             sku (str, optional): Specific SKU to query
             first (int): Number of records to fetch per page
+            fields (List[str], optional): Output columns to request; None requests all
             
         Returns:
             str: GraphQL query
         """
+        # Hay un registro por warehouse, así que warehouse_products siempre se pide
+        paths = ['warehouse_products.warehouse_id'] + resolve_field_paths(self.FIELDS, fields)
+        selection = build_selection(paths, indent=" " * 24)
         return """
         query($sku: String, $first: Int!, $after: String) {
             inventory(
@@ -47,74 +97,18 @@ class InventoryStatus(ShipHeroAPI):
                 }
                 edges {
                     node {
-                        id
-                        sku
-                        warehouse_products {
-                            warehouse_id
-                            on_hand
-                            available
-                            reserved
-                            replenishable
-                            warehouse {
-                                name
-                                legacy_id
-                            }
-                        }
-                        product {
-                            name
-                            barcode
-                            vendor_sku
-                            retail_price
-                            wholesale_price
-                        }
+""" + selection + """
                     }
                 }
             }
         }
         """
 
-    def _flatten_inventory_record(self, node: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """
-        Flatten a single inventory record.
-        
-        Args:
-            node (Dict[str, Any]): Raw inventory node
-            
-        Returns:
-            List[Dict[str, Any]]: List of flattened warehouse records
-        """
-        flattened_records = []
-        product = node.get('product', {})
-        
-        for warehouse_product in node.get('warehouse_products', []):
-            warehouse = warehouse_product.get('warehouse', {})
-            
-            record = {
-                'sku': node.get('sku'),
-                'product_id': node.get('id'),
-                'product_name': product.get('name'),
-                'barcode': product.get('barcode'),
-                'vendor_sku': product.get('vendor_sku'),
-                'retail_price': product.get('retail_price'),
-                'wholesale_price': product.get('wholesale_price'),
-                'warehouse_id': warehouse_product.get('warehouse_id'),
-                'warehouse_name': warehouse.get('name'),
-                'warehouse_legacy_id': warehouse.get('legacy_id'),
-                'on_hand': warehouse_product.get('on_hand', 0),
-                'available': warehouse_product.get('available', 0),
-                'reserved': warehouse_product.get('reserved', 0),
-                'replenishable': warehouse_product.get('replenishable', 0),
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            flattened_records.append(record)
-            
-        return flattened_records
-
     def get_inventory_status(
         self,
         sku: Optional[str] = None,
-        max_records: int = 1000
+        max_records: int = 1000,
+        fields: Optional[List[str]] = None
     ) -> pd.DataFrame:
         """
         Get current inventory status with pagination support.
@@ -122,51 +116,51 @@ class InventoryStatus(ShipHeroAPI):
         Args:
             sku (str, optional): Specific SKU to query
             max_records (int): Maximum number of records to fetch
+            fields (List[str], optional): Output columns to fetch; None fetches all
             
         Returns:
             pd.DataFrame: Current inventory status
         """
-        all_records = []
-        after_cursor = None
-        records_fetched = 0
-        page_size = min(100, max_records)
-        
-        query = self._build_inventory_query()
+        return self._inventory_paginator(sku, max_records, fields).to_dataframe(columns=fields)
+
+    def iter_inventory_status(
+        self,
+        sku: Optional[str] = None,
+        max_records: int = 1000,
+        fields: Optional[List[str]] = None,
+        chunk_size: Optional[int] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Get current inventory status lazily, in DataFrames of at most chunk_size rows.
         
-        while records_fetched < max_records:
-            variables = {
-                "sku": sku,
-                "first": page_size,
-                "after": after_cursor
-            }
-            
-            try:
-                response = self._make_request(query, variables)
-                inventory_data = response['data']['inventory']
-                edges = inventory_data['edges']
-                
-                if not edges:
-                    break
-                
-                # Process and flatten records
-                for edge in edges:
-                    flattened_records = self._flatten_inventory_record(edge['node'])
-                    all_records.extend(flattened_records)
-                    records_fetched += 1
-                
-                # Check pagination
-                page_info = inventory_data['page_info']
-                if not page_info['has_next_page']:
-                    break
-                    
-                after_cursor = page_info['end_cursor']
-                
-            except KeyError as e:
-                self.logger.error(f"Unexpected response format: {str(e)}")
-                raise ValidationError(f"Invalid response format: {str(e)}")
+        Args:
+            sku (str, optional): Specific SKU to query
+            max_records (int): Maximum number of records to fetch
+            fields (List[str], optional): Output columns to fetch; None fetches all
+            chunk_size (int, optional): Rows per DataFrame, Config.PAGINATION_CHUNK_SIZE by default
             
-        return pd.DataFrame(all_records)
+        Yields:
+            pd.DataFrame: Next chunk of inventory records
+        """
+        yield from self._inventory_paginator(sku, max_records, fields).chunks(chunk_size, columns=fields)
+
+    def _inventory_paginator(
+        self,
+        sku: Optional[str],
+        max_records: int,
+        fields: Optional[List[str]] = None
+    ) -> Paginator:
+        """Build the paginator behind get_inventory_status and iter_inventory_status."""
+        return self._paginator(
+            self._build_inventory_query(fields=fields),
+            {"sku": sku},
+            ['data', 'inventory'],
+            self.COLUMNS,
+            max_records,
+            page_size=100
+        )
 
+    @traced(cat="export")
     def export_inventory_status(
         self,
         df: pd.DataFrame,
@@ -6,6 +6,7 @@ from datetime import datetime
 import os
 from modules.base import ShipHeroAPI
 from utils.exceptions import ValidationError
+from utils.tracing import traced
 
 class KitsManager(ShipHeroAPI):
     """
@@ -17,19 +18,18 @@ class KitsManager(ShipHeroAPI):
         super().__init__()
         self.logger.info("KitsManager module initialized")
 
-    def _build_kit_query(self, sku: str) -> str:
+    def _build_kit_selection(self) -> str:
         """
-        Build GraphQL query to get kit information.
+        Build the selection set of a kit product.
+        
+        complexity is part of it so that every alias of a batched request
+        reports its cost and the next batches are sized from it.
         
-        Args:
-            sku (str): Kit SKU
-            
         Returns:
-            str: GraphQL query
+            str: GraphQL selection set, without the outer braces
         """
         return """
-        query($sku: String!) {
-            product(sku: $sku) {
+                complexity
                 id
                 sku
                 name
@@ -42,6 +42,22 @@ class KitsManager(ShipHeroAPI):
                         sku
                     }
                 }
+        """
+
+    def _build_kit_query(self, sku: str) -> str:
+        """
+        Build GraphQL query to get kit information.
+        
+        Args:
+            sku (str): Kit SKU
+            
+        Returns:
+            str: GraphQL query
+        """
+        return """
+        query($sku: String!) {
+            product(sku: $sku) {
+        """ + self._build_kit_selection() + """
             }
         }
         """
@@ -207,6 +223,34 @@ class KitsManager(ShipHeroAPI):
             self.logger.error(f"Error clearing kit {kit_sku}: {str(e)}")
             raise
 
+    def _build_component_records(
+        self,
+        kit_sku: str,
+        product_data: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Flatten the components of a kit product.
+        
+        Args:
+            kit_sku (str): Kit SKU
+            product_data (Dict[str, Any]): Kit product as returned by the API
+            
+        Returns:
+            List[Dict[str, Any]]: One record per component
+        """
+        components_data = []
+        for component in product_data.get('components', []):
+            component_detail = {
+                'kit_sku': kit_sku,
+                'kit_name': product_data.get('name'),
+                'component_sku': component.get('sku'),
+                'component_name': component.get('product', {}).get('name'),
+                'quantity': component.get('quantity'),
+                'component_id': component.get('id')
+            }
+            components_data.append(component_detail)
+        return components_data
+
     def get_kit_details(self, kit_sku: str) -> pd.DataFrame:
         """
         Get detailed information about a kit and its components.
@@ -227,24 +271,49 @@ class KitsManager(ShipHeroAPI):
             if not product_data:
                 raise ValidationError(f"Kit {kit_sku} not found")
             
-            components_data = []
-            for component in product_data.get('components', []):
-                component_detail = {
-                    'kit_sku': kit_sku,
-                    'kit_name': product_data.get('name'),
-                    'component_sku': component.get('sku'),
-                    'component_name': component.get('product', {}).get('name'),
-                    'quantity': component.get('quantity'),
-                    'component_id': component.get('id')
-                }
-                components_data.append(component_detail)
-            
-            return pd.DataFrame(components_data)
+            return pd.DataFrame(self._build_component_records(kit_sku, product_data))
             
         except Exception as e:
             self.logger.error(f"Error fetching kit details for {kit_sku}: {str(e)}")
             raise
 
+    def get_kits_details(self, kit_skus: List[str]) -> pd.DataFrame:
+        """
+        Get the components of many kits, batching several kits per request.
+        
+        Kits that fail or do not exist do not abort the batch; they are
+        returned as a row with the `error` column set.
+        
+        Args:
+            kit_skus (List[str]): Kit SKUs
+            
+        Returns:
+            pd.DataFrame: Kit components details plus an `error` column
+        """
+        results = self._make_batched_request(
+            "product",
+            self._build_kit_selection(),
+            {"sku": "String!"},
+            [{"sku": kit_sku} for kit_sku in kit_skus]
+        )
+        
+        components_data = []
+        for kit_sku, result in zip(kit_skus, results):
+            product_data = result["data"]
+            if result["errors"] or not product_data:
+                error = "; ".join(error.get("message", "") for error in result["errors"])
+                error = error or f"Kit {kit_sku} not found"
+                self.logger.warning(f"Error fetching kit details for {kit_sku}: {error}")
+                components_data.append({'kit_sku': kit_sku, 'error': error})
+                continue
+            
+            for record in self._build_component_records(kit_sku, product_data):
+                record['error'] = None
+                components_data.append(record)
+        
+        return pd.DataFrame(components_data)
+
+    @traced(cat="export")
     def export_kit_details(
         self,
         df: pd.DataFrame,
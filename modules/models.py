@@ -124,4 +124,5 @@ class SphTransacciones(Base):
     location_id = Column(Text, nullable=True)
     created_at = Column(DateTime, nullable=True)
     location_name = Column(Text, nullable=True)
-    location_zone = Column(Text, nullable=True)
\ No newline at end of file
+    location_zone = Column(Text, nullable=True)
+    change_hash = Column(BigInteger, nullable=True, unique=True)  # Hash del contenido, clave del upsert
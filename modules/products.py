@@ -1,11 +1,16 @@
 # modules/kits_manager.py
 
-from typing import Dict, List, Optional, Any
+from typing import Iterator, List, Optional
 import pandas as pd
 from datetime import datetime
 import os
 from modules.base import ShipHeroAPI
+from utils.pagination import Paginator
+from utils.columnar import ColumnarFlattener
 from utils.exceptions import ValidationError
+from utils.tracing import traced
+from utils.graphql import build_selection, resolve_field_paths
+from utils.sync_state import SyncStateStore
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -13,6 +18,58 @@ class Products(ShipHeroAPI):
     """
     Module for managing product kits in ShipHero.
     """
+
+    # Columna de salida -> campos de GraphQL necesarios para construirla
+    FIELDS = {
+        "id": ["id"],
+        "legacy_id": ["legacy_id"],
+        "account_id": ["account_id"],
+        "name": ["name"],
+        "sku": ["sku"],
+        "barcode": ["barcode"],
+        "country_of_manufacture": ["country_of_manufacture"],
+        "tariff_code": ["tariff_code"],
+        "kit": ["kit"],
+        "final_sale": ["final_sale"],
+        "customs_value": ["customs_value"],
+        "thumbnail": ["thumbnail"],
+        "created_at": ["created_at"],
+        "updated_at": ["updated_at"],
+        "active": ["active"],
+        "warehouse_products": ["warehouse_products.warehouse_id", "warehouse_products.on_hand"],
+        "images": ["images.src"],
+        "tags": ["tags"],
+        "kit_components": ["kit_components.sku", "kit_components.quantity"]
+    }
+    
+    # Columna de salida -> ruta del campo; las listas anidadas se arman por nodo
+    COLUMNS = ColumnarFlattener({
+        "id": "id",
+        "legacy_id": "legacy_id",
+        "account_id": "account_id",
+        "name": "name",
+        "sku": "sku",
+        "barcode": "barcode",
+        "country_of_manufacture": "country_of_manufacture",
+        "tariff_code": "tariff_code",
+        "kit": "kit",
+        "final_sale": "final_sale",
+        "customs_value": "customs_value",
+        "thumbnail": "thumbnail",
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+        "active": "active",
+        "warehouse_products": lambda node: [
+            {"warehouse_id": wp.get("warehouse_id"), "on_hand": wp.get("on_hand")}
+            for wp in node.get("warehouse_products", [])
+        ],
+        "images": lambda node: [img.get("src") for img in node.get("images", [])],
+        "tags": lambda node: node.get("tags", []),
+        "kit_components": lambda node: [
+            {"sku": kc.get("sku"), "quantity": kc.get("quantity")}
+            for kc in node.get("kit_components", [])
+        ]
+    })
     
     def __init__(self):
         """Initialize the Products module."""
@@ -88,13 +145,17 @@ class Products(ShipHeroAPI):
 }
         """
 
-    def _build_product_query(self) -> str:
+    def _build_product_query(self, fields: Optional[List[str]] = None) -> str:
         """
         Build GraphQL query to get kit information.
         
+        Args:
+            fields (List[str], optional): Output columns to request; None requests all
+        
         Returns:
             str: GraphQL query
         """
+        selection = build_selection(resolve_field_paths(self.FIELDS, fields), indent=" " * 10)
         return """
         query($first: Int, $after: String, $has_kits: Boolean) {
   products(has_kits: $has_kits) {
@@ -112,50 +173,7 @@ class Products(ShipHeroAPI):
         }
       edges {
         node {
-          id
-          legacy_id
-          account_id
-          name
-          sku
-          barcode
-          country_of_manufacture
-          dimensions {
-            height
-            width
-            length
-            weight
-          }
-          tariff_code
-          kit
-          kit_build
-          no_air
-          final_sale
-          customs_value
-          customs_description
-          not_owned
-          dropship
-          needs_serial_number
-          thumbnail
-          large_thumbnail
-          created_at
-          updated_at
-          product_note
-          virtual
-          ignore_on_invoice
-          ignore_on_customs
-          active
-          warehouse_products {
-            warehouse_id
-            on_hand
-          }
-          images {
-            src
-          }
-          tags
-          kit_components {
-            sku
-            quantity
-          }
+""" + selection + """
         }
       cursor
       }
@@ -163,43 +181,6 @@ class Products(ShipHeroAPI):
   }
 }
         """
-    def flatten_product_node(self, node: Dict[str, Any]) -> Dict[str, Any]:
-      """
-      Flattens the product node structure into a single dictionary for easier handling.
-      """
-      flattened_node = {
-          "id": node.get("id"),
-          "legacy_id": node.get("legacy_id"),
-          "account_id": node.get("account_id"),
-          "name": node.get("name"),
-          "sku": node.get("sku"),
-          "barcode": node.get("barcode"),
-          "country_of_manufacture": node.get("country_of_manufacture"),
-          "tariff_code": node.get("tariff_code"),
-          "kit": node.get("kit"),
-          "final_sale": node.get("final_sale"),
-          "customs_value": node.get("customs_value"),
-          "thumbnail": node.get("thumbnail"),
-          "created_at": node.get("created_at"),
-          "updated_at": node.get("updated_at"),
-          "active": node.get("active"),
-          # Flatten warehouse products
-          "warehouse_products": [
-              {"warehouse_id": wp.get("warehouse_id"), "on_hand": wp.get("on_hand")}
-              for wp in node.get("warehouse_products", [])
-          ],
-          # Collect image URLs
-          "images": [img.get("src") for img in node.get("images", [])],
-          # Collect tags
-          "tags": node.get("tags", []),
-          # Flatten kit components
-          "kit_components": [
-              {"sku": kc.get("sku"), "quantity": kc.get("quantity")}
-              for kc in node.get("kit_components", [])
-          ]
-      }
-      return flattened_node
-
     def get_products_details(self, sku: str) -> pd.DataFrame:
         """
         Get detailed information about a kit and its components.
@@ -241,119 +222,79 @@ class Products(ShipHeroAPI):
             raise
 
 
+    def _products_paginator(
+        self,
+        max_records: int,
+        page_size: int,
+        fields: Optional[List[str]] = None,
+        has_kits: Optional[bool] = None
+    ) -> Paginator:
+        """Build the paginator behind get_all, get_all_kits and iter_all."""
+        return self._paginator(
+            self._build_product_query(fields=fields),
+            {"has_kits": has_kits},
+            ['data', 'products', 'data'],
+            self.COLUMNS,
+            max_records,
+            page_size,
+            # Los kits cuestan mucho más por nodo: aprenden su propio tamaño
+            size_key="products:kits" if has_kits else "products"
+        )
+
     def get_all_kits(self,
-        max_records: int = 20
+        max_records: int = 20,
+        fields: Optional[List[str]] = None
         ) -> pd.DataFrame:
         """
         Get all products
         
+        Args:
+            max_records (int): Maximum number of products to fetch
+            fields (List[str], optional): Output columns to fetch; None fetches all
+        
         Returns:
             pd.DataFrame: Products details
         """
-    
-        all_changes = []
-        after_cursor = None
-        records_fetched = 0
-        page_size = min(10, max_records)
-        
-        query = self._build_product_query()
-        
-        while records_fetched < max_records:
-            variables = {
-                "has_kits": True,
-                "first": page_size,
-                "after": after_cursor
-            }
-            
-            response = self._make_request(query, variables)
-            
-            try:
-                products = response['data']['products']
-                products_data = products['data']
-                if not products_data:
-                    break
-                edges = products_data['edges']
-                
-                if not edges:
-                    break
-                    
-                # Flatten and collect records
-                for edge in edges:
-                    all_changes.append(self.flatten_product_node(edge['node']))
-                    records_fetched += 1
-                
-                # Check pagination
-                if not 'pageInfo' in products_data:
-                    break
-                
-                page_info = products_data['pageInfo']
-                if not page_info['hasNextPage']:
-                    break
-                    
-                after_cursor = page_info['endCursor']
-                
-            except KeyError as e:
-                self.logger.error(f"Unexpected response format: {str(e)}")
-                raise ValidationError(f"Invalid response format: {str(e)}")
-        
-        return pd.DataFrame(all_changes)
+        return self._products_paginator(max_records, 10, fields, has_kits=True).to_dataframe(columns=fields)
 
     def get_all(self,
-        max_records: int = 99999
+        max_records: int = 99999,
+        fields: Optional[List[str]] = None
         ) -> pd.DataFrame:
         """
         Get all products
         
+        Args:
+            max_records (int): Maximum number of products to fetch
+            fields (List[str], optional): Output columns to fetch; None fetches all
+        
         Returns:
             pd.DataFrame: Products details
         """
-    
-        all_changes = []
-        after_cursor = None
-        records_fetched = 0
-        page_size = min(200, max_records)
-        
-        query = self._build_product_query()
+        return self._products_paginator(max_records, 200, fields).to_dataframe(columns=fields)
+
+    def iter_all(self,
+        max_records: int = 99999,
+        fields: Optional[List[str]] = None,
+        has_kits: Optional[bool] = None,
+        chunk_size: Optional[int] = None
+        ) -> Iterator[pd.DataFrame]:
+        """
+        Get all products lazily, in DataFrames of at most chunk_size rows.
         
-        while records_fetched < max_records:
-            variables = {
-                "first": page_size,
-                "after": after_cursor
-            }
-            
-            response = self._make_request(query, variables)
-            
-            try:
-                products = response['data']['products']
-                products_data = products['data']
-                if not products_data:
-                    break
-                edges = products_data['edges']
-                
-                if not edges:
-                    break
-                    
-                # Flatten and collect records
-                for edge in edges:
-                    all_changes.append(self.flatten_product_node(edge['node']))
-                    records_fetched += 1
-                
-                # Check pagination
-                if not 'pageInfo' in products_data:
-                    break
-                
-                page_info = products_data['pageInfo']
-                if not page_info['hasNextPage']:
-                    break
-                    
-                after_cursor = page_info['endCursor']
-                
-            except KeyError as e:
-                self.logger.error(f"Unexpected response format: {str(e)}")
-                raise ValidationError(f"Invalid response format: {str(e)}")
+        Args:
+            max_records (int): Maximum number of products to fetch
+            fields (List[str], optional): Output columns to fetch; None fetches all
+            has_kits (bool, optional): True to fetch only kits
+            chunk_size (int, optional): Rows per DataFrame, Config.PAGINATION_CHUNK_SIZE by default
         
-        return pd.DataFrame(all_changes)
+        Yields:
+            pd.DataFrame: Next chunk of products
+        """
+        page_size = 10 if has_kits else 200
+        yield from self._products_paginator(max_records, page_size, fields, has_kits).chunks(chunk_size, columns=fields)
 
+    @traced(cat="export")
     def export_to_csv(
         self,
         df: pd.DataFrame,
@@ -385,7 +326,8 @@ class Products(ShipHeroAPI):
         self.logger.info(f"Exported kit details to {filepath}")
         return filepath
     
-    def insert_df_to_db(self,df,nombre_tabla):
+    @traced(cat="db")
+    def insert_df_to_db(self,df,nombre_tabla,stream: Optional[str] = None):
         if not nombre_tabla:
             raise ValidationError(f"Se necesita un nombre de tabla")
         
@@ -396,6 +338,11 @@ class Products(ShipHeroAPI):
         # Crear una conexión usando SQLAlchemy
         engine = create_engine(DATABASE_URI)
         
+        # Estado del stream en sph_sync_state, confirmado junto con la carga
+        state = SyncStateStore(engine) if stream else None
+        if state:
+            state.ensure(stream)
+        
         # Inicia una transacción
         with engine.connect() as connection:  # Abre la conexión
             trans = connection.begin()  # Inicia la transacción
@@ -408,6 +355,9 @@ class Products(ShipHeroAPI):
                 # Inserta los datos en la base de datos
                 self.logger.info("Insertando datos en la tabla.")
                 df.to_sql(nombre_tabla, con=connection, if_exists="append", index=False, chunksize=1000)
+                if state:
+                    # Carga completa: la tabla quedó con exactamente estas filas
+                    state.advance(connection, stream, len(df), datetime.now(), replace=True)
 
                 # Confirma la transacción
                 trans.commit()
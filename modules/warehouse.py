@@ -1,11 +1,13 @@
 # modules/warehouse.py
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
 import pandas as pd
 from datetime import datetime
 import os
 from modules.base import ShipHeroAPI
+from utils.pagination import Paginator
 from utils.exceptions import ValidationError
+from utils.tracing import traced
 
 class Warehouse(ShipHeroAPI):
     """
@@ -67,11 +69,15 @@ class Warehouse(ShipHeroAPI):
             str: GraphQL query
         """
         return """
-        query($warehouse_id: String) {
+        query($warehouse_id: String, $first: Int, $after: String) {
   warehouse_products(warehouse_id: $warehouse_id) {
     request_id
     complexity
-    data(first: 2) {
+    data(first: $first, after: $after) {
+      pageInfo {
+        hasNextPage
+        endCursor
+      }
       edges {
         node {
           id
@@ -158,51 +164,72 @@ class Warehouse(ShipHeroAPI):
         if not warehouse_id:
             self.logger.error(f"Necesita ingresar un warehouse id")
             return False
-        all_records = []
-        after_cursor = None
-        records_fetched = 0
-        page_size = min(100, max_records)
-        
-        query = self._build_warehouse_products_query()
+        return self._warehouse_products_paginator(warehouse_id, max_records).to_dataframe()
+
+    def iter_warehouse_products(
+        self,
+        warehouse_id: str,
+        max_records: int = 1000,
+        chunk_size: Optional[int] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Get the products of a warehouse lazily, in DataFrames of at most chunk_size rows.
         
-        while records_fetched < max_records:
-            variables = {
-                "warehouse_id": warehouse_id,
-                "first": page_size,
-                "after": after_cursor
-            }
+        Args:
+            warehouse_id (str): Specific warehouse to query
+            max_records (int): Maximum number of records to fetch
+            chunk_size (int, optional): Rows per DataFrame, Config.PAGINATION_CHUNK_SIZE by default
             
-            try:
-                response = self._make_request(query, variables)
-                data = response['data']
-                print(data)
-                exit()
-                edges = inventory_data['edges']
-                
-                if not edges:
-                    break
-                
-                # Process and flatten records
-                for edge in edges:
-                    flattened_records = self._flatten_inventory_record(edge['node'])
-                    all_records.extend(flattened_records)
-                    records_fetched += 1
-                
-                # Check pagination
-                page_info = inventory_data['page_info']
-                if not page_info['has_next_page']:
-                    break
-                    
-                after_cursor = page_info['end_cursor']
-                
-            except KeyError as e:
-                self.logger.error(f"Unexpected response format: {str(e)}")
-                raise ValidationError(f"Invalid response format: {str(e)}")
+        Yields:
+            pd.DataFrame: Next chunk of warehouse products
+        """
+        if not warehouse_id:
+            raise ValidationError("Necesita ingresar un warehouse id")
+        yield from self._warehouse_products_paginator(warehouse_id, max_records).chunks(chunk_size)
+
+    def _warehouse_products_paginator(self, warehouse_id: str, max_records: int) -> Paginator:
+        """Build the paginator behind get_warehouse_products and iter_warehouse_products."""
+        return self._paginator(
+            self._build_warehouse_products_query(),
+            {"warehouse_id": warehouse_id},
+            ['data', 'warehouse_products', 'data'],
+            self._flatten_warehouse_product,
+            max_records,
+            page_size=100
+        )
+
+    def _flatten_warehouse_product(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Flatten a warehouse product node into a single record.
+        
+        Args:
+            node (Dict[str, Any]): warehouse_products node
             
-        return pd.DataFrame(all_records)
+        Returns:
+            Dict[str, Any]: Flattened record
+        """
+        warehouse = node.get('warehouse') or {}
+        product = node.get('product') or {}
+        return {
+            'id': node.get('id'),
+            'account_id': node.get('account_id'),
+            'warehouse_id': warehouse.get('id'),
+            'product_id': product.get('id'),
+            'sku': product.get('sku'),
+            'name': product.get('name'),
+            'on_hand': node.get('on_hand'),
+            'inventory_bin': node.get('inventory_bin'),
+            'reserve_inventory': node.get('reserve_inventory'),
+            'reorder_amount': node.get('reorder_amount'),
+            'reorder_level': node.get('reorder_level'),
+            'custom': node.get('custom'),
+            'dynamic_slotting': warehouse.get('dynamic_slotting'),
+            'profile': warehouse.get('profile')
+        }
 
 
 
+    @traced(cat="export")
     def export_to_csv(
         self,
         df: pd.DataFrame,
@@ -0,0 +1,94 @@
+# tests/test_async_client.py
+
+import asyncio
+import threading
+import time
+import pytest
+import pandas as pd
+from modules.async_client import AsyncShipHeroAPI
+
+def _changes_page(skus, has_next, cursor):
+    return {
+        "data": {
+            "inventory_changes": {
+                "request_id": "req",
+                "complexity": 101,
+                "data": {
+                    "pageInfo": {"hasNextPage": has_next, "endCursor": cursor},
+                    "edges": [
+                        {"node": {"sku": sku, "previous_on_hand": 1, "change_in_on_hand": 2,
+                                  "created_at": "2024-10-01T00:00:00"}}
+                        for sku in skus
+                    ]
+                }
+            }
+        }
+    }
+
+class TestAsyncShipHeroAPI:
+    @pytest.fixture
+    def async_client(self):
+        client = AsyncShipHeroAPI(max_concurrency=2)
+        yield client
+        client.close()
+
+    def test_get_inventory_changes_paginates(self, async_client):
+        """Test the async fetcher follows cursors and flattens nodes."""
+        pages = {
+            None: _changes_page(["A", "B"], True, "c1"),
+            "c1": _changes_page(["C"], False, None)
+        }
+        threads = set()
+
+        def fake_request(query, variables):
+            threads.add(threading.get_ident())
+            return pages[variables["after"]]
+
+        async_client._inventory_changes._make_request = fake_request
+
+        df = asyncio.run(async_client.get_inventory_changes(max_records=10))
+        assert isinstance(df, pd.DataFrame)
+        assert list(df["sku"]) == ["A", "B", "C"]
+        assert all(df["current_on_hand"] == 3)
+        assert pd.api.types.is_datetime64_any_dtype(df["created_at"])
+        # Todas las páginas se piden desde el mismo worker
+        assert len(threads) == 1
+
+    def test_get_inventory_changes_splits_windows(self, async_client):
+        """Test windows > 1 goes through the sharded fetch of InventoryChanges."""
+        calls = []
+
+        def fake_request(query, variables):
+            calls.append((variables["dateFrom"], variables["dateTo"]))
+            return _changes_page([], False, None)
+
+        async_client._inventory_changes._make_request = fake_request
+
+        df = asyncio.run(async_client.get_inventory_changes(
+            "2024-10-01T00:00:00", "2024-10-03T00:00:00", max_records=10, windows=2
+        ))
+        assert len(df) == 0
+        assert sorted(calls) == [
+            ("2024-10-01T00:00:00", "2024-10-02T00:00:00"),
+            ("2024-10-02T00:00:00", "2024-10-03T00:00:00")
+        ]
+
+    def test_requests_run_concurrently(self, async_client):
+        """Test gathered requests overlap up to max_concurrency."""
+        in_flight = []
+        peak = []
+
+        def fake_request(query, variables):
+            in_flight.append(1)
+            peak.append(len(in_flight))
+            time.sleep(0.05)
+            in_flight.pop()
+            return {"data": {}}
+
+        async_client._make_request = fake_request
+
+        async def run_all():
+            await asyncio.gather(*(async_client._make_request_async("query {}") for _ in range(4)))
+
+        asyncio.run(run_all())
+        assert max(peak) == 2
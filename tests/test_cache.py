@@ -0,0 +1,91 @@
+# tests/test_cache.py
+
+import time
+import pytest
+from datetime import timedelta
+from utils.cache import ResponseCache
+from modules.base import ShipHeroAPI
+
+class TestResponseCache:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return ResponseCache(max_entries=2, disk_dir=str(tmp_path / "cache"))
+
+    def test_hit_and_miss_counters(self, cache):
+        """Test hits return a copy and count the credits saved."""
+        assert cache.get("a") is None
+        cache.set("a", {"data": {"account": {"complexity": 1}}}, timedelta(minutes=1), credits=1)
+        first = cache.get("a")
+        first["data"] = None
+        assert cache.get("a")["data"]["account"]["complexity"] == 1
+
+        stats = cache.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 2
+        assert stats["credits_saved"] == 2
+
+    def test_expired_entries_are_misses(self, cache):
+        """Test entries are dropped once their TTL elapses."""
+        cache.set("a", {"data": {}}, timedelta(seconds=0.01))
+        time.sleep(0.02)
+        assert cache.get("a") is None
+
+    def test_lru_eviction_falls_back_to_disk(self, cache):
+        """Test entries evicted from memory are still served from disk."""
+        for key in ("a", "b", "c"):
+            cache.set(key, {"key": key}, timedelta(minutes=1))
+        assert cache.stats()["entries"] == 2
+        assert cache.get("a") == {"key": "a"}
+        assert cache.stats()["disk_hits"] == 1
+
+    def test_invalidate_drops_one_operation(self, cache):
+        """Test invalidate removes an operation's entries from both tiers and keeps the rest."""
+        for key in ("product.1", "product.2", "products.1"):
+            cache.set(key, {"key": key}, timedelta(minutes=1))
+        assert cache.invalidate("product") == 1
+        assert cache.get("product.1") is None and cache.get("product.2") is None
+        assert cache.get("products.1") == {"key": "products.1"}
+
+class TestRequestCaching:
+    @pytest.fixture
+    def api(self):
+        api = ShipHeroAPI()
+        api.cache = ResponseCache(max_entries=10, disk_dir="")
+        return api
+
+    def test_cache_ttl_rules(self, api):
+        """Test only configured queries are cached and mutations never are."""
+        assert api._get_cache_ttl("query { account { complexity } }") == timedelta(hours=1)
+        assert api._get_cache_ttl("query($id: String!) { inventory_snapshot(snapshot_id: $id) { complexity } }") is None
+        assert api._get_cache_ttl("mutation { kit_clear(data: {}) { complexity } }", timedelta(hours=1)) is None
+        assert api._get_cache_ttl("query { account { complexity } }", timedelta(0)) is None
+
+    def test_second_request_is_served_from_cache(self, api):
+        """Test a cached query does not reach the API twice."""
+        calls = []
+
+        def fake_send(query, variables, cost_key, allow_partial=False):
+            calls.append(query)
+            return {"data": {"account": {"complexity": 1, "data": {"id": "A"}}}}
+
+        api._send_request = fake_send
+        query = "query { account { complexity data { id } } }"
+        assert api._make_request(query) == api._make_request(query)
+        assert len(calls) == 1
+        assert api.cache.stats()["credits_saved"] == 1
+
+    def test_mutation_invalidates_product_queries(self, api):
+        """Test a mutation makes the next product query reach the API again."""
+        calls = []
+
+        def fake_send(query, variables, cost_key, allow_partial=False):
+            calls.append(query)
+            return {"data": {"product": {"complexity": 1, "data": {"sku": "KIT1", "kit": len(calls) > 1}}}}
+
+        api._send_request = fake_send
+        query = "query($sku: String) { product(sku: $sku) { complexity data { sku kit } } }"
+        assert api._make_request(query, {"sku": "KIT1"})["data"]["product"]["data"]["kit"] is False
+        api._make_request(query, {"sku": "KIT1"})
+        api._make_request("mutation { kit_build(data: {sku: \"KIT1\"}) { complexity } }")
+        assert api._make_request(query, {"sku": "KIT1"})["data"]["product"]["data"]["kit"] is True
+        assert len(calls) == 3
@@ -0,0 +1,129 @@
+# tests/test_cassette.py
+
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from config.config import Config
+from utils.cassette import Cassette, CassetteAdapter, request_key, use_cassette
+from utils.exceptions import CassetteError
+from utils.http import HTTPClient
+from modules.inventory_changes import InventoryChanges
+from tests.test_http import SNAPSHOT, gzip_server
+
+class AuthHandler(BaseHTTPRequestHandler):
+    """Answer every POST like the auth refresh endpoint."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({"access_token": "secret-token", "expires_in": 2419200}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def auth_server():
+    server = HTTPServer(("127.0.0.1", 0), AuthHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/auth/refresh"
+    server.shutdown()
+    server.server_close()
+
+def inventory_page(skus, has_next_page):
+    return {"data": {"inventory_changes": {"request_id": "abc", "complexity": 11, "data": {
+        "pageInfo": {"hasNextPage": has_next_page, "endCursor": skus[-1]},
+        "edges": [{"node": {"sku": sku, "previous_on_hand": 1, "change_in_on_hand": 2}} for sku in skus]
+    }}}}
+
+class TestCassette:
+    def test_request_key(self):
+        """Test keys ignore the query string and variables but keep the root field."""
+        body = json.dumps({"query": "query { inventory_changes { request_id } }", "variables": {"first": 5}})
+        assert request_key("post", "https://x.test/graphql?a=1", body.encode()) == \
+            "POST https://x.test/graphql inventory_changes"
+        assert request_key("GET", "https://s3.test/snap.json?X-Amz-Signature=1", None) == \
+            "GET https://s3.test/snap.json"
+
+    def test_record_then_replay_snapshot(self, gzip_server, tmp_path):
+        """Test a recorded download replays offline, streamed and decoded."""
+        path = str(tmp_path / "snapshot.json.gz")
+        client = HTTPClient(accept_encoding="gzip")
+        with use_cassette(path, CassetteAdapter.RECORD, session=client.session):
+            assert client.get(gzip_server).content == SNAPSHOT
+
+        with gzip.open(path, "rt") as file:
+            assert len(json.load(file)["interactions"]) == 1
+
+        with use_cassette(path, session=client.session) as cassette:
+            assert cassette.interactions
+            with client.get(gzip_server + "?signature=new", stream=True) as response:
+                chunks = list(client.iter_content(response, 1024))
+        assert json.loads(b"".join(chunks)) == json.loads(SNAPSHOT)
+        client.close()
+
+    def test_tokens_are_not_recorded(self, auth_server, tmp_path):
+        """Test request headers are dropped and token fields in responses are redacted."""
+        path = str(tmp_path / "auth.json.gz")
+        client = HTTPClient()
+        with use_cassette(path, CassetteAdapter.RECORD, session=client.session):
+            response = client.post(auth_server, json={"refresh_token": "r-secret", "email": "a@b.c"},
+                                   headers={"Authorization": "Bearer live-token"})
+            assert response.json()["access_token"] == "secret-token"
+        client.close()
+
+        with gzip.open(path, "rt") as file:
+            recorded = file.read()
+        assert "secret" not in recorded
+        assert "live-token" not in recorded
+        assert '"expires_in":2419200' in recorded
+
+    def test_replays_pages_in_order(self, tmp_path):
+        """Test a paginated query is served page by page, streamed or not."""
+        path = str(tmp_path / "pages.json.gz")
+        cassette = Cassette(path)
+        key = f"POST {Config.BASE_URL} inventory_changes"
+        for page in (inventory_page(["A", "B"], True), inventory_page(["C"], False)):
+            cassette.interactions.append({
+                "key": key, "variables": None, "status": 200, "reason": "OK",
+                "headers": {"Content-Type": "application/json"}, "body": {"json": page}, "elapsed": 0.01
+            })
+        cassette.save()
+
+        module = InventoryChanges()
+        for stream in (False, True):
+            with use_cassette(path):
+                df = module.get_inventory_changes("2024-10-01", "2024-10-02", max_records=10, stream=stream)
+            assert list(df["sku"]) == ["A", "B", "C"]
+
+    def test_missing_response_raises(self, tmp_path):
+        """Test a request with nothing left to replay fails instead of going online."""
+        client = HTTPClient()
+        with use_cassette(str(tmp_path / "empty.json.gz"), CassetteAdapter.REPLAY, session=client.session):
+            with pytest.raises(CassetteError):
+                client.get("https://example.invalid/snapshot.json")
+        client.close()
+
+    def test_injected_latency(self, tmp_path):
+        """Test replayed responses can be delayed to simulate the network."""
+        path = str(tmp_path / "latency.json.gz")
+        cassette = Cassette(path)
+        cassette.interactions.append({
+            "key": "GET https://example.invalid/a", "variables": None, "status": 200, "reason": "OK",
+            "headers": {}, "body": {"base64": ""}, "elapsed": 0.2
+        })
+        cassette.save()
+
+        client = HTTPClient()
+        with use_cassette(path, latency=0.02, latency_scale=0.5, session=client.session):
+            started = time.monotonic()
+            assert client.get("https://example.invalid/a").status_code == 200
+            assert time.monotonic() - started >= 0.12
+        client.close()
@@ -0,0 +1,61 @@
+# tests/test_codec.py
+
+import pytest
+import utils.codec as codec_module
+from utils.codec import JSONCodec, OrjsonCodec, get_json_codec
+from utils.exceptions import ConfigurationError
+from modules.inventory_changes import InventoryChanges
+
+PAGE = {
+    "data": {"inventory_changes": {"complexity": 101, "data": {
+        "pageInfo": {"hasNextPage": True, "endCursor": "YXJyYXljb25uZWN0aW9uOjk5"},
+        "edges": [{"node": {"sku": "SKU-ñ", "previous_on_hand": 10, "change_in_on_hand": -2.5, "cycle_counted": False}}]
+    }}}
+}
+
+class TestJSONCodec:
+    @pytest.mark.parametrize("codec_class", [JSONCodec, OrjsonCodec])
+    def test_round_trip(self, codec_class):
+        """Test both backends encode to bytes and decode the same page."""
+        if codec_class is OrjsonCodec and codec_module.orjson is None:
+            pytest.skip("orjson not installed")
+        codec = codec_class()
+        encoded = codec.dumps(PAGE)
+        assert isinstance(encoded, bytes)
+        assert codec.loads(encoded) == PAGE
+        assert JSONCodec().loads(encoded) == PAGE
+
+    def test_invalid_json_raises_value_error(self):
+        """Test decode errors are ValueError for every backend."""
+        with pytest.raises(ValueError):
+            get_json_codec().loads(b"{not json")
+
+    def test_orjson_required_when_requested(self, monkeypatch):
+        """Test asking for orjson without it installed is a configuration error."""
+        monkeypatch.setattr(codec_module, "orjson", None)
+        with pytest.raises(ConfigurationError):
+            OrjsonCodec()
+
+    def test_requests_are_sent_with_the_codec(self):
+        """Test the GraphQL payload is pre-encoded and the response decoded by the codec."""
+        module = InventoryChanges()
+        sent = {}
+
+        class FakeResponse:
+            status_code = 200
+            headers = {}
+            content = module.codec.dumps(PAGE)
+
+        def fake_post(url, **kwargs):
+            sent.update(kwargs)
+            return FakeResponse()
+
+        module.http.post = fake_post
+        try:
+            response = module._request_with_retries("query { inventory_changes { complexity } }", {"sku": "A"})
+        finally:
+            del module.http.post
+
+        assert isinstance(sent["data"], bytes)
+        assert module.codec.loads(sent["data"])["variables"] == {"sku": "A"}
+        assert response == PAGE
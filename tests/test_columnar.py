@@ -0,0 +1,54 @@
+# tests/test_columnar.py
+
+import pandas as pd
+from utils.columnar import ColumnarFlattener
+
+NODES = [
+    {"sku": "A", "qty": 1, "location": {"name": "L1"}, "bins": [{"id": "B1", "on_hand": 3}, {"id": "B2"}]},
+    {"sku": "B", "qty": None, "location": None, "bins": []},
+    {"sku": "C", "bins": [{"id": "B3", "on_hand": 5}]}
+]
+
+
+class TestColumnarFlattener:
+    """Per-column flattening of GraphQL nodes."""
+
+    def test_paths_and_derived_columns(self):
+        """Test nested paths, missing parents and vectorized derived columns."""
+        flattener = ColumnarFlattener(
+            {"sku": "sku", "qty": "qty", "location_name": "location.name"},
+            derived={"double": lambda df: pd.to_numeric(df["qty"]).fillna(0) * 2},
+            order=["sku", "double", "qty", "location_name"]
+        )
+        batch, nodes = flattener.flatten(NODES)
+        df = flattener.frame(batch)
+        assert nodes == 3 and len(batch) == 3
+        assert list(df.columns) == ["sku", "double", "qty", "location_name"]
+        assert list(df["location_name"].fillna("-")) == ["L1", "-", "-"]
+        assert list(df["double"]) == [2, 0, 0]
+
+    def test_explode_repeats_node_fields(self):
+        """Test one row per item of the exploded list, with defaults for missing fields."""
+        flattener = ColumnarFlattener(
+            {"sku": "sku", "bin": "bins.id", "on_hand": "bins.on_hand"},
+            defaults={"on_hand": 0},
+            explode="bins"
+        )
+        batch, nodes = flattener.flatten(NODES)
+        assert nodes == 3
+        assert flattener.records(batch) == [
+            {"sku": "A", "bin": "B1", "on_hand": 3},
+            {"sku": "A", "bin": "B2", "on_hand": 0},
+            {"sku": "C", "bin": "B3", "on_hand": 5}
+        ]
+
+    def test_batches_slice_like_lists(self):
+        """Test the buffer operations the Paginator chunks with."""
+        flattener = ColumnarFlattener({"sku": "sku"})
+        buffer = flattener.empty()
+        for node in NODES:
+            buffer.extend(flattener.flatten([node])[0])
+        head = buffer[:2]
+        del buffer[:2]
+        assert head.columns == {"sku": ["A", "B"]} and buffer.columns == {"sku": ["C"]}
+        assert list(flattener.frame(head, columns=["sku", "other"]).columns) == ["sku", "other"]
@@ -0,0 +1,98 @@
+# tests/test_graphql.py
+
+import pytest
+from utils.graphql import build_aliased_query, split_aliased_response, build_selection, resolve_field_paths
+from utils.exceptions import ValidationError
+from modules.kits_manager import KitsManager
+from modules.inventory_changes import InventoryChanges
+
+class TestAliasBatching:
+    def test_build_aliased_query(self):
+        """Test one aliased field and variable set is built per item."""
+        query, variables, aliases = build_aliased_query(
+            "product", "id sku", {"sku": "String!"}, [{"sku": "A"}, {"sku": "B"}]
+        )
+        assert aliases == ["k0", "k1"]
+        assert "k0: product(sku: $k0_sku)" in query
+        assert "$k1_sku: String!" in query
+        assert variables == {"k0_sku": "A", "k1_sku": "B"}
+
+    def test_split_aliased_response_reports_errors_per_alias(self):
+        """Test errors are attached only to the alias in their path."""
+        response = {
+            "data": {"k0": {"sku": "A"}, "k1": None},
+            "errors": [{"message": "not found", "path": ["k1"]}]
+        }
+        results = split_aliased_response(response, ["k0", "k1"])
+        assert results["k0"] == {"data": {"sku": "A"}, "errors": []}
+        assert results["k1"]["data"] is None
+        assert results["k1"]["errors"][0]["message"] == "not found"
+
+class TestKitsBatching:
+    @pytest.fixture
+    def kits_module(self):
+        return KitsManager()
+
+    def test_get_kits_details_batches_requests(self, kits_module):
+        """Test many kits are fetched in few requests and split back per kit."""
+        requests_sent = []
+
+        def fake_request(query, variables=None, cache_ttl=None, allow_partial=False):
+            requests_sent.append(variables)
+            data = {}
+            errors = []
+            for name, sku in variables.items():
+                alias = name.split("_")[0]
+                if sku == "MISSING":
+                    data[alias] = None
+                    errors.append({"message": "Product not found", "path": [alias]})
+                else:
+                    data[alias] = {"sku": sku, "name": f"Kit {sku}",
+                                   "components": [{"id": "1", "sku": "C1", "quantity": 2, "product": {"name": "Comp"}}]}
+            return {"data": data, "errors": errors} if errors else {"data": data}
+
+        kits_module._make_request = fake_request
+        kits_module.config.BATCH_MAX_SIZE = 2
+        try:
+            df = kits_module.get_kits_details(["K1", "MISSING", "K3"])
+        finally:
+            kits_module.config.BATCH_MAX_SIZE = 50
+
+        assert len(requests_sent) == 2
+        assert list(df["kit_sku"]) == ["K1", "MISSING", "K3"]
+        assert df.loc[1, "error"] == "Product not found"
+        assert df.loc[2, "component_sku"] == "C1"
+
+class TestFieldProjection:
+    def test_build_selection_nests_paths(self):
+        """Test dotted paths are grouped under their parent field."""
+        selection = build_selection(["sku", "location.name", "location.zone"])
+        assert selection.split("\n") == ["sku", "location {", "    name", "    zone", "}"]
+
+    def test_resolve_field_paths_rejects_unknown_columns(self):
+        """Test an unknown output column fails before any request is sent."""
+        columns = {"sku": ["sku"], "current_on_hand": ["previous_on_hand", "change_in_on_hand"]}
+        assert resolve_field_paths(columns, ["current_on_hand"]) == ["previous_on_hand", "change_in_on_hand"]
+        with pytest.raises(ValidationError):
+            resolve_field_paths(columns, ["dimensions"])
+
+    def test_inventory_changes_requests_only_selected_fields(self):
+        """Test the query and the DataFrame only carry the requested columns."""
+        module = InventoryChanges()
+        sent = []
+
+        def fake_request(query, variables=None, cache_ttl=None, allow_partial=False):
+            sent.append(query)
+            node = {"sku": "A", "previous_on_hand": 10, "change_in_on_hand": -2, "location": {"name": "Z1"}}
+            return {"data": {"inventory_changes": {"data": {
+                "pageInfo": {"hasNextPage": False, "endCursor": None},
+                "edges": [{"node": node}]
+            }}}}
+
+        module._make_request = fake_request
+        df = module.get_inventory_changes(fields=["sku", "current_on_hand", "location_name"])
+
+        assert list(df.columns) == ["sku", "current_on_hand", "location_name"]
+        assert df.loc[0, "current_on_hand"] == 8
+        assert "location {" in sent[0] and "name" in sent[0]
+        assert "zone" not in sent[0] and "user_id" not in sent[0]
@@ -0,0 +1,100 @@
+# tests/test_http.py
+
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from utils.http import HTTPClient, get_http_client
+from modules.inventory_changes import InventoryChanges
+from modules.inventory_status import InventoryStatus
+
+SNAPSHOT = json.dumps({
+    "products": {f"SKU{i}": {"warehouse_products": {"W1": {"on_hand": i}}} for i in range(500)}
+}).encode()
+
+class GzipHandler(BaseHTTPRequestHandler):
+    """Serve SNAPSHOT gzip-compressed when the client accepts it."""
+
+    def do_GET(self):
+        body = SNAPSHOT
+        accepted = self.headers.get("Accept-Encoding", "")
+        self.send_response(200)
+        if "gzip" in accepted:
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def gzip_server():
+    server = HTTPServer(("127.0.0.1", 0), GzipHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/snapshot.json"
+    server.shutdown()
+    server.server_close()
+
+class TestHTTPClient:
+    @pytest.fixture
+    def http_client(self):
+        client = HTTPClient(pool_connections=2, pool_maxsize=4, read_timeout=30)
+        yield client
+        client.close()
+
+    def test_pool_configuration(self, http_client):
+        """Test pool size and timeouts are applied."""
+        assert http_client.adapter._pool_connections == 2
+        assert http_client.adapter._pool_maxsize == 4
+        assert http_client.timeout[1] == 30
+
+    def test_stats_without_requests(self, http_client):
+        """Test stats report zero reuse before any request."""
+        stats = http_client.stats()
+        assert stats["requests"] == 0
+        assert stats["connections_reused"] == 0
+        assert stats["reuse_ratio"] == 0.0
+
+    def test_modules_share_client(self):
+        """Test every module instance uses the process-wide pool."""
+        assert InventoryChanges().http is InventoryStatus().http
+        assert InventoryChanges().http is get_http_client()
+
+class TestCompression:
+    def test_accept_encoding_is_explicit(self):
+        """Test the session offers compression, or none when set to identity."""
+        client = HTTPClient(accept_encoding="auto")
+        assert "gzip" in client.session.headers["Accept-Encoding"]
+        client.close()
+        client = HTTPClient(accept_encoding="identity")
+        assert client.session.headers["Accept-Encoding"] == "identity"
+        client.close()
+
+    def test_counts_wire_and_decoded_bytes(self, gzip_server):
+        """Test compressed responses are decoded and the saving is measured."""
+        client = HTTPClient(accept_encoding="gzip")
+        response = client.get(gzip_server)
+        assert response.content == SNAPSHOT
+
+        stats = client.stats()
+        assert stats["bytes_decoded"] == len(SNAPSHOT)
+        assert stats["bytes_wire"] == len(gzip.compress(SNAPSHOT))
+        assert stats["compression_ratio"] > 5
+        client.close()
+
+    def test_streamed_download_is_decompressed_incrementally(self, gzip_server):
+        """Test iter_content yields decoded chunks and records the transfer at the end."""
+        client = HTTPClient(accept_encoding="gzip")
+        with client.get(gzip_server, stream=True) as response:
+            chunks = list(client.iter_content(response, 1024))
+
+        assert b"".join(chunks) == SNAPSHOT
+        assert len(chunks) > 1
+        stats = client.stats()
+        assert stats["bytes_decoded"] == len(SNAPSHOT)
+        assert stats["bytes_saved"] > 0
+        client.close()
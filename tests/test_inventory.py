@@ -1,10 +1,18 @@
 # tests/test_inventory.py
 
+import time
 import pytest
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from config.config import Config
+from modules import inventory_changes
 from modules.inventory_changes import InventoryChanges
-from utils.exceptions import ValidationError
+from utils.checkpoint import CheckpointStore
+from utils.exceptions import APIError, ValidationError
+from utils.helpers import content_hash
+from utils.sync_state import SyncStateStore
 
 class TestInventoryChanges:
     @pytest.fixture
@@ -35,7 +43,9 @@ class TestInventoryChanges:
             }
         }
         
-        flattened = inventory_module._flatten_inventory_change(test_node)
+        batch, nodes = inventory_module.COLUMNS.flatten([test_node])
+        flattened = inventory_module.COLUMNS.frame(batch).iloc[0]
+        assert nodes == 1
         assert flattened["sku"] == "TEST-SKU"
         assert flattened["current_on_hand"] == 15
         assert flattened["location_name"] == "Zone A"
@@ -71,4 +81,381 @@ class TestInventoryChanges:
         # Verify file contents
         exported_df = pd.read_csv(filepath)
         assert len(exported_df) == 2
-        assert all(exported_df.columns == df.columns)
\ No newline at end of file
+        assert all(exported_df.columns == df.columns)
+
+
+class TestInventoryWindows:
+    """Inventory changes split into date windows fetched concurrently."""
+
+    START = datetime(2024, 10, 1)
+
+    @pytest.fixture
+    def inventory_module(self):
+        module = InventoryChanges()
+        # Un cambio cada 6 horas durante 10 días, incluidos los límites exactos de las ventanas
+        changes = [
+            {"sku": f"SKU{i}", "previous_on_hand": i, "change_in_on_hand": 1,
+             "created_at": (self.START + timedelta(hours=6 * i)).isoformat()}
+            for i in range(41)
+        ]
+        in_flight, peak, calls = [], [], []
+
+        def make_request(query, variables):
+            calls.append(variables)
+            # La API incluye ambos extremos del rango; el cursor es un offset
+            date_from = datetime.fromisoformat(variables["dateFrom"])
+            date_to = datetime.fromisoformat(variables["dateTo"])
+            matching = [c for c in changes if date_from <= datetime.fromisoformat(c["created_at"]) <= date_to]
+            offset = int(variables["after"] or 0)
+            page = matching[offset:offset + variables["first"]]
+            in_flight.append(1)
+            peak.append(len(in_flight))
+            time.sleep(0.01)
+            in_flight.pop()
+            return {"data": {"inventory_changes": {"complexity": 1, "data": {
+                "pageInfo": {"hasNextPage": offset + len(page) < len(matching),
+                             "endCursor": str(offset + len(page))},
+                "edges": [{"node": node} for node in page]
+            }}}}
+
+        module._make_request = make_request
+        module.peak = peak
+        module.calls = calls
+        return module
+
+    def test_windows_match_single_cursor(self, inventory_module):
+        """Test windows return every change once, in created_at order."""
+        date_to = (self.START + timedelta(days=10)).isoformat()
+        single = inventory_module.get_inventory_changes(self.START.isoformat(), date_to, max_records=1000)
+        sharded = inventory_module.get_inventory_changes(
+            self.START.isoformat(), date_to, max_records=1000, windows=4
+        )
+        assert len(sharded) == 41
+        assert not sharded["sku"].duplicated().any()
+        assert list(sharded["sku"]) == list(single.sort_values("created_at")["sku"])
+        assert max(inventory_module.peak) > 1
+
+    def test_windows_keep_requested_fields(self, inventory_module):
+        """Test created_at is fetched for merging but not returned unless requested."""
+        df = inventory_module.get_inventory_changes(
+            self.START.isoformat(), (self.START + timedelta(days=10)).isoformat(),
+            max_records=5, fields=["sku"], windows=3
+        )
+        assert list(df.columns) == ["sku"]
+        assert list(df["sku"]) == ["SKU0", "SKU1", "SKU2", "SKU3", "SKU4"]
+
+    def test_windows_stop_at_max_records(self, inventory_module, monkeypatch):
+        """Test windows after the ones already holding max_records changes are not paginated."""
+        # Una ventana por vez: la primera ya trae los 5 cambios más viejos
+        monkeypatch.setattr(Config, "INVENTORY_CHANGES_MAX_WINDOWS", 1)
+        df = inventory_module.get_inventory_changes(
+            self.START.isoformat(), (self.START + timedelta(days=10)).isoformat(),
+            max_records=5, fields=["sku"], windows=4
+        )
+        assert list(df["sku"]) == ["SKU0", "SKU1", "SKU2", "SKU3", "SKU4"]
+        assert len(inventory_module.calls) == 1
+
+    def test_windows_require_dates(self, inventory_module):
+        """Test the range must be bounded to be split."""
+        with pytest.raises(ValidationError):
+            inventory_module.get_inventory_changes(windows=2)
+
+
+class TestInventoryLoad:
+    """Inventory changes inserted chunk by chunk with resumable checkpoints."""
+
+    START = datetime(2024, 10, 1)
+    END = START + timedelta(days=10)
+    FIELDS = ["sku", "created_at"]
+
+    @pytest.fixture
+    def engine(self, tmp_path, monkeypatch):
+        # Páginas de 5 nodos para que una corrida tenga varios chunks
+        monkeypatch.setattr(Config, "PAGE_SIZE_ADAPTIVE", True)
+        monkeypatch.setattr(Config, "PAGE_MAX_SIZE", 5)
+        return create_engine(f"sqlite:///{tmp_path / 'sync.sqlite'}")
+
+    @pytest.fixture
+    def failing_insert(self, monkeypatch):
+        """Make the n-th to_sql call fail, like a dropped DB connection."""
+        def fail_on(n):
+            to_sql = pd.DataFrame.to_sql
+            upsert = inventory_changes.upsert_dataframe
+            calls = []
+            def flaky(write):
+                def wrapper(*args, **kwargs):
+                    # Solo cuentan las escrituras de filas; un frame vacío solo crea la tabla
+                    if len(next(arg for arg in args if isinstance(arg, pd.DataFrame))):
+                        calls.append(1)
+                        if len(calls) == n:
+                            raise OperationalError("INSERT", {}, Exception("connection lost"))
+                    return write(*args, **kwargs)
+                return wrapper
+            monkeypatch.setattr(pd.DataFrame, "to_sql", flaky(to_sql))
+            monkeypatch.setattr(inventory_changes, "upsert_dataframe", flaky(upsert))
+            def restore():
+                monkeypatch.setattr(pd.DataFrame, "to_sql", to_sql)
+                monkeypatch.setattr(inventory_changes, "upsert_dataframe", upsert)
+            return restore
+        return fail_on
+
+    def api(self, fail_on_call=None, changes=None):
+        """Fake API over 41 changes (one every 6 hours), optionally failing on the n-th request."""
+        if changes is None:
+            changes = [self.START + timedelta(hours=6 * i) for i in range(41)]
+        changes = [{"sku": f"SKU{i}", "created_at": at.isoformat()} for i, at in enumerate(changes)]
+        calls = []
+        served = []
+
+        def utc(value):
+            at = datetime.fromisoformat(value)
+            return at.astimezone(timezone.utc).replace(tzinfo=None) if at.tzinfo else at
+
+        def make_request(query, variables):
+            calls.append(variables["after"])
+            if len(calls) == fail_on_call:
+                raise APIError("API request failed with status 400", status_code=400)
+            date_from = datetime.fromisoformat(variables["dateFrom"])
+            date_to = datetime.fromisoformat(variables["dateTo"])
+            matching = [c for c in changes if date_from <= utc(c["created_at"]) <= date_to]
+            offset = int(variables["after"] or 0)
+            page = matching[offset:offset + variables["first"]]
+            served.extend(c["sku"] for c in page)
+            return {"data": {"inventory_changes": {"complexity": variables["first"], "data": {
+                "pageInfo": {"hasNextPage": offset + len(page) < len(matching),
+                             "endCursor": str(offset + len(page))},
+                "edges": [{"node": node} for node in page]
+            }}}}
+
+        module = InventoryChanges()
+        module._make_request = make_request
+        module.calls = calls
+        module.served = served
+        return module
+
+    def load(self, module, engine, max_records=1000, **kwargs):
+        return module.load_inventory_changes(
+            "sph_transacciones", self.START.isoformat(), self.END.isoformat(),
+            max_records=max_records, fields=self.FIELDS, chunk_size=10, engine=engine, **kwargs
+        )
+
+    def loaded(self, engine):
+        return pd.read_sql("SELECT * FROM sph_transacciones", engine)
+
+    def windows(self, engine):
+        return pd.read_sql(
+            "SELECT window_from, window_to, status FROM sph_sync_checkpoint ORDER BY window_from", engine,
+            parse_dates=["window_from", "window_to"]
+        )
+
+    def test_load_commits_every_change_once(self, engine):
+        """Test a complete load inserts every change and closes its checkpoint."""
+        assert self.load(self.api(), engine) == 41
+        df = self.loaded(engine)
+        assert len(df) == 41 and not df["sku"].duplicated().any()
+        assert CheckpointStore(engine).pending("sph_transacciones") == []
+
+    def test_interrupted_load_resumes_from_cursor(self, engine, failing_insert):
+        """Test a rerun continues after the last committed chunk instead of the window start."""
+        restore = failing_insert(3)
+        with pytest.raises(ValidationError):
+            self.load(self.api(), engine)
+        restore()
+        # Dos chunks de dos páginas confirmados antes del fallo
+        pending = CheckpointStore(engine).pending("sph_transacciones")
+        assert [(cp["cursor"], cp["rows_committed"]) for cp in pending] == [("20", 20)]
+
+        module = self.api()
+        # Las fechas nuevas se ignoran: manda la ventana sin terminar
+        total = module.load_inventory_changes(
+            "sph_transacciones", self.END.isoformat(), (self.END + timedelta(days=1)).isoformat(),
+            max_records=1000, fields=self.FIELDS, chunk_size=10, engine=engine
+        )
+        assert total == 41
+        assert module.calls[0] == "20"
+        df = self.loaded(engine)
+        assert len(df) == 41 and not df["sku"].duplicated().any()
+
+    def test_fetch_failure_keeps_committed_pages(self, engine):
+        """Test pages committed before a failed request survive it and the rerun continues after them."""
+        with pytest.raises(APIError):
+            self.load(self.api(fail_on_call=5), engine)
+        pending = CheckpointStore(engine).pending("sph_transacciones")
+        assert [(cp["cursor"], cp["rows_committed"]) for cp in pending] == [("20", 20)]
+        module = self.api()
+        assert self.load(module, engine) == 41
+        assert module.calls[0] == "20"
+        assert len(self.loaded(engine)) == 41
+
+    def test_checkpoint_ignores_pages_read_ahead(self, engine, failing_insert):
+        """Test with prefetch the checkpoint stops at the last inserted page, not the last fetched."""
+        restore = failing_insert(3)
+        with pytest.raises(ValidationError):
+            self.load(self.api(), engine)
+        restore()
+        # Reanuda en "20": lee 20, 25 y 30 por adelantado y falla en la cuarta página
+        with pytest.raises(APIError):
+            self.load(self.api(fail_on_call=4), engine, prefetch=2)
+        pending = CheckpointStore(engine).pending("sph_transacciones")
+        assert [(cp["cursor"], cp["rows_committed"]) for cp in pending] == [("30", 30)]
+        assert self.load(self.api(), engine, prefetch=2) == 41
+
+    def test_windows_are_checkpointed_separately(self, engine):
+        """Test concurrent windows insert each change once and all finish."""
+        assert self.load(self.api(), engine, windows=3) == 41
+        df = self.loaded(engine)
+        assert sorted(df["sku"]) == sorted(f"SKU{i}" for i in range(41))
+        assert CheckpointStore(engine).pending("sph_transacciones") == []
+
+    def test_dense_windows_end_at_last_change(self, engine):
+        """Test a window over max_records ends at its last committed change instead of being fetched again."""
+        module = self.api()
+        assert self.load(module, engine, max_records=10) == 41
+        df = self.loaded(engine)
+        assert len(df) == 41 and not df["sku"].duplicated().any()
+        windows = self.windows(engine)
+        assert len(windows) > 4 and (windows["status"] == "done").all()
+        # Las ventanas cubren el rango completo, sin huecos ni solapamientos
+        assert windows["window_from"].iloc[0] == self.START and windows["window_to"].iloc[-1] == self.END
+        assert (windows["window_from"].iloc[1:].values == windows["window_to"].iloc[:-1].values).all()
+        # Sólo se vuelven a pedir los cambios del instante de cada corte
+        assert len(module.served) < 41 + len(windows)
+
+    def test_instant_over_max_records_loads_uncapped(self, engine):
+        """Test a window that cannot be cut, one instant with more changes than the cap, is loaded whole."""
+        changes = [self.START] * 15 + [self.START + timedelta(days=1)]
+        module = self.api(changes=changes)
+        assert self.load(module, engine, max_records=10) == 16
+        assert len(self.loaded(engine)) == 16
+        assert len(module.served) == 16
+
+    def test_quiet_periods_widen_windows(self, engine):
+        """Test windows grow again once a dense period is behind."""
+        # 30 cambios en la primera hora y después uno por día
+        changes = [self.START + timedelta(minutes=2 * i) for i in range(30)]
+        changes += [self.START + timedelta(days=day) for day in range(1, 10)]
+        assert self.load(self.api(changes=changes), engine, max_records=10) == 39
+        windows = self.windows(engine)
+        spans = list(windows["window_to"] - windows["window_from"])
+        assert min(spans) < timedelta(hours=1)
+        assert spans[-2] > 4 * min(spans)
+        assert len(windows) < 20
+
+    def test_load_advances_sync_state(self, engine):
+        """Test every committed chunk moves the watermark of the stream."""
+        assert self.load(self.api(), engine) == 41
+        state = SyncStateStore(engine).get(SyncStateStore.INVENTORY_CHANGES)
+        assert state["rows_total"] == 41
+        assert state["high_water_mark"] == self.START + timedelta(hours=6 * 40)
+
+    def test_failed_insert_keeps_sync_state(self, engine, failing_insert):
+        """Test the watermark only covers rows that were actually committed."""
+        failing_insert(3)
+        with pytest.raises(ValidationError):
+            self.load(self.api(), engine)
+        state = SyncStateStore(engine).get(SyncStateStore.INVENTORY_CHANGES)
+        df = self.loaded(engine)
+        assert state["rows_total"] == len(df) > 0
+        assert state["high_water_mark"] == pd.to_datetime(df["created_at"]).max()
+
+    def test_overlapping_loads_upsert(self, engine):
+        """Test reloading a range that was already committed does not duplicate rows."""
+        assert self.load(self.api(), engine, windows=2, upsert=True) == 41
+        total = self.api().load_inventory_changes(
+            "sph_transacciones", (self.START + timedelta(days=5)).isoformat(), self.END.isoformat(),
+            fields=self.FIELDS, chunk_size=10, engine=engine, upsert=True
+        )
+        assert total == 21
+        df = self.loaded(engine)
+        assert len(df) == 41 and not df["change_hash"].duplicated().any()
+
+    def test_append_without_upsert(self, engine):
+        """Test upsert=False keeps the plain append path."""
+        assert self.load(self.api(), engine, upsert=False) == 41
+        assert "change_hash" not in self.loaded(engine).columns
+
+    def test_upsert_requires_migrated_table(self, engine):
+        """Test upserts into a table loaded without the hash key stop before fetching anything."""
+        assert self.load(self.api(), engine, upsert=False) == 41
+        module = self.api()
+        with pytest.raises(ValidationError):
+            self.load(module, engine, upsert=True)
+        assert module.calls == []
+
+    def test_migrate_upsert_key_backfills_existing_rows(self, engine):
+        """Test the migration keys old rows and drops their repeats, so upserts over them add nothing."""
+        fields = self.FIELDS + [c for c in InventoryChanges.HASH_COLUMNS if c not in self.FIELDS]
+        with engine.begin() as connection:
+            connection.exec_driver_sql(f"CREATE TABLE sph_transacciones (id INTEGER PRIMARY KEY, {', '.join(fields)})")
+        # Dos cargas superpuestas sin upsert dejan filas repetidas
+        for date_from in (self.START, self.START + timedelta(days=5)):
+            self.api().load_inventory_changes(
+                "sph_transacciones", date_from.isoformat(), self.END.isoformat(),
+                fields=fields, chunk_size=10, engine=engine, upsert=False
+            )
+        assert len(self.loaded(engine)) == 62
+
+        module = self.api()
+        assert module.migrate_upsert_key("sph_transacciones", engine=engine, chunk_size=25) == 62
+        assert module.migrate_upsert_key("sph_transacciones", engine=engine) == 0
+        df = self.loaded(engine)
+        assert len(df) == 41 and df["change_hash"].notna().all() and not df["sku"].duplicated().any()
+
+        module.load_inventory_changes(
+            "sph_transacciones", self.START.isoformat(), self.END.isoformat(),
+            fields=fields, chunk_size=10, engine=engine, upsert=True
+        )
+        assert len(self.loaded(engine)) == 41
+
+    def test_migrated_keys_match_refetched_changes(self, engine):
+        """Test offsets and fractional seconds hash alike when backfilled from the table and when fetched again."""
+        changes = [
+            self.START + timedelta(hours=1, microseconds=600000),
+            datetime(2024, 10, 1, 9, 30, tzinfo=timezone(timedelta(hours=-3))),
+            self.START + timedelta(days=1)
+        ]
+        fields = self.FIELDS + [c for c in InventoryChanges.HASH_COLUMNS if c not in self.FIELDS]
+        with engine.begin() as connection:
+            connection.exec_driver_sql(f"CREATE TABLE sph_transacciones (id INTEGER PRIMARY KEY, {', '.join(fields)})")
+        module = self.api(changes=changes)
+        module.load_inventory_changes(
+            "sph_transacciones", self.START.isoformat(), self.END.isoformat(),
+            fields=fields, chunk_size=10, engine=engine, upsert=False
+        )
+        # Se guarda en UTC sin zona y al segundo, como lo guarda un DATETIME
+        stored = pd.to_datetime(self.loaded(engine).sort_values("created_at")["created_at"])
+        assert list(stored) == [self.START + timedelta(hours=1), datetime(2024, 10, 1, 12, 30), self.START + timedelta(days=1)]
+
+        assert module.migrate_upsert_key("sph_transacciones", engine=engine) == 3
+        self.api(changes=changes).load_inventory_changes(
+            "sph_transacciones", self.START.isoformat(), self.END.isoformat(),
+            fields=fields, chunk_size=10, engine=engine, upsert=True
+        )
+        assert len(self.loaded(engine)) == 3
+
+    def test_load_requires_dates(self, engine):
+        """Test a new sync needs a bounded range."""
+        with pytest.raises(ValidationError):
+            self.api().load_inventory_changes("sph_transacciones", engine=engine)
+
+
+class TestChangeHash:
+    """Content hash used as the upsert key of inventory changes."""
+
+    def changes(self, **overrides):
+        row = {"sku": "SKU1", "warehouse_id": "W1", "location_id": "L1",
+               "created_at": "2024-10-01T10:00:00+00:00", "change_in_on_hand": 5, "reason": "Purchase Order"}
+        row.update(overrides)
+        df = pd.DataFrame([row])
+        df["created_at"] = pd.to_datetime(df["created_at"])
+        return content_hash(df, InventoryChanges.HASH_COLUMNS)
+
+    def test_hash_ignores_parsed_dtypes(self):
+        """Test the same change hashes the same from differently typed pages."""
+        assert self.changes()[0] == self.changes(change_in_on_hand=5.0, created_at="2024-10-01T10:00:00")[0]
+
+    def test_hash_depends_on_every_column(self):
+        """Test changes differing in any key column get different keys."""
+        keys = {self.changes()[0], self.changes(reason="Cycle Count")[0], self.changes(location_id="L2")[0],
+                self.changes(change_in_on_hand=-5)[0], self.changes(created_at="2024-10-01T10:00:01")[0]}
+        assert len(keys) == 5
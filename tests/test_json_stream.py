@@ -0,0 +1,186 @@
+# tests/test_json_stream.py
+
+import json
+import pytest
+import pandas as pd
+from sqlalchemy import create_engine
+from utils.json_stream import JSONStreamReader
+from modules.inventory_changes import InventoryChanges
+from modules.inventory_snapshot import InventorySnapshot
+from utils.sync_state import SyncStateStore
+from utils.exceptions import ValidationError
+
+def chunked(payload, size):
+    raw = json.dumps(payload).encode("utf-8")
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+class FakeStreamResponse:
+    """Minimal streamed requests.Response."""
+
+    def __init__(self, payload, chunk_size=7):
+        self.status_code = 200
+        self.headers = {}
+        self.url = "https://example.com/payload.json"
+        self.request = None
+        self.chunks = chunked(payload, chunk_size)
+        self.closed = False
+
+    def iter_content(self, chunk_size=None):
+        return iter(self.chunks)
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class TestJSONStreamReader:
+    def test_items_across_chunk_boundaries(self):
+        """Test members split across chunks are decoded intact, siblings kept in document."""
+        payload = {
+            "snapshot_id": "S1",
+            "products": {f"SKU{i}": {"on_hand": i * 1000, "name": "ñandú"} for i in range(50)},
+            "snapshot_finished_at": None
+        }
+        for size in (1, 5, 4096):
+            reader = JSONStreamReader(chunked(payload, size))
+            items = dict(reader.items(["products"]))
+            assert items == payload["products"]
+            assert reader.document == {"snapshot_id": "S1", "products": {}, "snapshot_finished_at": None}
+
+    def test_missing_path_yields_nothing(self):
+        """Test a null branch ends the stream and is kept in the document."""
+        reader = JSONStreamReader(['{"data": null, "errors": [{"code": 30}]}'])
+        assert list(reader.items(["data", "products", "data", "edges"])) == []
+        assert reader.document["errors"] == [{"code": 30}]
+
+    def test_truncated_payload_raises(self):
+        """Test a payload cut in the middle of an item is an error."""
+        reader = JSONStreamReader(['{"products": {"A": {"on_hand": 1'])
+        with pytest.raises(ValueError):
+            list(reader.items(["products"]))
+
+class TestStreamedRequests:
+    def test_get_inventory_changes_streams_pages(self):
+        """Test streamed pages follow pageInfo read after the edges."""
+        module = InventoryChanges()
+        pages = [
+            {"data": {"inventory_changes": {"complexity": 3, "data": {
+                "edges": [{"node": {"sku": "A", "previous_on_hand": 1, "change_in_on_hand": 1}}],
+                "pageInfo": {"hasNextPage": True, "endCursor": "c1"}
+            }}}},
+            {"data": {"inventory_changes": {"complexity": 3, "data": {
+                "edges": [{"node": {"sku": "B", "previous_on_hand": 5, "change_in_on_hand": -1}}],
+                "pageInfo": {"hasNextPage": False, "endCursor": "c2"}
+            }}}}
+        ]
+        responses = []
+
+        def fake_post(url, **kwargs):
+            assert kwargs["stream"] is True
+            responses.append(FakeStreamResponse(pages[len(responses)]))
+            return responses[-1]
+
+        module.http.post = fake_post
+        try:
+            df = module.get_inventory_changes(fields=["sku", "current_on_hand"], stream=True)
+        finally:
+            del module.http.post
+
+        assert list(df["sku"]) == ["A", "B"]
+        assert list(df["current_on_hand"]) == [2, 4]
+        assert all(response.closed for response in responses)
+
+    def test_get_inventory_snapshot_by_url_streams_products(self):
+        """Test snapshot rows are built per product and get the trailing metadata."""
+        module = InventorySnapshot()
+        payload = {
+            "products": {
+                "A": {"account_id": "1", "warehouse_products": {"W1": {"on_hand": 3}, "W2": {"on_hand": 4}}},
+                "B": {"account_id": "1", "warehouse_products": {"W1": {"on_hand": 5}}}
+            },
+            "snapshot_id": "S1",
+            "snapshot_started_at": "2024-10-01T00:00:00",
+            "snapshot_finished_at": "2024-10-01T00:05:00"
+        }
+        module.http.get = lambda url, **kwargs: FakeStreamResponse(payload)
+        try:
+            df = module.get_inventory_snapshot_by_url("https://example.com/snapshot.json")
+        finally:
+            del module.http.get
+
+        assert list(df["sku"]) == ["A", "A", "B"]
+        assert list(df["warehouse_id"]) == ["W1", "W2", "W1"]
+        assert set(df["snapshot_id"]) == {"S1"}
+        assert df.loc[0, "snapshot_finished_at"].minute == 5
+
+    def snapshot(self, metadata_first):
+        metadata = {"snapshot_id": "S1", "snapshot_started_at": "2024-10-01T00:00:00",
+                    "snapshot_finished_at": "2024-10-01T00:05:00"}
+        products = {"products": {f"SKU{i}": {"warehouse_products": {"W1": {"on_hand": i}}} for i in range(25)}}
+        return dict(metadata, **products) if metadata_first else dict(products, **metadata)
+
+    def test_iter_inventory_snapshot_by_url_yields_chunks(self):
+        """Test the snapshot is delivered in bounded chunks with the leading metadata."""
+        module = InventorySnapshot()
+        module.http.get = lambda url, **kwargs: FakeStreamResponse(self.snapshot(True))
+        try:
+            chunks = list(module.iter_inventory_snapshot_by_url("https://example.com/s.json", chunk_size=10))
+        finally:
+            del module.http.get
+
+        assert [len(df) for df in chunks] == [10, 10, 5]
+        assert all(set(df["snapshot_id"]) == {"S1"} for df in chunks)
+
+    @pytest.mark.parametrize("metadata_first", [True, False])
+    def test_load_inventory_snapshot_by_url(self, tmp_path, metadata_first):
+        """Test every chunk is inserted and trailing metadata completes the earlier rows."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'snapshot.sqlite'}")
+        module = InventorySnapshot()
+        module.http.get = lambda url, **kwargs: FakeStreamResponse(self.snapshot(metadata_first))
+        try:
+            total = module.load_inventory_snapshot_by_url(
+                "https://example.com/s.json", "sph_inventario_detalle",
+                columns={"sph_snapshot_inventario_id": 7}, stream=SyncStateStore.INVENTORY_SNAPSHOT,
+                chunk_size=10, engine=engine
+            )
+        finally:
+            del module.http.get
+
+        df = pd.read_sql("SELECT * FROM sph_inventario_detalle", engine)
+        assert total == len(df) == 25
+        assert set(df["snapshot_id"]) == {"S1"} and set(df["sph_snapshot_inventario_id"]) == {7}
+        assert set(pd.to_datetime(df["snapshot_finished_at"], format="ISO8601")) == {pd.Timestamp("2024-10-01 00:05")}
+        state = SyncStateStore(engine).get(SyncStateStore.INVENTORY_SNAPSHOT)
+        assert state["rows_total"] == 25 and state["high_water_mark"].minute == 5
+
+    def test_snapshot_consumer_errors_are_not_masked(self):
+        """Test a ValueError raised while consuming chunks keeps its type and message."""
+        module = InventorySnapshot()
+        module.http.get = lambda url, **kwargs: FakeStreamResponse(self.snapshot(True))
+        try:
+            with pytest.raises(ValueError, match="boom"):
+                for df in module.iter_inventory_snapshot_by_url("https://example.com/s.json", chunk_size=10):
+                    raise ValueError("boom")
+        finally:
+            del module.http.get
+
+    def test_malformed_snapshot_raises_validation_error(self):
+        """Test invalid JSON in the download is reported as ValidationError, chained to the decode error."""
+        module = InventorySnapshot()
+        response = FakeStreamResponse({})
+        response.chunks = [b'{"products": {"A": {"warehouse_products": ']
+        module.http.get = lambda url, **kwargs: response
+        try:
+            with pytest.raises(ValidationError) as error:
+                module.get_inventory_snapshot_by_url("https://example.com/s.json")
+        finally:
+            del module.http.get
+        assert isinstance(error.value.__cause__, ValueError)
+        assert response.closed
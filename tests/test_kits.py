@@ -3,6 +3,7 @@
 import pytest
 import pandas as pd
 from modules.kits_manager import KitsManager
+from config.config import Config
 from utils.exceptions import ValidationError
 
 class TestKitsManager:
@@ -26,6 +27,26 @@ class TestKitsManager:
         )
         assert "kit_build" in query
         assert "components" in query
+
+    def test_batches_shrink_after_expensive_response(self, kits_module):
+        """Test the complexity reported per alias sizes the following batches."""
+        batches = []
+
+        def fake_send(query, variables, cost_key, allow_partial=False):
+            aliases = sorted({name.split("_")[0] for name in variables})
+            batches.append(len(aliases))
+            return {"data": {alias: {"complexity": 25, "sku": variables[f"{alias}_sku"], "name": "Kit",
+                                     "components": [{"sku": "COMP1", "quantity": 1}]}
+                             for alias in aliases}}
+
+        kits_module._send_request = fake_send
+        df = kits_module.get_kits_details([f"KIT{i}" for i in range(120)])
+        assert "complexity" in kits_module._build_kit_selection()
+        # Primer lote con el costo por defecto; después entra lo que paga el presupuesto a 25 créditos por kit
+        assert batches[0] == min(Config.BATCH_MAX_SIZE, Config.BATCH_MAX_COMPLEXITY // Config.BATCH_DEFAULT_ITEM_COST)
+        assert batches[1:-1] == [Config.BATCH_MAX_COMPLEXITY // 25] * (len(batches) - 2)
+        assert sum(batches) == 120
+        assert len(df) == 120 and df["error"].isna().all()
         
     @pytest.mark.vcr()
     def test_create_kit(self, kits_module):
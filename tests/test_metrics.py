@@ -0,0 +1,86 @@
+# tests/test_metrics.py
+
+import json
+import pytest
+from utils.metrics import MetricsRegistry, get_metrics
+from utils.retry import RetryPolicy
+from modules.base import ShipHeroAPI
+from tests.test_retry import FakeHTTP, FakeResponse
+
+class TestMetricsRegistry:
+    @pytest.fixture
+    def registry(self):
+        return MetricsRegistry(buckets=[0.1, 1, 10])
+
+    def test_counters_by_label(self, registry):
+        """Test counters add up separately per label set."""
+        registry.inc("shiphero_retries_total", operation="products", error_class="network")
+        registry.inc("shiphero_retries_total", operation="products", error_class="network")
+        registry.inc("shiphero_retries_total", 3, operation="inventory", error_class="throttle")
+        values = {
+            (s["labels"]["operation"], s["labels"]["error_class"]): s["value"]
+            for s in registry.summary()["shiphero_retries_total"]
+        }
+        assert values == {("products", "network"): 2, ("inventory", "throttle"): 3}
+
+    def test_histogram_summary(self, registry):
+        """Test histograms keep count, sum, max and cumulative buckets."""
+        for value in (0.05, 0.5, 0.7, 20):
+            registry.observe("shiphero_request_duration_seconds", value, operation="products")
+        [series] = registry.summary()["shiphero_request_duration_seconds"]
+        assert series["count"] == 4
+        assert series["sum"] == pytest.approx(21.25)
+        assert series["max"] == 20
+        assert series["buckets"] == {"0.1": 1, "1": 3, "10": 3}
+
+    def test_prometheus_format(self, registry):
+        """Test the textfile has TYPE lines, escaped labels and +Inf buckets."""
+        registry.describe("shiphero_rows_total", "Rows produced")
+        registry.inc("shiphero_rows_total", 100, operation='in"ventory')
+        registry.observe("latency_seconds", 0.5)
+        text = registry.to_prometheus()
+        assert "# HELP shiphero_rows_total Rows produced" in text
+        assert "# TYPE shiphero_rows_total counter" in text
+        assert 'shiphero_rows_total{operation="in\\"ventory"} 100' in text
+        assert 'latency_seconds_bucket{le="1"} 1' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 1' in text
+        assert "latency_seconds_count 1" in text
+
+    def test_export_writes_both_files(self, registry, tmp_path):
+        """Test export writes the Prometheus textfile and a JSON summary."""
+        registry.set("shiphero_run_duration_seconds", 12.5, module="inventory", action="load_database")
+        paths = registry.export(str(tmp_path))
+        with open(paths["prometheus"]) as file:
+            assert 'shiphero_run_duration_seconds{action="load_database",module="inventory"} 12.5' in file.read()
+        with open(paths["json"]) as file:
+            summary = json.load(file)["metrics"]
+        assert summary["shiphero_run_duration_seconds"][0]["value"] == 12.5
+
+class TestClientMetrics:
+    @pytest.fixture
+    def metrics(self):
+        metrics = get_metrics()
+        metrics.reset()
+        yield metrics
+        metrics.reset()
+
+    def test_request_latency_credits_and_retries(self, metrics):
+        """Test the client records every attempt, the credits charged and the retries."""
+        api = ShipHeroAPI()
+        api.retry_policy = RetryPolicy(budgets={"rate_limit": 2}, base_delay=0, jitter=False)
+        api.http = FakeHTTP([
+            FakeResponse(429, headers={"Retry-After": "0"}),
+            FakeResponse(200, {"data": {"inventory": {"complexity": 7}}})
+        ])
+        api._make_request("query inventory { inventory { complexity } }")
+
+        summary = metrics.summary()
+        attempts = {
+            s["labels"]["status"]: s["count"] for s in summary["shiphero_request_duration_seconds"]
+            if s["labels"]["operation"] == "inventory"
+        }
+        assert attempts == {"error": 1, "ok": 1}
+        assert summary["shiphero_credits_used_total"] == [{"labels": {"operation": "inventory"}, "value": 7}]
+        assert summary["shiphero_retries_total"] == [
+            {"labels": {"error_class": "rate_limit", "operation": "inventory"}, "value": 1}
+        ]
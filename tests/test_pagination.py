@@ -0,0 +1,244 @@
+# tests/test_pagination.py
+
+import threading
+import time
+import pytest
+import pandas as pd
+from config.config import Config
+from utils.exceptions import APIError, ValidationError
+from utils.pagination import get_page_info, is_page_too_large
+from modules.inventory_changes import InventoryChanges
+from modules.inventory_status import InventoryStatus
+from modules.warehouse import Warehouse
+from tests.test_async_client import _changes_page
+
+def paged(pages):
+    """Serve pages keyed by the 'after' cursor and record the requests."""
+    calls = []
+    def make_request(query, variables):
+        calls.append(variables)
+        return pages[variables["after"]]
+    make_request.calls = calls
+    return make_request
+
+class TestPaginator:
+    def test_page_info_both_shapes(self):
+        """Test pagination info is read from camelCase and snake_case connections."""
+        assert get_page_info({"pageInfo": {"hasNextPage": True, "endCursor": "a"}}) == (True, "a")
+        assert get_page_info({"page_info": {"has_next_page": False, "end_cursor": "b"}}) == (False, "b")
+        assert get_page_info({"edges": []}) == (False, None)
+
+    @pytest.fixture
+    def inventory_module(self):
+        module = InventoryChanges()
+        module._make_request = paged({
+            None: _changes_page(["A", "B"], True, "c1"),
+            "c1": _changes_page(["C", "D"], True, "c2"),
+            "c2": _changes_page(["E"], False, None)
+        })
+        return module
+
+    def test_chunks_have_bounded_size(self, inventory_module):
+        """Test records come out in DataFrames of at most chunk_size rows."""
+        chunks = list(inventory_module.iter_inventory_changes(max_records=100, chunk_size=2))
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert list(pd.concat(chunks)["sku"]) == ["A", "B", "C", "D", "E"]
+        assert pd.api.types.is_datetime64_any_dtype(chunks[0]["created_at"])
+
+    def test_pages_are_fetched_lazily(self, inventory_module):
+        """Test a page is requested only when the consumer gets to it."""
+        chunks = inventory_module.iter_inventory_changes(max_records=100, chunk_size=2)
+        next(chunks)
+        assert len(inventory_module._make_request.calls) == 1
+
+    def test_stops_at_max_records(self, inventory_module):
+        """Test no page is requested once max_records nodes were fetched."""
+        df = inventory_module.get_inventory_changes(max_records=4)
+        assert list(df["sku"]) == ["A", "B", "C", "D"]
+        assert [call["first"] for call in inventory_module._make_request.calls] == [4, 2]
+
+    def test_fixed_size_by_default(self, inventory_module):
+        """Test pages keep the fetcher size unless adaptive sizing is enabled."""
+        inventory_module.get_inventory_changes(max_records=5000)
+        assert [call["first"] for call in inventory_module._make_request.calls] == [100, 100, 100]
+
+    def test_nodes_flattened_into_several_records(self):
+        """Test snake_case connections whose nodes flatten into several rows."""
+        module = InventoryStatus()
+        node = {"id": "1", "sku": "A", "warehouse_products": [
+            {"warehouse_id": "W1", "on_hand": 1}, {"warehouse_id": "W2", "on_hand": 2}
+        ]}
+        module._make_request = paged({None: {"data": {"inventory": {
+            "edges": [{"node": node}],
+            "page_info": {"has_next_page": False, "end_cursor": None}
+        }}}})
+        df = module.get_inventory_status()
+        assert list(df["warehouse_id"]) == ["W1", "W2"]
+
+    def test_warehouse_products(self):
+        """Test warehouse products are paginated and flattened."""
+        module = Warehouse()
+        node = {"id": "WP1", "on_hand": 7, "warehouse": {"id": "W1"}, "product": {"sku": "A", "name": "Alpha"}}
+        module._make_request = paged({None: {"data": {"warehouse_products": {"data": {
+            "pageInfo": {"hasNextPage": False, "endCursor": None},
+            "edges": [{"node": node}]
+        }}}}})
+        df = module.get_warehouse_products("W1")
+        assert df.loc[0, "sku"] == "A" and df.loc[0, "on_hand"] == 7 and df.loc[0, "warehouse_id"] == "W1"
+
+    def test_invalid_response(self, inventory_module):
+        """Test a response without the connection raises ValidationError."""
+        inventory_module._make_request = lambda query, variables: {"data": {}}
+        with pytest.raises(ValidationError):
+            inventory_module.get_inventory_changes()
+
+def priced(pages, node_cost=2, fail_above=None):
+    """Serve pages whose complexity grows with `first`, failing pages larger than fail_above."""
+    calls = []
+    def make_request(query, variables):
+        calls.append(variables["first"])
+        if fail_above and variables["first"] > fail_above:
+            raise APIError('GraphQL errors: [{"message": "Query complexity exceeds the maximum allowed"}]')
+        page = pages[variables["after"]]
+        page["data"]["inventory_changes"]["complexity"] = variables["first"] * node_cost + 1
+        return page
+    make_request.calls = calls
+    return make_request
+
+class TestPageSizer:
+    @pytest.fixture(autouse=True)
+    def adaptive(self, monkeypatch):
+        # El tamaño adaptativo está apagado por defecto
+        monkeypatch.setattr(Config, "PAGE_SIZE_ADAPTIVE", True)
+
+    @pytest.fixture
+    def pages(self):
+        return {
+            None: _changes_page(["A"], True, "c1"),
+            "c1": _changes_page(["B"], True, "c2"),
+            "c2": _changes_page(["C"], False, None)
+        }
+
+    def test_grows_toward_complexity_budget(self, pages):
+        """Test pages grow at most PAGE_SIZE_GROWTH times per page, up to the credit budget."""
+        module = InventoryChanges()
+        module._make_request = priced(pages)
+        df = module.get_inventory_changes(max_records=5000)
+        assert list(df["sku"]) == ["A", "B", "C"]
+        # 1000 créditos / ~2 por nodo, redondeado a múltiplos de 10
+        assert module._make_request.calls == [100, 400, 490]
+
+    def test_learned_size_is_reused(self, pages):
+        """Test a new fetch of the same operation starts at the learned page size."""
+        module = InventoryChanges()
+        module._make_request = priced(pages)
+        module.get_inventory_changes(max_records=5000)
+        module._make_request = priced(pages)
+        module.get_inventory_changes(max_records=5000)
+        assert module._make_request.calls[0] == 490
+
+    def test_shrinks_after_complexity_error(self, pages):
+        """Test a page rejected for its complexity is retried with half the nodes."""
+        module = InventoryChanges()
+        module._make_request = priced(pages, fail_above=30)
+        df = module.get_inventory_changes(max_records=5000)
+        assert list(df["sku"]) == ["A", "B", "C"]
+        # Cada fallo baja el tope a 3/4 del tamaño rechazado: 75, 37, 27
+        assert module._make_request.calls == [100, 50, 25, 37, 18, 27]
+
+    def test_other_errors_are_raised(self, pages):
+        """Test errors unrelated to the page size are not retried."""
+        module = InventoryChanges()
+        def fail(query, variables):
+            raise APIError("GraphQL errors: invalid sku")
+        module._make_request = fail
+        with pytest.raises(APIError):
+            module.get_inventory_changes(max_records=5000)
+
+    def test_fixed_size_when_not_adaptive(self, pages):
+        """Test adaptive=False keeps the page size given by the fetcher."""
+        module = InventoryChanges()
+        module._make_request = priced(pages)
+        records = list(module._paginator(
+            "query", {}, ['data', 'inventory_changes', 'data'], lambda node: node,
+            max_records=5000, page_size=100, adaptive=False
+        ))
+        assert len(records) == 3
+        assert module._make_request.calls == [100, 100, 100]
+
+    def test_is_page_too_large(self):
+        """Test which errors are worth retrying with a smaller page."""
+        assert is_page_too_large(APIError("Request error: Read timed out. (read timeout=100)"))
+        assert is_page_too_large(APIError("API request failed with status 504", status_code=504))
+        assert not is_page_too_large(APIError("API request failed with status 400", status_code=400))
+        # Mencionar la complejidad no alcanza: solo el rechazo por superar el máximo
+        assert not is_page_too_large(APIError('GraphQL errors: [{"message": "Cannot query field \'complexity\' on type \'Kit\'"}]'))
+
+class TestPrefetch:
+    @pytest.fixture
+    def pages(self):
+        # Diez páginas de un nodo: c0 -> c1 -> ... -> c9
+        cursors = [None] + [f"c{i}" for i in range(1, 10)]
+        return {
+            cursor: _changes_page([f"SKU{i}"], i < 9, f"c{i + 1}" if i < 9 else None)
+            for i, cursor in enumerate(cursors)
+        }
+
+    def paginator(self, module, flatten=None, prefetch=2):
+        return module._paginator(
+            "query", {}, ['data', 'inventory_changes', 'data'], flatten or (lambda node: node),
+            max_records=1000, page_size=1, adaptive=False, prefetch=prefetch
+        )
+
+    def test_same_records_as_on_demand(self, pages):
+        """Test read-ahead yields the same records in the same order."""
+        module = InventoryChanges()
+        module._make_request = paged(pages)
+        assert [r["sku"] for r in self.paginator(module)] == [f"SKU{i}" for i in range(10)]
+        assert len(module._make_request.calls) == 10
+
+    def test_next_page_fetched_while_flattening(self, pages):
+        """Test the next cursor is requested while the current page is still being flattened."""
+        module = InventoryChanges()
+        requested = paged(pages)
+        second_page = threading.Event()
+        def make_request(query, variables):
+            if variables["after"] == "c1":
+                second_page.set()
+            return requested(query, variables)
+        module._make_request = make_request
+        overlapped = []
+        def flatten(node):
+            if node["sku"] == "SKU0":
+                overlapped.append(second_page.wait(timeout=2))
+            return node
+        assert len(list(self.paginator(module, flatten))) == 10
+        assert overlapped == [True]
+
+    def test_read_ahead_is_bounded(self, pages):
+        """Test a stalled consumer holds at most prefetch pages queued plus one in flight."""
+        module = InventoryChanges()
+        module._make_request = paged(pages)
+        paginator = self.paginator(module, prefetch=1)
+        walk = paginator.pages()
+        next(walk)
+        time.sleep(0.3)
+        assert len(module._make_request.calls) <= 3
+        # El cursor es el de la página entregada, no el de las leídas por adelantado
+        assert paginator.after_cursor == "c1" and paginator.records_fetched == 1
+        walk.close()
+
+    def test_errors_reach_the_consumer(self, pages):
+        """Test a failed read-ahead request is raised where the pages are consumed."""
+        module = InventoryChanges()
+        requested = paged(pages)
+        def make_request(query, variables):
+            if variables["after"] == "c2":
+                raise APIError("API request failed with status 400", status_code=400)
+            return requested(query, variables)
+        module._make_request = make_request
+        received = []
+        with pytest.raises(APIError):
+            for records in self.paginator(module).pages():
+                received.extend(records)
+        assert [r["sku"] for r in received] == ["SKU0", "SKU1"]
@@ -0,0 +1,83 @@
+# tests/test_rate_limiter.py
+
+import time
+import pytest
+from utils.rate_limiter import CreditBucket, SQLiteCreditBucket
+from utils.helpers import get_operation_name
+from modules.base import ShipHeroAPI
+
+class TestCreditBucket:
+    @pytest.fixture
+    def bucket(self):
+        return CreditBucket(capacity=100, refill_rate=1000, default_cost=10)
+
+    def test_acquire_reserves_default_cost(self, bucket):
+        """Test an unseen query reserves the default cost."""
+        reserved = bucket.acquire("products:200")
+        assert reserved == 10
+        assert bucket.usage()["available"] <= 90.5
+
+    def test_settle_learns_reported_complexity(self, bucket):
+        """Test the reported complexity becomes the next estimate."""
+        reserved = bucket.acquire("products:200")
+        bucket.settle("products:200", reserved, 40)
+        assert bucket.estimate("products:200") == 40
+        assert bucket.usage()["credits_used"] == 40
+
+    def test_acquire_waits_for_refill(self, bucket):
+        """Test acquire sleeps just long enough for the bucket to refill."""
+        bucket.sync(remaining_credits=0, cost_key="inventory:100", required_credits=50)
+        start = time.monotonic()
+        bucket.acquire("inventory:100")
+        elapsed = time.monotonic() - start
+        assert 0.04 <= elapsed < 0.5
+        assert bucket.usage()["throttle_count"] == 1
+
+    def test_settle_without_complexity_refunds(self, bucket):
+        """Test a failed request gives its reservation back."""
+        reserved = bucket.acquire("account")
+        bucket.settle("account", reserved, None)
+        assert bucket.usage()["available"] == pytest.approx(100)
+
+class TestCostAccounting:
+    def test_get_operation_name(self):
+        """Test the root field is read from queries and mutations."""
+        assert get_operation_name("query($first: Int) { products(has_kits: true) { complexity } }") == "products"
+        assert get_operation_name("query($a: String!) { k0: product(sku: $a) { id } }") == "product"
+        assert get_operation_name("mutation X($id: String!) {\n kit_clear(data: {}) { request_id } }") == "kit_clear"
+
+    def test_extract_complexity(self):
+        """Test complexity is summed over root fields."""
+        response = {"data": {"products": {"complexity": 101}, "account": {"complexity": 1}}}
+        assert ShipHeroAPI._extract_complexity(response) == 102
+        assert ShipHeroAPI._extract_complexity({"data": None}) is None
+
+    def test_get_cost_key(self):
+        """Test page size is part of the cost key."""
+        query = "query { inventory_changes { complexity } }"
+        assert ShipHeroAPI._get_cost_key(query, {"first": 100}) == "inventory_changes:100"
+        assert ShipHeroAPI._get_cost_key(query) == "inventory_changes"
+
+class TestSQLiteCreditBucket:
+    @pytest.fixture
+    def store_path(self, tmp_path):
+        return str(tmp_path / "limiter.sqlite")
+
+    def test_buckets_share_one_budget(self, store_path):
+        """Test two buckets on the same file draw from the same credits."""
+        first = SQLiteCreditBucket(store_path, capacity=100, refill_rate=0.001, default_cost=30)
+        second = SQLiteCreditBucket(store_path, capacity=100, refill_rate=0.001, default_cost=30)
+
+        first.acquire("products:200")
+        second.acquire("products:200")
+        assert first.usage()["available"] == pytest.approx(40, abs=0.5)
+
+    def test_learned_costs_are_shared(self, store_path):
+        """Test a cost observed by one process is used by the others."""
+        first = SQLiteCreditBucket(store_path, capacity=100, refill_rate=1000, default_cost=10)
+        second = SQLiteCreditBucket(store_path, capacity=100, refill_rate=1000, default_cost=10)
+
+        reserved = first.acquire("inventory:100")
+        first.settle("inventory:100", reserved, 55)
+        assert second.estimate("inventory:100") == 55
+        assert second.usage()["backend"] == "sqlite"
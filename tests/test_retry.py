@@ -0,0 +1,102 @@
+# tests/test_retry.py
+
+import json
+import pytest
+from utils.retry import RetryPolicy, parse_retry_after, parse_time_remaining
+from utils.exceptions import RateLimitError
+from modules.base import ShipHeroAPI
+
+class FakeResponse:
+    def __init__(self, status_code, data=None, headers=None):
+        self.status_code = status_code
+        self._data = data
+        self.headers = headers or {}
+        self.text = "" if data is None else "{}"
+
+    def json(self):
+        if self._data is None:
+            raise ValueError("No JSON")
+        return self._data
+
+    @property
+    def content(self):
+        return b"" if self._data is None else json.dumps(self._data).encode()
+
+class FakeHTTP:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0)
+
+class TestRetryParsing:
+    def test_parse_time_remaining(self):
+        """Test time_remaining strings are converted to seconds."""
+        assert parse_time_remaining("3 seconds") == 3
+        assert parse_time_remaining("1 second.") == 1
+        assert parse_time_remaining("500 ms") == 0.5
+        assert parse_time_remaining(None) is None
+
+    def test_parse_retry_after(self):
+        """Test Retry-After accepts seconds and HTTP dates."""
+        assert parse_retry_after("7") == 7
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+        assert parse_retry_after(None) is None
+
+class TestRetryPolicy:
+    def test_budget_per_error_class(self):
+        """Test each error class has its own retry budget."""
+        policy = RetryPolicy(budgets={"network": 1, "rate_limit": 2}, jitter=False)
+        state = policy.start()
+        assert policy.next_delay(state, RetryPolicy.NETWORK) is not None
+        assert policy.next_delay(state, RetryPolicy.NETWORK) is None
+        assert policy.next_delay(state, RetryPolicy.RATE_LIMIT) is not None
+
+    def test_exponential_backoff(self):
+        """Test backoff doubles per attempt and respects the cap."""
+        policy = RetryPolicy(base_delay=1, max_delay=5, jitter=False)
+        assert [policy.backoff(n) for n in range(4)] == [1, 2, 4, 5]
+
+    def test_server_hint_is_used_as_is(self):
+        """Test an explicit wait overrides the computed backoff."""
+        policy = RetryPolicy(base_delay=1, jitter=False)
+        state = policy.start()
+        assert policy.next_delay(state, RetryPolicy.THROTTLE, 2.5) == 2.5
+
+class TestMakeRequestRetries:
+    @pytest.fixture
+    def api(self):
+        api = ShipHeroAPI()
+        api.retry_policy = RetryPolicy(budgets={"rate_limit": 2}, base_delay=0, jitter=False)
+        return api
+
+    def test_retries_429_until_success(self, api):
+        """Test 429 responses are retried with the Retry-After wait."""
+        api.http = FakeHTTP([
+            FakeResponse(429, headers={"Retry-After": "0"}),
+            FakeResponse(200, {"data": {"inventory": {"complexity": 1}}})
+        ])
+        response = api._make_request("query { inventory { complexity } }")
+        assert response["data"]["inventory"]["complexity"] == 1
+        assert api.http.calls == 2
+
+    def test_raises_when_budget_exhausted(self, api):
+        """Test the original error is raised once the budget runs out."""
+        api.http = FakeHTTP([FakeResponse(429) for _ in range(3)])
+        with pytest.raises(RateLimitError):
+            api._make_request("query { inventory { complexity } }")
+        assert api.http.calls == 3
+
+    def test_insufficient_credits_waits_time_remaining(self, api, monkeypatch):
+        """Test code 30 errors wait the reported time_remaining."""
+        sleeps = []
+        monkeypatch.setattr("modules.base.time.sleep", sleeps.append)
+        api.http = FakeHTTP([
+            FakeResponse(200, {"errors": [{"code": 30, "time_remaining": "2 seconds",
+                                           "remaining_credits": 4004, "required_credits": 1}]}),
+            FakeResponse(200, {"data": {"inventory": {"complexity": 1}}})
+        ])
+        api._make_request("query { inventory { complexity } }")
+        assert sleeps == [2]
@@ -0,0 +1,69 @@
+# tests/test_singleflight.py
+
+import threading
+import time
+import pytest
+from utils.singleflight import SingleFlight
+from modules.base import ShipHeroAPI
+
+class TestSingleFlight:
+    @pytest.fixture
+    def group(self):
+        return SingleFlight()
+
+    def _run_concurrently(self, target, count):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_calls_share_one_execution(self, group):
+        """Test identical concurrent calls run the function once."""
+        calls = []
+
+        def slow_call():
+            calls.append(1)
+            time.sleep(0.1)
+            return {"value": 1}
+
+        results = self._run_concurrently(lambda: group.do("key", slow_call), 4)
+        assert len(calls) == 1
+        assert results == [{"value": 1}] * 4
+        assert len({id(result) for result in results}) == 4
+        assert group.stats()["shared"] == 3
+
+    def test_errors_are_shared(self, group):
+        """Test followers receive the leader's exception."""
+        def failing_call():
+            time.sleep(0.05)
+            raise ValueError("boom")
+
+        errors = []
+
+        def call():
+            try:
+                group.do("key", failing_call)
+            except ValueError as e:
+                errors.append(e)
+
+        self._run_concurrently(call, 3)
+        assert len(errors) == 3
+
+    def test_make_request_deduplicates_queries(self):
+        """Test concurrent identical queries reach the API once."""
+        api = ShipHeroAPI()
+        api.single_flight = SingleFlight()
+        sent = []
+
+        def fake_send(query, variables, cost_key, allow_partial=False):
+            sent.append(variables)
+            time.sleep(0.1)
+            return {"data": {"inventory": {"complexity": 1}}}
+
+        api._send_request = fake_send
+        query = "query($sku: String) { inventory(sku: $sku) { complexity } }"
+        self._run_concurrently(lambda: api._make_request(query, {"sku": "A"}), 3)
+        assert len(sent) == 1
@@ -35,11 +35,13 @@ class TestInventoryStatus:
             }]
         }
         
-        flattened = status_module._flatten_inventory_record(test_node)
+        batch, _ = status_module.COLUMNS.flatten([test_node])
+        flattened = status_module.COLUMNS.records(batch)
         assert len(flattened) == 1
         assert flattened[0]["sku"] == "TEST-SKU"
         assert flattened[0]["on_hand"] == 10
         assert flattened[0]["warehouse_name"] == "Main Warehouse"
+        assert flattened[0]["reserved"] == 0
         
     @pytest.mark.vcr()
     def test_get_inventory_status(self, status_module):
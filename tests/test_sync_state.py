@@ -0,0 +1,64 @@
+# tests/test_sync_state.py
+
+import pytest
+from datetime import datetime
+import pandas as pd
+from sqlalchemy import create_engine
+from utils.sync_state import SyncStateStore, latest_timestamp
+
+STREAM = SyncStateStore.INVENTORY_CHANGES
+
+
+class TestSyncStateStore:
+    """Per-stream watermarks kept in sph_sync_state."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        store = SyncStateStore(create_engine(f"sqlite:///{tmp_path / 'state.sqlite'}"))
+        store.ensure(STREAM)
+        return store
+
+    def advance(self, store, *args, **kwargs):
+        with store.engine.begin() as connection:
+            store.advance(connection, STREAM, *args, **kwargs)
+
+    def test_unknown_stream(self, store):
+        """Test a stream that never loaded has no state."""
+        assert store.get(SyncStateStore.PRODUCTS) is None
+
+    def test_ensure_is_idempotent(self, store):
+        """Test ensure keeps the existing row."""
+        self.advance(store, 3, datetime(2024, 10, 1))
+        store.ensure(STREAM)
+        assert store.get(STREAM)["rows_total"] == 3
+
+    def test_watermark_only_moves_forward(self, store):
+        """Test a late batch of older rows does not rewind the watermark."""
+        self.advance(store, 5, datetime(2024, 10, 2), cursor="abc")
+        self.advance(store, 2, datetime(2024, 10, 1))
+        state = store.get(STREAM)
+        assert state["high_water_mark"] == datetime(2024, 10, 2)
+        assert state["rows_total"] == 7
+        assert state["last_batch_rows"] == 2
+        assert state["last_cursor"] == "abc"
+
+    def test_replace_resets_rows_total(self, store):
+        """Test a full refresh counts only the rows it wrote."""
+        self.advance(store, 5, datetime(2024, 10, 1))
+        self.advance(store, 3, datetime(2024, 10, 2), replace=True)
+        assert store.get(STREAM)["rows_total"] == 3
+
+    def test_rolled_back_batch_is_not_recorded(self, store):
+        """Test the state is part of the caller's transaction."""
+        with pytest.raises(RuntimeError):
+            with store.engine.begin() as connection:
+                store.advance(connection, STREAM, 5, datetime(2024, 10, 1))
+                raise RuntimeError("insert failed")
+        state = store.get(STREAM)
+        assert state["rows_total"] == 0 and state["high_water_mark"] is None
+
+    def test_latest_timestamp(self):
+        """Test ISO strings with offsets become naive UTC datetimes."""
+        values = pd.Series(["2024-10-01T10:00:00-03:00", "2024-10-01T12:00:00+00:00", None])
+        assert latest_timestamp(values) == datetime(2024, 10, 1, 13, 0)
+        assert latest_timestamp(pd.Series([], dtype=object)) is None
@@ -0,0 +1,121 @@
+# tests/test_token_manager.py
+
+import base64
+import json
+import threading
+import time
+import pytest
+from utils.token_manager import TokenManager, TokenStore, decode_jwt_expiry
+from utils.exceptions import AuthenticationError
+
+def make_jwt(exp):
+    def encode(part):
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b"=").decode()
+    return f"{encode({'alg': 'none'})}.{encode({'exp': exp})}.signature"
+
+class FakeResponse:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self._data = data
+        self.text = json.dumps(data) if data else ""
+
+    def json(self):
+        return self._data
+
+class FakeAuthHTTP:
+    """Refresh endpoint that issues a token valid for an hour."""
+
+    def __init__(self, delay=0.0, status_code=200):
+        self.calls = 0
+        self.delay = delay
+        self.status_code = status_code
+        self._lock = threading.Lock()
+
+    def post(self, url, **kwargs):
+        with self._lock:
+            self.calls += 1
+            number = self.calls
+        time.sleep(self.delay)
+        token = make_jwt(int(time.time()) + 3600) + str(number)
+        return FakeResponse(self.status_code, {"access_token": token})
+
+@pytest.fixture
+def store(tmp_path):
+    return TokenStore(str(tmp_path / "tokens.sqlite"))
+
+def make_manager(store, http, access_token, refresh_margin=60):
+    return TokenManager(
+        access_token=access_token,
+        refresh_token="refresh",
+        email="test@example.com",
+        store=store,
+        http=http,
+        refresh_margin=refresh_margin
+    )
+
+class TestTokenManager:
+    def test_decode_jwt_expiry(self):
+        """Test exp is read from a JWT and non-JWT tokens are tolerated."""
+        assert decode_jwt_expiry(make_jwt(1700000000)) == 1700000000
+        assert decode_jwt_expiry("test_access_token") is None
+
+    def test_refreshes_before_expiry(self, store):
+        """Test a token inside the refresh margin is renewed before use."""
+        http = FakeAuthHTTP()
+        manager = make_manager(store, http, make_jwt(int(time.time()) + 30))
+        token = manager.get_token()
+        manager.close()
+
+        assert http.calls == 1
+        assert manager.expires_at > time.time() + 3000
+        assert store.load("test@example.com")["access_token"] == token
+
+    def test_single_refresh_for_concurrent_callers(self, store):
+        """Test threads that find the same stale token share one refresh."""
+        http = FakeAuthHTTP(delay=0.1)
+        stale = make_jwt(int(time.time()) + 3600)
+        manager = make_manager(store, http, stale)
+        tokens = []
+
+        def worker():
+            tokens.append(manager.refresh(stale_token=stale))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        manager.close()
+
+        assert http.calls == 1
+        assert len(set(tokens)) == 1
+
+    def test_adopts_token_refreshed_by_another_process(self, store):
+        """Test a second manager on the same store reuses the refreshed token."""
+        stale = make_jwt(int(time.time()) + 30)
+        first = make_manager(store, FakeAuthHTTP(), stale)
+        fresh = first.get_token()
+        first.close()
+
+        http = FakeAuthHTTP()
+        second = make_manager(store, http, stale)
+        assert second.get_token() == fresh
+        second.close()
+        assert http.calls == 0
+
+    def test_background_timer_refreshes(self, store):
+        """Test the timer renews the token without any caller asking for it."""
+        http = FakeAuthHTTP()
+        manager = make_manager(store, http, make_jwt(int(time.time()) + 2), refresh_margin=1.5)
+        manager.start()
+        time.sleep(1.0)
+        manager.close()
+
+        assert http.calls == 1
+
+    def test_failed_refresh_raises(self, store):
+        """Test a rejected refresh surfaces as AuthenticationError."""
+        manager = make_manager(store, FakeAuthHTTP(status_code=401), "test_access_token")
+        with pytest.raises(AuthenticationError):
+            manager.refresh()
+        manager.close()
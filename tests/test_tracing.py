@@ -0,0 +1,110 @@
+# tests/test_tracing.py
+
+import json
+import pytest
+import utils.tracing as tracing_module
+from utils.tracing import Tracer, get_tracer, traced
+from modules.base import ShipHeroAPI
+from modules.warehouse import Warehouse
+from tests.test_retry import FakeHTTP, FakeResponse
+
+class TestTracer:
+    @pytest.fixture
+    def tracer(self):
+        tracer = Tracer()
+        tracer.start()
+        return tracer
+
+    def test_disabled_records_nothing(self):
+        """Test spans are no-ops until the tracer is started."""
+        tracer = Tracer()
+        with tracer.span("fetch") as span:
+            span.set(request_id="abc")
+        assert tracer.events() == []
+
+    def test_nested_spans_link_to_parent(self, tracer):
+        """Test a span opened inside another one records it as parent."""
+        with tracer.span("load", cat="main"):
+            with tracer.span("flatten", cat="flatten") as child:
+                child.set(rows=3)
+        flatten, load = tracer.events()
+        assert flatten["args"]["parent_id"] == load["args"]["span_id"]
+        assert flatten["args"]["rows"] == 3
+        assert "parent_id" not in load["args"]
+        assert load["ts"] <= flatten["ts"]
+        assert load["dur"] >= flatten["dur"]
+
+    def test_error_is_recorded(self, tracer):
+        """Test a span closed by an exception records the error type."""
+        with pytest.raises(KeyError):
+            with tracer.span("flatten"):
+                raise KeyError("sku")
+        assert tracer.events()[0]["args"]["error"] == "KeyError"
+
+    def test_event_limit(self):
+        """Test spans beyond max_events are dropped and counted."""
+        tracer = Tracer(max_events=2)
+        tracer.start()
+        for _ in range(5):
+            with tracer.span("page"):
+                pass
+        assert len(tracer.events()) == 2
+        assert tracer.dropped == 3
+
+    def test_chrome_trace_file(self, tracer, tmp_path):
+        """Test the dump is Chrome trace JSON with complete events and thread names."""
+        with tracer.span("export", cat="export"):
+            pass
+        path = tracer.write(str(tmp_path / "trace.json"))
+        with open(path) as file:
+            trace = json.load(file)
+        phases = {event["ph"] for event in trace["traceEvents"]}
+        assert phases == {"M", "X"}
+        [event] = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+        assert event["name"] == "export" and event["cat"] == "export"
+
+class TestTracedRequests:
+    @pytest.fixture
+    def tracer(self, monkeypatch):
+        tracer = Tracer()
+        tracer.start()
+        monkeypatch.setattr(tracing_module, "_tracer", tracer)
+        return tracer
+
+    def test_request_span_carries_request_id(self, tracer):
+        """Test the GraphQL span records the ShipHero request_id under its attempt."""
+        api = ShipHeroAPI()
+        api.http = FakeHTTP([
+            FakeResponse(200, {"data": {"inventory": {"request_id": "6707f5c1", "complexity": 1}}})
+        ])
+        api._make_request("query inventory { inventory { request_id complexity } }")
+
+        events = {event["name"]: event for event in tracer.events()}
+        request = events["graphql inventory"]
+        assert request["args"]["request_id"] == "6707f5c1"
+        assert events["attempt"]["args"]["parent_id"] == request["args"]["span_id"]
+
+    def test_traced_decorator_uses_shared_tracer(self, tracer):
+        """Test @traced functions become spans named after the function."""
+        @traced(cat="flatten")
+        def flatten(node):
+            return dict(node)
+
+        assert flatten({"sku": "A"}) == {"sku": "A"}
+        [event] = get_tracer().events()
+        assert event["cat"] == "flatten"
+        assert event["name"].endswith("flatten")
+
+    def test_flatten_span_per_page(self, tracer):
+        """Test a page is flattened under one span, not one span per node."""
+        module = Warehouse()
+        nodes = [{"id": f"WP{i}", "on_hand": i, "warehouse": {"id": "W1"}, "product": {"sku": f"S{i}"}} for i in range(3)]
+        module._make_request = lambda query, variables: {"data": {"warehouse_products": {"data": {
+            "pageInfo": {"hasNextPage": False, "endCursor": None},
+            "edges": [{"node": node} for node in nodes]
+        }}}}
+        assert len(module.get_warehouse_products("W1")) == 3
+
+        [span] = [event for event in tracer.events() if event["cat"] == "flatten"]
+        assert span["args"]["nodes"] == 3
+
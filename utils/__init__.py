@@ -3,28 +3,96 @@ from .logger import setup_logger
 from .helpers import (
     validate_date_format,
     generate_cache_key,
+    get_operation_name,
+    is_mutation,
     prepare_mysql_upsert,
+    upsert_dataframe,
+    has_unique_key,
+    ensure_unique_key,
+    migrate_unique_key,
+    content_hash,
     clean_dataframe
 )
+from .http import HTTPClient, get_http_client
+from .token_manager import TokenManager, TokenStore, get_token_manager, decode_jwt_expiry
+from .cassette import Cassette, CassetteAdapter, use_cassette
+from .json_stream import JSONStreamReader
+from .pagination import Paginator, get_page_info
+from .checkpoint import CheckpointStore
+from .sync_state import SyncStateStore
+from .codec import JSONCodec, OrjsonCodec, get_json_codec
+from .cache import ResponseCache, get_response_cache
+from .singleflight import SingleFlight, get_single_flight
+from .graphql import (
+    build_aliased_query,
+    split_aliased_response,
+    resolve_field_paths,
+    build_selection
+)
+from .metrics import MetricsRegistry, get_metrics
+from .tracing import Tracer, get_tracer, traced
+from .rate_limiter import CreditBucket, SQLiteCreditBucket, get_rate_limiter
 from .exceptions import (
     ShipHeroError,
     AuthenticationError,
     RateLimitError,
     APIError,
     ValidationError,
-    ConfigurationError
+    ConfigurationError,
+    CassetteError
 )
 
 __all__ = [
     'setup_logger',
     'validate_date_format',
     'generate_cache_key',
+    'get_operation_name',
+    'is_mutation',
     'prepare_mysql_upsert',
+    'upsert_dataframe',
+    'has_unique_key',
+    'ensure_unique_key',
+    'migrate_unique_key',
+    'content_hash',
     'clean_dataframe',
+    'HTTPClient',
+    'get_http_client',
+    'TokenManager',
+    'TokenStore',
+    'get_token_manager',
+    'decode_jwt_expiry',
+    'Cassette',
+    'CassetteAdapter',
+    'use_cassette',
+    'JSONStreamReader',
+    'Paginator',
+    'get_page_info',
+    'CheckpointStore',
+    'SyncStateStore',
+    'JSONCodec',
+    'OrjsonCodec',
+    'get_json_codec',
+    'ResponseCache',
+    'get_response_cache',
+    'SingleFlight',
+    'get_single_flight',
+    'build_aliased_query',
+    'split_aliased_response',
+    'resolve_field_paths',
+    'build_selection',
+    'MetricsRegistry',
+    'get_metrics',
+    'Tracer',
+    'get_tracer',
+    'traced',
+    'CreditBucket',
+    'SQLiteCreditBucket',
+    'get_rate_limiter',
     'ShipHeroError',
     'AuthenticationError',
     'RateLimitError',
     'APIError',
     'ValidationError',
-    'ConfigurationError'
+    'ConfigurationError',
+    'CassetteError'
 ]
\ No newline at end of file
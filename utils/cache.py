@@ -0,0 +1,255 @@
+# utils/cache.py
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from config.config import Config
+from utils.codec import get_json_codec
+from utils.logger import setup_logger
+
+
+class ResponseCache:
+    """
+    Read-through cache for GraphQL query responses.
+
+    Entries live in a size-bounded in-memory LRU and, when a directory is
+    configured, in an on-disk tier that survives between runs. Responses are
+    stored serialized, so callers always get their own copy.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: Optional[int] = None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int, optional): Max responses kept in memory
+            disk_dir (str, optional): Directory for the on-disk tier; None disables it
+            disk_max_bytes (int, optional): Size limit of the on-disk tier
+        """
+        self.logger = setup_logger(self.__class__.__name__)
+        self.max_entries = max_entries or Config.CACHE_MAX_ENTRIES
+        self.disk_dir = disk_dir if disk_dir is not None else Config.CACHE_DIR
+        self.disk_max_bytes = disk_max_bytes or Config.CACHE_DISK_MAX_BYTES
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+        self.codec = get_json_codec()
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, float, str]]" = OrderedDict()
+        self._stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "credits_saved": 0.0
+        }
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, float, str]]:
+        """Read an entry from the on-disk tier, dropping it if expired."""
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if entry["expires_at"] <= time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry["expires_at"], entry["credits"], entry["payload"]
+
+    def _write_disk(self, key: str, expires_at: float, credits: float, payload: str) -> None:
+        """Write an entry to the on-disk tier atomically."""
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump({"expires_at": expires_at, "credits": credits, "payload": payload}, file)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.logger.warning(f"Could not write cache entry to disk: {e}")
+            return
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Remove the oldest files until the tier fits its size limit."""
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        for mtime, size, path in sorted(entries):
+            if total_size <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+            self._stats["evictions"] += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a response.
+
+        Args:
+            key (str): Cache key from generate_cache_key
+
+        Returns:
+            Optional[Dict[str, Any]]: Cached response, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._memory[key]
+                entry = None
+            tier = "memory_hits"
+
+            if entry is None and self.disk_dir:
+                entry = self._read_disk(key)
+                tier = "disk_hits"
+                if entry is not None:
+                    self._store_memory(key, entry)
+
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            self._memory.move_to_end(key)
+            self._stats["hits"] += 1
+            self._stats[tier] += 1
+            self._stats["credits_saved"] += entry[1]
+            payload = entry[2]
+
+        return self.codec.loads(payload)
+
+    def _store_memory(self, key: str, entry: Tuple[float, float, str]) -> None:
+        """Insert into the LRU, evicting the least recently used entries. Caller holds the lock."""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def set(
+        self,
+        key: str,
+        response: Dict[str, Any],
+        ttl: timedelta,
+        credits: Optional[float] = None
+    ) -> None:
+        """
+        Store a response.
+
+        Args:
+            key (str): Cache key from generate_cache_key
+            response (Dict[str, Any]): Decoded API response
+            ttl (timedelta): Time to live
+            credits (float, optional): Credits the response cost, counted on every hit
+        """
+        expires_at = time.time() + ttl.total_seconds()
+        payload = self.codec.dumps(response).decode("utf-8")
+        entry = (expires_at, float(credits or 0), payload)
+
+        with self._lock:
+            self._store_memory(key, entry)
+            if self.disk_dir:
+                self._write_disk(key, *entry)
+
+    def invalidate(self, operation: str) -> int:
+        """
+        Drop every response of an operation from both tiers.
+
+        Args:
+            operation (str): Root field the responses were cached under, e.g. 'product'
+
+        Returns:
+            int: Entries dropped from memory
+        """
+        prefix = f"{operation}."
+        with self._lock:
+            keys = [key for key in self._memory if key.startswith(prefix)]
+            for key in keys:
+                del self._memory[key]
+            self._stats["invalidations"] += len(keys)
+            if self.disk_dir:
+                for name in os.listdir(self.disk_dir):
+                    if name.startswith(prefix) and name.endswith(".json"):
+                        try:
+                            os.remove(os.path.join(self.disk_dir, name))
+                        except OSError:
+                            pass
+        return len(keys)
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self.disk_dir:
+                for name in os.listdir(self.disk_dir):
+                    if name.endswith(".json"):
+                        try:
+                            os.remove(os.path.join(self.disk_dir, name))
+                        except OSError:
+                            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters and the credits saved by hits.
+
+        Returns:
+            Dict[str, Any]: Cache statistics
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._memory)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["credits_saved"] = round(stats["credits_saved"], 2)
+        return stats
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Get the process-wide response cache, creating it on first use.
+
+    Returns:
+        ResponseCache: Shared response cache
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,280 @@
+# utils/cassette.py
+
+import base64
+import gzip
+import io
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+from utils.exceptions import CassetteError, ConfigurationError
+from utils.helpers import get_operation_name
+
+# Claves que nunca se guardan en un cassette
+REDACTED_KEYS = {"access_token", "refresh_token", "id_token", "password"}
+
+# Headers de respuesta que no aportan al replay
+DROPPED_HEADERS = {"set-cookie", "content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+def _redact(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: "REDACTED" if key in REDACTED_KEYS else _redact(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_redact(item) for item in value]
+    return value
+
+
+def request_key(method: str, url: str, body: Optional[bytes]) -> str:
+    """
+    Identify a request for replay: method, URL without query string and GraphQL root field.
+
+    The query string is dropped because snapshot URLs are signed per
+    download, and variables are ignored because they carry dates taken from
+    the clock; recorded responses of the same key replay in recorded order.
+
+    Args:
+        method (str): HTTP method
+        url (str): Request URL
+        body (bytes, optional): Request body
+
+    Returns:
+        str: Match key, e.g. 'POST https://public-api.shiphero.com/graphql inventory_changes'
+    """
+    parts = urlsplit(url)
+    key = f"{method.upper()} {parts.scheme}://{parts.netloc}{parts.path}"
+    if body:
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return key
+        if isinstance(payload, dict) and isinstance(payload.get("query"), str):
+            key += f" {get_operation_name(payload['query'])}"
+    return key
+
+
+class Cassette:
+    """
+    Recorded HTTP exchanges kept in a gzip-compressed JSON file.
+
+    Request headers are never stored, so the Authorization token stays out
+    of the file, and token fields in response bodies are redacted.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the cassette, loading it if the file exists.
+
+        Args:
+            path (str): Cassette file, e.g. 'tests/cassettes/test_inventory/test_get_inventory_changes.json.gz'
+        """
+        self.path = path
+        self.interactions: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        if os.path.exists(path):
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                self.interactions = json.load(file)["interactions"]
+        self.rewind()
+
+    def rewind(self) -> None:
+        """Start replaying from the first recorded response again."""
+        with self._lock:
+            self._queues.clear()
+            for interaction in self.interactions:
+                self._queues[interaction["key"]].append(interaction)
+
+    def record(self, key: str, body: Optional[bytes], response: requests.Response, elapsed: float) -> None:
+        """
+        Add an exchange to the cassette.
+
+        Args:
+            key (str): Match key from request_key
+            body (bytes, optional): Request body; only GraphQL variables are kept
+            response (requests.Response): Response with its content already read
+            elapsed (float): Seconds the exchange took
+        """
+        variables = None
+        if body:
+            try:
+                variables = _redact(json.loads(body).get("variables"))
+            except (ValueError, AttributeError):
+                pass
+
+        content = response.content
+        try:
+            decoded = json.loads(content)
+            stored = {"json": _redact(decoded)}
+        except ValueError:
+            stored = {"base64": base64.b64encode(content).decode("ascii")}
+
+        interaction = {
+            "key": key,
+            "variables": variables,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {
+                name: value for name, value in response.headers.items()
+                if name.lower() not in DROPPED_HEADERS
+            },
+            "body": stored,
+            "elapsed": round(elapsed, 4)
+        }
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def next_response(self, key: str) -> Dict[str, Any]:
+        """
+        Take the next recorded response for a key.
+
+        Args:
+            key (str): Match key from request_key
+
+        Returns:
+            Dict[str, Any]: Recorded interaction
+
+        Raises:
+            CassetteError: If the key has no responses left
+        """
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                raise CassetteError(f"No recorded response left for {key} in {self.path}")
+            return queue.popleft()
+
+    def save(self) -> None:
+        """Write the cassette to disk."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            document = {"version": 1, "interactions": self.interactions}
+        with gzip.open(self.path, "wt", encoding="utf-8") as file:
+            json.dump(document, file, separators=(",", ":"))
+
+
+class CassetteAdapter(HTTPAdapter):
+    """
+    Transport that records real exchanges to a cassette or replays them.
+
+    Mounted on the shared requests.Session, it sits below ShipHeroAPI and
+    the snapshot downloads, so retries, token handling and JSON decoding
+    run exactly as they do against the live API.
+    """
+
+    RECORD = "record"
+    REPLAY = "replay"
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        mode: str = REPLAY,
+        latency: float = 0.0,
+        latency_scale: float = 0.0,
+        **kwargs
+    ):
+        """
+        Initialize the adapter.
+
+        Args:
+            cassette (Cassette): Cassette to record to or replay from
+            mode (str): 'record' or 'replay'
+            latency (float): Seconds added to every replayed response
+            latency_scale (float): Fraction of the recorded duration added to
+                every replayed response; 1.0 replays the original timing
+            **kwargs: Forwarded to HTTPAdapter (pool sizes) for recording
+        """
+        if mode not in (self.RECORD, self.REPLAY):
+            raise ConfigurationError(f"Unknown cassette mode: {mode}")
+        super().__init__(**kwargs)
+        self.cassette = cassette
+        self.mode = mode
+        self.latency = latency
+        self.latency_scale = latency_scale
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, **kwargs) -> requests.Response:
+        body = request.body.encode("utf-8") if isinstance(request.body, str) else request.body
+        key = request_key(request.method, request.url, body)
+
+        if self.mode == self.RECORD:
+            started = time.monotonic()
+            response = super().send(request, stream=stream, **kwargs)
+            # Se lee completo para guardarlo; iter_content sigue funcionando sobre _content
+            response.content
+            self.cassette.record(key, body, response, time.monotonic() - started)
+            return response
+
+        interaction = self.cassette.next_response(key)
+        delay = self.latency + self.latency_scale * interaction.get("elapsed", 0.0)
+        if delay:
+            time.sleep(delay)
+        return self.build_response(request, self._raw_response(interaction))
+
+    @staticmethod
+    def _raw_response(interaction: Dict[str, Any]) -> HTTPResponse:
+        stored = interaction["body"]
+        if "json" in stored:
+            content = json.dumps(stored["json"]).encode("utf-8")
+        else:
+            content = base64.b64decode(stored["base64"])
+        return HTTPResponse(
+            body=io.BytesIO(content),
+            headers=interaction["headers"],
+            status=interaction["status"],
+            reason=interaction.get("reason"),
+            preload_content=False
+        )
+
+
+@contextmanager
+def use_cassette(
+    path: str,
+    mode: Optional[str] = None,
+    latency: float = 0.0,
+    latency_scale: float = 0.0,
+    session: Optional[requests.Session] = None
+) -> Iterator[Cassette]:
+    """
+    Route every request of a session through a cassette.
+
+    Args:
+        path (str): Cassette file
+        mode (str, optional): 'record' or 'replay'; by default 'replay' when
+            the file exists and 'record' otherwise
+        latency (float): Seconds added to every replayed response
+        latency_scale (float): Fraction of the recorded duration added on replay
+        session (requests.Session, optional): Session to patch, the shared
+            HTTP client's by default
+
+    Yields:
+        Cassette: The cassette in use; it is saved on exit when recording
+    """
+    if session is None:
+        from utils.http import get_http_client
+        session = get_http_client().session
+
+    cassette = Cassette(path)
+    if mode is None:
+        mode = CassetteAdapter.REPLAY if cassette.interactions else CassetteAdapter.RECORD
+    adapter = CassetteAdapter(cassette, mode, latency=latency, latency_scale=latency_scale)
+
+    previous: List[Tuple[str, Any]] = [(prefix, session.adapters[prefix]) for prefix in ("https://", "http://")]
+    for prefix, _ in previous:
+        session.mount(prefix, adapter)
+    try:
+        yield cassette
+        if mode == CassetteAdapter.RECORD:
+            cassette.save()
+    finally:
+        for prefix, original in previous:
+            session.mount(prefix, original)
+        adapter.close()
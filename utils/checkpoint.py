@@ -0,0 +1,176 @@
+# utils/checkpoint.py
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, Table, Text, insert, select, update
+from sqlalchemy.engine import Connection, Engine
+
+from utils.database import Base
+
+RUNNING = "running"
+DONE = "done"
+
+# Una fila por ventana de fechas de cada sincronización; se actualiza en la
+# misma transacción que inserta las filas, así cursor y datos nunca divergen
+sync_checkpoint = Table(
+    "sph_sync_checkpoint",
+    Base.metadata,
+    Column("sph_sync_checkpoint_id", BigInteger().with_variant(Integer, "sqlite"),
+           primary_key=True, autoincrement=True),
+    Column("sync_name", Text, nullable=False),
+    Column("window_from", DateTime, nullable=False),
+    Column("window_to", DateTime, nullable=False),
+    Column("cursor", Text, nullable=True),
+    Column("nodes_fetched", BigInteger, nullable=False, default=0),
+    Column("rows_committed", BigInteger, nullable=False, default=0),
+    Column("status", Text, nullable=False, default=RUNNING),
+    Column("created_at", DateTime, default=datetime.now),
+    Column("updated_at", DateTime, default=datetime.now, onupdate=datetime.now)
+)
+
+
+class CheckpointStore:
+    """
+    Durable progress of paginated syncs, kept in the sph_sync_checkpoint table.
+
+    Each date window of a sync has a row with the cursor after the last
+    committed page, the nodes fetched and the rows committed so far. Saving
+    it on the connection that inserted the rows makes both part of one
+    transaction, so an interrupted sync resumes exactly where its data ends.
+    """
+
+    def __init__(self, engine: Engine):
+        """
+        Initialize the store, creating the table if needed.
+
+        Args:
+            engine (Engine): Engine of the database that receives the synced rows
+        """
+        self.engine = engine
+        sync_checkpoint.create(engine, checkfirst=True)
+
+    def pending(self, sync_name: str) -> List[Dict[str, Any]]:
+        """
+        Get the windows of a sync that did not finish.
+
+        Args:
+            sync_name (str): Sync identifier, e.g. the target table 'sph_transacciones'
+
+        Returns:
+            List[Dict[str, Any]]: Checkpoint rows, oldest window first
+        """
+        query = (
+            select(sync_checkpoint)
+            .where(sync_checkpoint.c.sync_name == sync_name, sync_checkpoint.c.status == RUNNING)
+            .order_by(sync_checkpoint.c.window_from)
+        )
+        with self.engine.connect() as connection:
+            return [dict(row._mapping) for row in connection.execute(query)]
+
+    def start(self, sync_name: str, windows: List[Tuple[datetime, datetime]]) -> List[Dict[str, Any]]:
+        """
+        Register the windows of a new sync.
+
+        Args:
+            sync_name (str): Sync identifier
+            windows (List[Tuple[datetime, datetime]]): (window_from, window_to) pairs
+
+        Returns:
+            List[Dict[str, Any]]: The new checkpoint rows
+        """
+        with self.engine.begin() as connection:
+            for window_from, window_to in windows:
+                connection.execute(insert(sync_checkpoint).values(
+                    sync_name=sync_name,
+                    window_from=window_from,
+                    window_to=window_to,
+                    nodes_fetched=0,
+                    rows_committed=0,
+                    status=RUNNING
+                ))
+        return self.pending(sync_name)
+
+    def split(
+        self,
+        connection: Connection,
+        checkpoint: Dict[str, Any],
+        at: datetime,
+        remainder: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Cut a window at a date, inside the caller's transaction.
+
+        The checkpoint keeps [window_from, at] and a new pending row takes
+        [at, window_to], so a crash right after still knows the rest is due.
+        If the window was already cut and its remainder has not started, that
+        remainder is moved back to start at the date instead.
+
+        Args:
+            connection (Connection): Connection of the transaction committing the first part
+            checkpoint (Dict[str, Any]): Row to cut; updated in place
+            at (datetime): New end of the window
+            remainder (Dict[str, Any], optional): Untouched remainder of an earlier cut
+
+        Returns:
+            Dict[str, Any]: The checkpoint row of the remainder
+        """
+        if remainder is not None:
+            connection.execute(
+                update(sync_checkpoint)
+                .where(sync_checkpoint.c.sph_sync_checkpoint_id == remainder["sph_sync_checkpoint_id"])
+                .values(window_from=at)
+            )
+            remainder["window_from"] = at
+        else:
+            remainder = {
+                "sync_name": checkpoint["sync_name"],
+                "window_from": at,
+                "window_to": checkpoint["window_to"],
+                "cursor": None,
+                "nodes_fetched": 0,
+                "rows_committed": 0,
+                "status": RUNNING
+            }
+            result = connection.execute(insert(sync_checkpoint).values(**remainder))
+            remainder["sph_sync_checkpoint_id"] = result.inserted_primary_key[0]
+        connection.execute(
+            update(sync_checkpoint)
+            .where(sync_checkpoint.c.sph_sync_checkpoint_id == checkpoint["sph_sync_checkpoint_id"])
+            .values(window_to=at)
+        )
+        checkpoint["window_to"] = at
+        return remainder
+
+    def save(
+        self,
+        connection: Connection,
+        checkpoint: Dict[str, Any],
+        cursor: Optional[str],
+        nodes_fetched: int,
+        rows: int = 0,
+        done: bool = False
+    ) -> None:
+        """
+        Record the progress of a window inside the caller's transaction.
+
+        Args:
+            connection (Connection): Connection of the transaction that inserted the rows
+            checkpoint (Dict[str, Any]): Row from pending() or start(); updated in place
+            cursor (str, optional): Cursor to resume after the committed rows
+            nodes_fetched (int): Nodes fetched for the window so far
+            rows (int): Rows committed by this transaction
+            done (bool): Whether the window is complete
+        """
+        values = {
+            "cursor": cursor,
+            "nodes_fetched": nodes_fetched,
+            "rows_committed": checkpoint["rows_committed"] + rows,
+            "status": DONE if done else RUNNING
+        }
+        connection.execute(
+            update(sync_checkpoint)
+            .where(sync_checkpoint.c.sph_sync_checkpoint_id == checkpoint["sph_sync_checkpoint_id"])
+            .values(**values)
+        )
+        checkpoint.update(values)
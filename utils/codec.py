@@ -0,0 +1,92 @@
+# utils/codec.py
+
+import json
+import threading
+from typing import Any, Optional, Union
+
+from config.config import Config
+from utils.exceptions import ConfigurationError
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional
+    orjson = None
+
+
+class JSONCodec:
+    """JSON encoder/decoder backed by the standard library."""
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        """
+        Serialize an object to compact UTF-8 JSON.
+
+        Args:
+            obj (Any): Object to serialize
+
+        Returns:
+            bytes: Encoded JSON
+        """
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """
+        Deserialize JSON.
+
+        Args:
+            data (Union[bytes, str]): Encoded JSON
+
+        Returns:
+            Any: Decoded object
+
+        Raises:
+            ValueError: If data is not valid JSON
+        """
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """JSON encoder/decoder backed by orjson."""
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ConfigurationError("JSON codec 'orjson' requested but orjson is not installed")
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        # orjson.JSONDecodeError es subclase de ValueError
+        return orjson.loads(data)
+
+
+_codec: Optional[JSONCodec] = None
+_codec_lock = threading.Lock()
+
+
+def get_json_codec() -> JSONCodec:
+    """
+    Get the process-wide JSON codec, creating it on first use.
+
+    Config.JSON_CODEC picks the backend: "orjson", "json", or "auto" to use
+    orjson when it is installed and the standard library otherwise.
+
+    Returns:
+        JSONCodec: Shared codec
+    """
+    global _codec
+    with _codec_lock:
+        if _codec is None:
+            backend = Config.JSON_CODEC
+            if backend == "auto":
+                backend = "orjson" if orjson is not None else "json"
+            if backend == "orjson":
+                _codec = OrjsonCodec()
+            elif backend == "json":
+                _codec = JSONCodec()
+            else:
+                raise ConfigurationError(f"Unknown JSON codec: {backend}")
+        return _codec
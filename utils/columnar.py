@@ -0,0 +1,176 @@
+# utils/columnar.py
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import pandas as pd
+
+Record = Dict[str, Any]
+# Ruta de campos del nodo ('location.name') o función del nodo para valores compuestos
+FieldSpec = Union[str, Callable[[Dict[str, Any]], Any]]
+# Columna calculada sobre el DataFrame ya armado
+Derived = Callable[[pd.DataFrame], Any]
+
+
+def _getter(field: FieldSpec, default: Any = None) -> Callable[[Dict[str, Any]], Any]:
+    """Compile a field path into a function reading it from a node."""
+    if callable(field):
+        return field
+    keys = field.split('.')
+    last = keys[-1]
+    if len(keys) == 1:
+        return lambda node: node.get(last, default)
+    parents = keys[:-1]
+
+    def get(node: Dict[str, Any]) -> Any:
+        for key in parents:
+            node = node.get(key) or {}
+        return node.get(last, default)
+    return get
+
+
+class ColumnBatch:
+    """
+    Flattened rows held as one list per column.
+
+    Supports len(), extend(), slicing and deleting a leading slice, like the
+    list of records the Paginator buffers for record flatteners, so the
+    chunking code works the same on both.
+    """
+
+    def __init__(self, columns: Dict[str, List[Any]]):
+        """
+        Initialize the batch.
+
+        Args:
+            columns (Dict[str, List[Any]]): Values per column, all of the same length
+        """
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), []))
+
+    def __getitem__(self, index: slice) -> "ColumnBatch":
+        return ColumnBatch({name: values[index] for name, values in self.columns.items()})
+
+    def __delitem__(self, index: slice) -> None:
+        for values in self.columns.values():
+            del values[index]
+
+    def extend(self, other: "ColumnBatch") -> None:
+        """Append the rows of another batch of the same columns."""
+        for name, values in other.columns.items():
+            self.columns[name].extend(values)
+
+
+class ColumnarFlattener:
+    """
+    Flatten GraphQL nodes straight into per-column buffers.
+
+    Columns are declared once as field paths (or functions for composite
+    values), compiled into getters, and each page is appended column by
+    column: no dict is built per row. Derived columns are computed with
+    vectorized operations when the buffers become a DataFrame, once per
+    frame instead of once per row.
+
+    With explode, a node yields one row per item of that list field: paths
+    under it are read from the item and the rest from the node.
+    """
+
+    def __init__(
+        self,
+        fields: Dict[str, FieldSpec],
+        derived: Optional[Dict[str, Derived]] = None,
+        defaults: Optional[Dict[str, Any]] = None,
+        explode: Optional[str] = None,
+        order: Optional[List[str]] = None
+    ):
+        """
+        Initialize the flattener.
+
+        Args:
+            fields (Dict[str, FieldSpec]): Column -> field path or function of the node
+            derived (Dict[str, Callable], optional): Column -> function of the DataFrame
+            defaults (Dict[str, Any], optional): Column -> value when the field is missing
+            explode (str, optional): List field that yields one row per item
+            order (List[str], optional): Output column order, fields then derived by default
+        """
+        defaults = defaults or {}
+        self.fields = fields
+        self.derived = derived or {}
+        self.explode = explode
+        self.order = order or list(fields) + list(self.derived)
+        prefix = f"{explode}." if explode else None
+        self._node_getters: List[Tuple[str, Callable]] = []
+        self._item_getters: List[Tuple[str, Callable]] = []
+        for name, field in fields.items():
+            if prefix and isinstance(field, str) and field.startswith(prefix):
+                self._item_getters.append((name, _getter(field[len(prefix):], defaults.get(name))))
+            else:
+                self._node_getters.append((name, _getter(field, defaults.get(name))))
+
+    def empty(self) -> ColumnBatch:
+        """Get a batch without rows."""
+        return ColumnBatch({name: [] for name in self.fields})
+
+    def flatten(self, nodes: Iterable[Dict[str, Any]]) -> Tuple[ColumnBatch, int]:
+        """
+        Append nodes into a new batch.
+
+        Args:
+            nodes (Iterable[Dict[str, Any]]): Raw nodes of a page, consumed once
+
+        Returns:
+            Tuple[ColumnBatch, int]: The batch and the number of nodes read
+        """
+        batch = self.empty()
+        node_columns = [(batch.columns[name].append, get) for name, get in self._node_getters]
+        count = 0
+        if self.explode is None:
+            for node in nodes:
+                count += 1
+                for append, get in node_columns:
+                    append(get(node))
+            return batch, count
+
+        item_columns = [(batch.columns[name].append, get) for name, get in self._item_getters]
+        for node in nodes:
+            count += 1
+            items = node.get(self.explode) or []
+            if not items:
+                continue
+            node_values = [(append, get(node)) for append, get in node_columns]
+            for item in items:
+                for append, value in node_values:
+                    append(value)
+                for append, get in item_columns:
+                    append(get(item))
+        return batch, count
+
+    def frame(self, batch: ColumnBatch, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Build a DataFrame from a batch, computing the derived columns.
+
+        Args:
+            batch (ColumnBatch): Flattened rows
+            columns (List[str], optional): DataFrame columns; missing ones are
+                filled with NaN, like pd.DataFrame(records, columns=columns)
+
+        Returns:
+            pd.DataFrame: The rows
+        """
+        df = pd.DataFrame(batch.columns)
+        for name, derive in self.derived.items():
+            df[name] = derive(df)
+        return df.reindex(columns=self.order if columns is None else columns)
+
+    def records(self, batch: ColumnBatch) -> List[Record]:
+        """
+        Get a batch as one dict per row, for consumers of record lists.
+
+        Args:
+            batch (ColumnBatch): Flattened rows
+
+        Returns:
+            List[Record]: Rows in output column order
+        """
+        return self.frame(batch).to_dict('records')
@@ -25,4 +25,8 @@ class ValidationError(ShipHeroError):
 
 class ConfigurationError(ShipHeroError):
     """Raised when there are configuration issues."""
-    pass
\ No newline at end of file
+    pass
+
+class CassetteError(ShipHeroError):
+    """Raised when a replayed request has no recorded response."""
+    pass
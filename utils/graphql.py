@@ -0,0 +1,146 @@
+# utils/graphql.py
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.exceptions import ValidationError
+
+
+def build_aliased_query(
+    field: str,
+    selection: str,
+    arguments: Dict[str, str],
+    items: List[Dict[str, Any]],
+    alias_prefix: str = "k"
+) -> Tuple[str, Dict[str, Any], List[str]]:
+    """
+    Fold several single-entity queries into one aliased GraphQL document.
+
+    For field='product', arguments={'sku': 'String!'} and two items this builds:
+        query($k0_sku: String!, $k1_sku: String!) {
+            k0: product(sku: $k0_sku) { ... }
+            k1: product(sku: $k1_sku) { ... }
+        }
+
+    Args:
+        field (str): Root field queried once per item
+        selection (str): Selection set of the field, without the outer braces
+        arguments (Dict[str, str]): Argument name -> GraphQL type
+        items (List[Dict[str, Any]]): Argument values for each item
+        alias_prefix (str): Prefix of the generated aliases
+
+    Returns:
+        Tuple[str, Dict[str, Any], List[str]]: (query, variables, aliases in item order)
+    """
+    definitions = []
+    fields = []
+    variables = {}
+    aliases = []
+
+    for index, item in enumerate(items):
+        alias = f"{alias_prefix}{index}"
+        aliases.append(alias)
+        call_args = []
+        for name, graphql_type in arguments.items():
+            variable = f"{alias}_{name}"
+            definitions.append(f"${variable}: {graphql_type}")
+            call_args.append(f"{name}: ${variable}")
+            variables[variable] = item.get(name)
+        fields.append(f"{alias}: {field}({', '.join(call_args)}) {{\n{selection}\n}}")
+
+    query = f"query({', '.join(definitions)}) {{\n" + "\n".join(fields) + "\n}"
+    return query, variables, aliases
+
+
+def split_aliased_response(
+    response: Dict[str, Any],
+    aliases: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Split an aliased response back into one result per alias.
+
+    Args:
+        response (Dict[str, Any]): Decoded API response, possibly with errors
+        aliases (List[str]): Aliases returned by build_aliased_query
+
+    Returns:
+        Dict[str, Dict[str, Any]]: alias -> {"data": ..., "errors": [...]}
+    """
+    data = response.get("data") or {}
+    results = {alias: {"data": data.get(alias), "errors": []} for alias in aliases}
+
+    for error in response.get("errors") or []:
+        path = error.get("path") or []
+        if path and path[0] in results:
+            results[path[0]]["errors"].append(error)
+        else:
+            # Un error sin path afecta a todo el documento
+            for result in results.values():
+                result["errors"].append(error)
+
+    return results
+
+
+def resolve_field_paths(
+    columns: Dict[str, List[str]],
+    fields: Optional[Iterable[str]] = None
+) -> List[str]:
+    """
+    Resolve output columns to the GraphQL fields they are built from.
+
+    Args:
+        columns (Dict[str, List[str]]): Output column -> dotted field paths it needs
+        fields (Iterable[str], optional): Columns wanted; None means all of them
+
+    Returns:
+        List[str]: Dotted field paths, without duplicates, in declaration order
+    """
+    wanted = list(columns) if fields is None else list(fields)
+    unknown = [column for column in wanted if column not in columns]
+    if unknown:
+        raise ValidationError(f"Unknown fields: {', '.join(unknown)}")
+
+    paths = []
+    for column in wanted:
+        for path in columns[column]:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def build_selection(paths: Iterable[str], indent: str = "") -> str:
+    """
+    Render dotted field paths as a GraphQL selection set.
+
+    ['sku', 'location.name', 'location.zone'] becomes:
+        sku
+        location {
+            name
+            zone
+        }
+
+    Args:
+        paths (Iterable[str]): Dotted field paths
+        indent (str): Indentation of the top-level fields
+
+    Returns:
+        str: Selection set, without the outer braces
+    """
+    tree: Dict[str, Any] = {}
+    for path in paths:
+        node = tree
+        for part in path.split("."):
+            node = node.setdefault(part, {})
+
+    def render(node: Dict[str, Any], depth: int) -> List[str]:
+        lines = []
+        pad = indent + "    " * depth
+        for name, children in node.items():
+            if children:
+                lines.append(f"{pad}{name} {{")
+                lines.extend(render(children, depth + 1))
+                lines.append(f"{pad}}}")
+            else:
+                lines.append(f"{pad}{name}")
+        return lines
+
+    return "\n".join(render(tree, 0))
@@ -1,10 +1,13 @@
 # utils/helpers.py
 
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
 import pandas as pd
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 import hashlib
 import json
+import re
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
 
 def validate_date_format(date_str: str) -> bool:
     """
@@ -22,23 +25,95 @@ def validate_date_format(date_str: str) -> bool:
     except ValueError:
         return False
 
+def parse_datetime(value: Any) -> datetime:
+    """
+    Parse an ISO date or datetime as a naive UTC datetime, like ShipHero's created_at.
+    
+    Args:
+        value (Any): ISO string, date or datetime
+        
+    Returns:
+        datetime: Naive datetime in UTC
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    elif not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def split_time_range(start: datetime, end: datetime, parts: int) -> List[Tuple[datetime, datetime]]:
+    """
+    Split [start, end] into consecutive windows of about the same length.
+    
+    Inner boundaries are rounded to whole seconds and shared by neighbouring
+    windows, so the windows cover the range with no gaps.
+    
+    Args:
+        start (datetime): Range start
+        end (datetime): Range end
+        parts (int): Number of windows
+        
+    Returns:
+        List[Tuple[datetime, datetime]]: (window_start, window_end) pairs in order
+    """
+    if parts <= 1 or end <= start:
+        return [(start, end)]
+    step = (end - start) / parts
+    bounds = [start]
+    for index in range(1, parts):
+        bound = (start + step * index).replace(microsecond=0)
+        if bounds[-1] < bound < end:
+            bounds.append(bound)
+    bounds.append(end)
+    return list(zip(bounds[:-1], bounds[1:]))
+
 def generate_cache_key(query: str, variables: Optional[Dict[str, Any]] = None) -> str:
     """
     Generate a cache key from a GraphQL query and variables.
     
+    The key starts with the operation name, so ResponseCache.invalidate can
+    find every response of an operation without reading them.
+    
     Args:
         query (str): GraphQL query
         variables (Dict[str, Any], optional): Query variables
         
     Returns:
-        str: Cache key
+        str: Cache key ('<operation>.<md5>')
     """
     key_parts = [query]
     if variables:
         key_parts.append(json.dumps(variables, sort_keys=True))
     
     key_string = '|'.join(key_parts)
-    return hashlib.md5(key_string.encode()).hexdigest()
+    return f"{get_operation_name(query)}.{hashlib.md5(key_string.encode()).hexdigest()}"
+
+def get_operation_name(query: str) -> str:
+    """
+    Get the first root field selected by a GraphQL document, skipping aliases.
+    
+    Args:
+        query (str): GraphQL query or mutation
+        
+    Returns:
+        str: Root field name (e.g. 'inventory_changes'), or 'unknown'
+    """
+    match = re.search(r'\{\s*(?:\w+\s*:\s*)?(\w+)', query)
+    return match.group(1) if match else "unknown"
+
+def is_mutation(query: str) -> bool:
+    """
+    Check whether a GraphQL document is a mutation.
+    
+    Args:
+        query (str): GraphQL document
+        
+    Returns:
+        bool: True for mutations
+    """
+    return query.lstrip().startswith("mutation")
 
 def prepare_mysql_upsert(
     df: pd.DataFrame,
@@ -63,7 +138,7 @@ def prepare_mysql_upsert(
     placeholders = ', '.join(['%s'] * len(columns))
     
     # Convert DataFrame to list of tuples for MySQL
-    values = [tuple(x) for x in df.to_numpy()]
+    values = _driver_values(df)
     
     # Build the INSERT statement
     insert_stmt = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
@@ -73,13 +148,198 @@ def prepare_mysql_upsert(
         f"{col} = VALUES({col})"
         for col in columns
         if col not in unique_columns
-    ])
+    ]) or f"{unique_columns[0]} = {unique_columns[0]}"
     
     # Combine into upsert statement
     upsert_stmt = f"{insert_stmt} ON DUPLICATE KEY UPDATE {update_stmt}"
     
     return upsert_stmt, values
 
+def _driver_values(df: pd.DataFrame) -> List[tuple]:
+    """Rows of a DataFrame as tuples of plain Python values (None for NaN/NaT)."""
+    columns = []
+    for column in df.columns:
+        values = df[column].astype(object).where(df[column].notna(), None).tolist()
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            # Timestamp de pandas -> datetime, que todos los drivers saben enviar
+            values = [value.to_pydatetime() if value is not None else None for value in values]
+        columns.append(values)
+    return list(zip(*columns))
+
+def upsert_dataframe(connection: Connection, df: pd.DataFrame, table_name: str, unique_columns: list) -> int:
+    """
+    Insert or update the rows of a DataFrame with a single executemany.
+    
+    On MySQL the statement is the one from prepare_mysql_upsert
+    (INSERT ... ON DUPLICATE KEY UPDATE). Other dialects, like the SQLite
+    databases used in the tests, get the equivalent INSERT ... ON CONFLICT.
+    
+    Args:
+        connection (Connection): Connection of the caller's transaction
+        df (pd.DataFrame): Rows to write; its columns must exist in the table
+        table_name (str): Target table name
+        unique_columns (list): Columns of a unique key of the table
+        
+    Returns:
+        int: Rows sent
+    """
+    if df.empty:
+        return 0
+    if connection.dialect.name == "mysql":
+        statement, values = prepare_mysql_upsert(df, table_name, unique_columns)
+    else:
+        columns = list(df.columns)
+        updates = ", ".join(f"{col} = excluded.{col}" for col in columns if col not in unique_columns)
+        statement = (
+            f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))}) "
+            f"ON CONFLICT ({', '.join(unique_columns)}) "
+            + (f"DO UPDATE SET {updates}" if updates else "DO NOTHING")
+        )
+        values = _driver_values(df)
+    connection.exec_driver_sql(statement, values)
+    return len(values)
+
+def has_unique_key(connection: Connection, table_name: str, column: str) -> bool:
+    """
+    Check whether a table has a unique index or constraint on exactly one column.
+    
+    Args:
+        connection (Connection): Open connection to the database
+        table_name (str): Table name
+        column (str): Key column
+        
+    Returns:
+        bool: True if upserts keyed on the column can be used
+    """
+    inspector = inspect(connection)
+    unique = [ix["column_names"] for ix in inspector.get_indexes(table_name) if ix.get("unique")]
+    unique += [uc["column_names"] for uc in inspector.get_unique_constraints(table_name)]
+    return [column] in unique
+
+def ensure_unique_key(connection: Connection, df: pd.DataFrame, table_name: str, column: str) -> None:
+    """
+    Make sure a table can take upserts keyed on one column.
+    
+    A missing table is created with the columns and dtypes of df and the
+    unique index. An existing table is never altered here: adding the key
+    to it would leave its old rows without one, so it must have been
+    migrated first with migrate_unique_key.
+    
+    Args:
+        connection (Connection): Open connection to the target database
+        df (pd.DataFrame): Rows to be written (only dtypes are used)
+        table_name (str): Target table name
+        column (str): Key column
+        
+    Raises:
+        ValueError: If an existing table has no unique key on the column
+    """
+    if not inspect(connection).has_table(table_name):
+        df.head(0).to_sql(table_name, con=connection, index=False)
+        connection.exec_driver_sql(f"CREATE UNIQUE INDEX uq_{table_name}_{column} ON {table_name} ({column})")
+    elif not has_unique_key(connection, table_name, column):
+        raise ValueError(f"{table_name} has no unique key on {column}, migrate it with migrate_unique_key first")
+
+def migrate_unique_key(
+    engine: Engine,
+    table_name: str,
+    column: str,
+    columns: List[str],
+    key: Callable[[pd.DataFrame], pd.Series],
+    chunk_size: int = 10000
+) -> int:
+    """
+    Add a computed unique key to an existing table, backfilling its rows.
+    
+    Adds the column if missing, fills it for every row where it is NULL
+    (in chunks of chunk_size rows by primary key, one transaction each, so
+    an interrupted run continues where it stopped), deletes the rows whose
+    key repeats one already in the table keeping the lowest primary key,
+    and only then creates the unique index. Run it once, before switching
+    the loads of the table to upserts.
+    
+    Args:
+        engine (Engine): Target database
+        table_name (str): Table to migrate; needs a single-column primary key
+        column (str): Key column
+        columns (List[str]): Columns the key is computed from
+        key (Callable): Function of a DataFrame of those columns returning one key per row
+        chunk_size (int): Rows updated per transaction
+        
+    Returns:
+        int: Rows backfilled
+        
+    Raises:
+        ValueError: If the table has no single-column primary key
+    """
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        if has_unique_key(connection, table_name, column):
+            return 0
+        primary_key = inspector.get_pk_constraint(table_name).get("constrained_columns") or []
+        if len(primary_key) != 1:
+            raise ValueError(f"{table_name} needs a single-column primary key to backfill {column}")
+        if column not in {col["name"] for col in inspector.get_columns(table_name)}:
+            connection.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {column} BIGINT NULL")
+    pk = primary_key[0]
+    
+    backfilled, last = 0, None
+    while True:
+        with engine.begin() as connection:
+            query = f"SELECT {pk}, {', '.join(columns)} FROM {table_name} WHERE {column} IS NULL"
+            query += f" AND {pk} > :last" if last is not None else ""
+            df = pd.read_sql(text(f"{query} ORDER BY {pk} LIMIT {chunk_size}"), connection,
+                             params={"last": last})
+            if df.empty:
+                break
+            values = [(int(value), row_id) for value, row_id in zip(key(df), df[pk].tolist())]
+            connection.execute(
+                text(f"UPDATE {table_name} SET {column} = :value WHERE {pk} = :id"),
+                [{"value": value, "id": row_id} for value, row_id in values]
+            )
+            backfilled += len(df)
+            last = df[pk].iloc[-1].item()
+    
+    with engine.begin() as connection:
+        # Filas repetidas (cargas superpuestas sin upsert): queda la de menor clave primaria
+        connection.exec_driver_sql(
+            f"DELETE FROM {table_name} WHERE {pk} NOT IN ("
+            f"SELECT keep FROM (SELECT MIN({pk}) AS keep FROM {table_name} GROUP BY {column}) AS kept)"
+        )
+        connection.exec_driver_sql(f"CREATE UNIQUE INDEX uq_{table_name}_{column} ON {table_name} ({column})")
+    return backfilled
+
+def content_hash(df: pd.DataFrame, columns: List[str]) -> pd.Series:
+    """
+    Compute a deterministic 64-bit key per row from the values of some columns.
+    
+    Vectorized with pd.util.hash_pandas_object over a text form of each
+    column, so a row hashes the same whatever dtypes its page was parsed
+    with (5 and 5.0, tz-aware and naive UTC timestamps). Columns missing
+    from df hash as empty values.
+    
+    Args:
+        df (pd.DataFrame): Rows to hash
+        columns (List[str]): Columns that identify a row, in a fixed order
+        
+    Returns:
+        pd.Series: int64 keys (they fit a signed BIGINT), aligned with df
+    """
+    normalized = pd.DataFrame(index=df.index)
+    for column in columns:
+        values = df[column] if column in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if pd.api.types.is_datetime64_any_dtype(values):
+            if values.dt.tz is not None:
+                values = values.dt.tz_convert("UTC").dt.tz_localize(None)
+            as_text = values.dt.strftime("%Y-%m-%dT%H:%M:%S.%f")
+        elif pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            as_text = values.astype("Float64").astype("string")
+        else:
+            as_text = values.astype("string")
+        normalized[column] = as_text.fillna("")
+    hashes = pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+    return pd.Series(hashes.view("int64"), index=df.index)
+
 def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """
     Clean and standardize DataFrame columns.
@@ -0,0 +1,227 @@
+# utils/http.py
+
+import atexit
+import logging
+import threading
+from typing import Dict, Iterator, Optional, Any
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import brotli  # opcional: habilita Content-Encoding br en urllib3
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+from config.config import Config
+from utils.logger import setup_logger
+from utils.metrics import get_metrics
+
+
+class HTTPClient:
+    """
+    Keep-alive HTTP connection pool shared by every ShipHero module.
+
+    Wraps a single requests.Session so GraphQL pages and snapshot downloads
+    reuse TCP/TLS connections instead of paying a new handshake per request.
+    Compression is negotiated explicitly and the bytes received on the wire
+    are counted against the decoded bytes.
+    """
+
+    def __init__(
+        self,
+        pool_connections: Optional[int] = None,
+        pool_maxsize: Optional[int] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        accept_encoding: Optional[str] = None
+    ):
+        """
+        Initialize the connection pool.
+
+        Args:
+            pool_connections (int, optional): Number of host pools to keep
+            pool_maxsize (int, optional): Max connections kept per host
+            connect_timeout (float, optional): Connect timeout in seconds
+            read_timeout (float, optional): Read timeout in seconds
+            accept_encoding (str, optional): Accept-Encoding header; "auto" offers
+                every encoding that can be decoded here
+        """
+        self.logger = setup_logger(self.__class__.__name__)
+        self.timeout = (
+            connect_timeout or Config.HTTP_CONNECT_TIMEOUT,
+            read_timeout or Config.HTTP_READ_TIMEOUT
+        )
+
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections or Config.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=pool_maxsize or Config.HTTP_POOL_MAXSIZE
+        )
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self.accept_encoding = self._resolve_accept_encoding(accept_encoding or Config.HTTP_ACCEPT_ENCODING)
+        self.session.headers["Accept-Encoding"] = self.accept_encoding
+
+        self._lock = threading.Lock()
+        self._request_count = 0
+        self._bytes_wire = 0
+        self._bytes_decoded = 0
+        self._closed = False
+
+    @staticmethod
+    def _resolve_accept_encoding(accept_encoding: str) -> str:
+        """Expand "auto" to the encodings urllib3 can decode in this environment."""
+        if accept_encoding != "auto":
+            return accept_encoding
+        encodings = ["gzip", "deflate"]
+        if brotli is not None:
+            encodings.append("br")
+        return ", ".join(encodings)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request through the shared session.
+
+        Args:
+            method (str): HTTP method
+            url (str): Target URL
+            **kwargs: Extra arguments forwarded to requests.Session.request
+
+        Returns:
+            requests.Response: Response object
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        response = self.session.request(method, url, **kwargs)
+
+        with self._lock:
+            self._request_count += 1
+
+        if not kwargs.get("stream"):
+            # El cuerpo ya se leyó y descomprimió completo
+            self._record_transfer(response, len(response.content))
+
+        return response
+
+    def iter_content(self, response: requests.Response, chunk_size: int) -> Iterator[bytes]:
+        """
+        Iterate a streamed response, decompressing on the fly and counting its bytes.
+
+        Args:
+            response (requests.Response): Response requested with stream=True
+            chunk_size (int): Bytes read from the socket per iteration
+
+        Yields:
+            bytes: Decoded chunks
+        """
+        decoded = 0
+        try:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                decoded += len(chunk)
+                yield chunk
+        finally:
+            self._record_transfer(response, decoded)
+
+    def _record_transfer(self, response: requests.Response, decoded: int) -> None:
+        """Add the bytes of one response, as received and as decoded, to the totals."""
+        try:
+            wire = response.raw.tell()
+        except (AttributeError, OSError):
+            wire = decoded
+
+        with self._lock:
+            self._bytes_wire += wire
+            self._bytes_decoded += decoded
+
+        url = urlsplit(response.url)
+        metrics = get_metrics()
+        metrics.inc("shiphero_http_wire_bytes_total", wire, host=url.hostname or "")
+        metrics.inc("shiphero_http_decoded_bytes_total", decoded, host=url.hostname or "")
+
+        if self.logger.isEnabledFor(logging.DEBUG):
+            # Sin query string: las URLs firmadas de los snapshots llevan credenciales
+            self.logger.debug(
+                f"{response.request.method if response.request else 'GET'} "
+                f"{url.scheme}://{url.netloc}{url.path}: {wire} bytes on the wire, "
+                f"{decoded} decoded ({response.headers.get('Content-Encoding', 'identity')})"
+            )
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request through the shared session."""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """Send a POST request through the shared session."""
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report how often pooled connections were reused and how much compression saved.
+
+        Returns:
+            Dict[str, Any]: Requests sent, connections opened, reuse ratio and
+                bytes on the wire versus decoded bytes
+        """
+        connections_opened = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                connections_opened += pool.num_connections
+
+        with self._lock:
+            request_count = self._request_count
+            bytes_wire = self._bytes_wire
+            bytes_decoded = self._bytes_decoded
+
+        reused = max(request_count - connections_opened, 0)
+        return {
+            "requests": request_count,
+            "connections_opened": connections_opened,
+            "connections_reused": reused,
+            "reuse_ratio": round(reused / request_count, 4) if request_count else 0.0,
+            "bytes_wire": bytes_wire,
+            "bytes_decoded": bytes_decoded,
+            "bytes_saved": max(bytes_decoded - bytes_wire, 0),
+            "compression_ratio": round(bytes_decoded / bytes_wire, 2) if bytes_wire else 0.0
+        }
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        stats = self.stats()
+        self.session.close()
+        self.logger.info(
+            f"HTTP pool closed: {stats['requests']} requests, "
+            f"{stats['connections_opened']} connections opened, "
+            f"reuse ratio {stats['reuse_ratio']:.2%}, "
+            f"{stats['bytes_wire']} bytes on the wire for {stats['bytes_decoded']} decoded "
+            f"(compression ratio {stats['compression_ratio']:.2f})"
+        )
+
+
+_client: Optional[HTTPClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HTTPClient:
+    """
+    Get the process-wide HTTP client, creating it on first use.
+
+    Returns:
+        HTTPClient: Shared HTTP client
+    """
+    global _client
+    with _client_lock:
+        if _client is None or _client._closed:
+            _client = HTTPClient()
+            atexit.register(_client.close)
+        return _client
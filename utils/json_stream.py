@@ -0,0 +1,184 @@
+# utils/json_stream.py
+
+import codecs
+import json
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union
+
+
+class JSONStreamReader:
+    """
+    Incremental JSON reader that yields the members of one container as they arrive.
+
+    The document is read chunk by chunk. The container at `path` (an object
+    or an array) is never built: each of its members is decoded, yielded and
+    released, so peak memory depends on the size of one member and not on the
+    size of the payload. Every other value is decoded normally and kept in
+    `document`, a copy of the payload with the streamed container left empty.
+    While the container streams, `header` holds the top-level keys decoded
+    before it.
+
+    Example:
+        reader = JSONStreamReader(response.iter_content(65536))
+        for sku, product in reader.items(["products"]):
+            ...
+        reader.document["snapshot_id"]
+    """
+
+    # Consumed text is dropped from the buffer once it grows past this size
+    _COMPACT_THRESHOLD = 1 << 16
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]]):
+        """
+        Initialize the reader.
+
+        Args:
+            chunks (Iterable[Union[bytes, str]]): Payload pieces, e.g. Response.iter_content()
+        """
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self.document: Optional[Any] = None
+        self.header: Dict[str, Any] = {}
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer. Returns False at the end of the payload."""
+        while not self._eof:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                self._eof = True
+                self._buffer += self._utf8.decode(b"", final=True)
+                return False
+            text = chunk if isinstance(chunk, str) else self._utf8.decode(chunk)
+            if text:
+                if self._pos > self._COMPACT_THRESHOLD:
+                    self._buffer = self._buffer[self._pos:]
+                    self._pos = 0
+                self._buffer += text
+                return True
+        return False
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character without consuming it."""
+        while True:
+            buffer = self._buffer
+            length = len(buffer)
+            while self._pos < length and buffer[self._pos] in " \t\n\r":
+                self._pos += 1
+            if self._pos < length:
+                return buffer[self._pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON payload")
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self._pos} of the JSON payload")
+        self._pos += 1
+
+    def _decode(self) -> Any:
+        """Decode the complete value at the current position, reading more chunks as needed."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # Un número al final del buffer puede seguir en el próximo chunk
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _members(self) -> Iterator[Tuple[Union[str, int], Any]]:
+        """Yield (key, value) of the object or (index, value) of the array at the current position."""
+        opening = self._peek()
+        closing = "}" if opening == "{" else "]"
+        self._pos += 1
+        if self._peek() == closing:
+            self._pos += 1
+            return
+
+        index = 0
+        while True:
+            if opening == "{":
+                key = self._decode()
+                self._expect(":")
+            else:
+                key = index
+            yield key, self._decode()
+            index += 1
+
+            separator = self._peek()
+            self._pos += 1
+            if separator == closing:
+                return
+            if separator != ",":
+                raise ValueError(f"Expected ',' or '{closing}' at offset {self._pos - 1} of the JSON payload")
+
+    def _walk(self, path: Sequence[str], depth: int) -> Iterator[Tuple[Union[str, int], Any]]:
+        """Descend along path, decoding siblings into the skeleton. Returns the skeleton of this value."""
+        char = self._peek()
+
+        if depth == len(path):
+            if char not in "{[":
+                return self._decode()
+            yield from self._members()
+            return {} if char == "{" else []
+
+        if char != "{":
+            # El camino no existe (p. ej. data: null); se conserva el valor
+            return self._decode()
+
+        self._pos += 1
+        node: Dict[str, Any] = {}
+        if depth == 0:
+            # Se completa a medida que se decodifica: visible mientras se recorre el contenedor
+            self.header = node
+        if self._peek() == "}":
+            self._pos += 1
+            return node
+
+        while True:
+            key = self._decode()
+            self._expect(":")
+            if key == path[depth]:
+                node[key] = yield from self._walk(path, depth + 1)
+            else:
+                node[key] = self._decode()
+
+            separator = self._peek()
+            self._pos += 1
+            if separator == "}":
+                return node
+            if separator != ",":
+                raise ValueError(f"Expected ',' or '}}' at offset {self._pos - 1} of the JSON payload")
+
+    def items(self, path: Sequence[str]) -> Iterator[Tuple[Union[str, int], Any]]:
+        """
+        Yield the members of the container at path.
+
+        Consume the iterator to the end: `document` is complete only then.
+
+        Args:
+            path (Sequence[str]): Object keys leading to the container
+
+        Yields:
+            Tuple[Union[str, int], Any]: (key, value) for objects, (index, value) for arrays
+
+        Raises:
+            ValueError: If the payload is not valid JSON
+        """
+        self.document = yield from self._walk(path, 0)
+
+        while True:
+            buffer = self._buffer
+            if buffer[self._pos:].strip():
+                raise ValueError(f"Extra data at offset {self._pos} of the JSON payload")
+            self._pos = len(buffer)
+            if not self._fill():
+                return
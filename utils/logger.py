@@ -16,7 +16,7 @@ def setup_logger(name: str) -> logging.Logger:
         logging.Logger: Configured logger instance
     """
     logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
+    logger.setLevel(Config.LOG_LEVEL)
     
     # Create logs directory if it doesn't exist
     os.makedirs(Config.LOG_DIR, exist_ok=True)
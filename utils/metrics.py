@@ -0,0 +1,266 @@
+# utils/metrics.py
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+from config.config import Config
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Histogram:
+    """Cumulative-bucket histogram of one label set."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def cumulative(self) -> Iterator[Tuple[float, int]]:
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    """
+    In-process counters, gauges and histograms with labels.
+
+    The base client, the rate limiter, the HTTP pool and the fetchers feed
+    it; at the end of a run it is exported as a Prometheus textfile and as a
+    JSON summary.
+    """
+
+    def __init__(self, buckets: Optional[Sequence[float]] = None):
+        """
+        Initialize an empty registry.
+
+        Args:
+            buckets (Sequence[float], optional): Histogram upper bounds in seconds
+        """
+        self.buckets = tuple(sorted(buckets or Config.METRICS_LATENCY_BUCKETS))
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        """Attach a HELP line to a metric."""
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """
+        Increase a counter.
+
+        Args:
+            name (str): Metric name, e.g. 'shiphero_retries_total'
+            value (float): Amount to add
+            **labels: Label values
+        """
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        """
+        Set a gauge.
+
+        Args:
+            name (str): Metric name
+            value (float): Current value
+            **labels: Label values
+        """
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = float(value)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """
+        Record a value in a histogram.
+
+        Args:
+            name (str): Metric name, e.g. 'shiphero_request_duration_seconds'
+            value (float): Observed value
+            **labels: Label values
+        """
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self.buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Observe the duration of a block in a histogram."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - start, **labels)
+
+    def reset(self) -> None:
+        """Drop every recorded value."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        JSON-friendly view of every metric.
+
+        Returns:
+            Dict[str, Any]: Metric name -> list of {labels, value} or histogram stats
+        """
+        with self._lock:
+            summary: Dict[str, Any] = {}
+            for metrics in (self._counters, self._gauges):
+                for name, series in sorted(metrics.items()):
+                    summary[name] = [
+                        {"labels": dict(key), "value": round(value, 6)}
+                        for key, value in sorted(series.items())
+                    ]
+            for name, series in sorted(self._histograms.items()):
+                summary[name] = [
+                    {
+                        "labels": dict(key),
+                        "count": histogram.count,
+                        "sum": round(histogram.sum, 6),
+                        "avg": round(histogram.sum / histogram.count, 6) if histogram.count else 0.0,
+                        "max": round(histogram.max, 6),
+                        "buckets": {str(bound): total for bound, total in histogram.cumulative()}
+                    }
+                    for key, histogram in sorted(series.items())
+                ]
+            return summary
+
+    def to_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: Textfile contents
+        """
+        lines = []
+        with self._lock:
+            for kind, metrics in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(metrics.items()):
+                    if name in self._help:
+                        lines.append(f"# HELP {name} {self._help[name]}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for key, value in sorted(series.items()):
+                        lines.append(f"{name}{_format_labels(key)} {value:g}")
+
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(series.items()):
+                    for bound, total in histogram.cumulative():
+                        lines.append(f"{name}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {total}")
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum:g}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory: Optional[str] = None, prefix: str = "shiphero") -> Dict[str, str]:
+        """
+        Write the Prometheus textfile and a timestamped JSON summary.
+
+        The textfile is replaced atomically so a textfile collector never
+        reads a partial file.
+
+        Args:
+            directory (str, optional): Output directory, Config.METRICS_DIR by default
+            prefix (str): File name prefix
+
+        Returns:
+            Dict[str, str]: Paths of the 'prometheus' and 'json' files
+        """
+        directory = directory or Config.METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+
+        prom_path = os.path.join(directory, f"{prefix}.prom")
+        tmp_path = f"{prom_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(self.to_prometheus())
+        os.replace(tmp_path, prom_path)
+
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        json_path = os.path.join(directory, f"{prefix}_{timestamp}.json")
+        with open(json_path, "w", encoding="utf-8") as file:
+            json.dump({"generated_at": time.time(), "metrics": self.summary()}, file, indent=2)
+
+        return {"prometheus": prom_path, "json": json_path}
+
+
+# Métricas que alimenta el cliente
+METRIC_HELP = {
+    "shiphero_request_duration_seconds": "GraphQL request latency per attempt, by operation and status",
+    "shiphero_credits_used_total": "Credits (complexity) charged by the API, by operation",
+    "shiphero_retries_total": "Retried attempts, by operation and error class",
+    "shiphero_retry_sleep_seconds_total": "Time spent sleeping before retries, by operation and error class",
+    "shiphero_throttle_waits_total": "Requests that waited for the local credit bucket to refill",
+    "shiphero_throttle_sleep_seconds_total": "Time spent waiting for the local credit bucket, by operation",
+    "shiphero_pages_total": "Result pages fetched, by operation",
+    "shiphero_rows_total": "Rows produced by the fetchers, by operation",
+    "shiphero_page_size": "Nodes requested per page (`first`) by the last page of each operation",
+    "shiphero_http_wire_bytes_total": "Response bytes received on the wire, by host",
+    "shiphero_http_decoded_bytes_total": "Response bytes after decompression, by host",
+    "shiphero_run_duration_seconds": "Duration of the last main.py run",
+    "shiphero_run_timestamp_seconds": "End time of the last main.py run"
+}
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """
+    Get the process-wide metrics registry, creating it on first use.
+
+    Returns:
+        MetricsRegistry: Shared registry
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry()
+            for name, help_text in METRIC_HELP.items():
+                _registry.describe(name, help_text)
+        return _registry
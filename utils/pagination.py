@@ -0,0 +1,514 @@
+# utils/pagination.py
+
+import queue
+import re
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from config.config import Config
+from utils.columnar import ColumnBatch, ColumnarFlattener
+from utils.exceptions import APIError, ValidationError
+
+Record = Dict[str, Any]
+Flatten = Union[Callable[[Dict[str, Any]], Union[Record, List[Record]]], ColumnarFlattener]
+# Filas de una página: registros, o columnas si el flatten es un ColumnarFlattener
+Batch = Union[List[Record], ColumnBatch]
+
+# Marca de fin en la cola de páginas leídas por adelantado
+_END = object()
+
+# Errores que indican una página demasiado cara o lenta: el rechazo de ShipHero
+# por superar la complejidad máxima ("Query complexity ... exceeds ...") y el
+# timeout de lectura de requests ("Read timed out"), no cualquier mención
+_PAGE_TOO_LARGE = re.compile(r"query complexity\b[^\"]*?\bexceeds\b|read timed out", re.IGNORECASE)
+
+
+def get_page_info(connection: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+    """
+    Read the pagination state of a connection.
+
+    ShipHero uses pageInfo/hasNextPage/endCursor on most connections and
+    page_info/has_next_page/end_cursor on `inventory`.
+
+    Args:
+        connection (Dict[str, Any]): Connection object with edges
+
+    Returns:
+        Tuple[bool, Optional[str]]: (has_next_page, end_cursor); (False, None)
+            if the connection carries no page info
+    """
+    if 'pageInfo' in connection:
+        page_info = connection['pageInfo']
+        return page_info['hasNextPage'], page_info['endCursor']
+    if 'page_info' in connection:
+        page_info = connection['page_info']
+        return page_info['has_next_page'], page_info['end_cursor']
+    return False, None
+
+
+def is_page_too_large(error: APIError) -> bool:
+    """
+    Tell whether a failed page may succeed with a smaller `first`.
+
+    Args:
+        error (APIError): Error raised for the page
+
+    Returns:
+        bool: True for complexity-limit rejections, read timeouts and gateway timeouts
+    """
+    if error.status_code in (413, 504):
+        return True
+    return bool(_PAGE_TOO_LARGE.search(str(error)))
+
+
+class PageSizer:
+    """
+    Choose `first` for each page from the complexity the API reports.
+
+    The cost of a node is learned from every page (complexity / first) and
+    kept in a state dict shared by the paginators of the same query, so a
+    new fetch starts at the learned size. Pages grow toward the complexity
+    budget at most PAGE_SIZE_GROWTH times per page. After a complexity or
+    timeout error the page is halved and later pages stay below 3/4 of the
+    size that failed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int,
+        budget: float,
+        state: Dict[str, float],
+        logger: Any = None,
+        metrics: Any = None
+    ):
+        """
+        Initialize the sizer.
+
+        Args:
+            name (str): Label for logs and metrics, e.g. 'inventory_changes'
+            initial (int): Page size used while the node cost is unknown
+            budget (float): Credits a single page may cost
+            state (Dict[str, float]): Learned 'node_cost' and 'ceiling', shared
+                by the sizers of the same query
+            logger (logging.Logger, optional): Receives the size changes
+            metrics (MetricsRegistry, optional): Receives the shiphero_page_size gauge
+        """
+        self.name = name
+        self.budget = budget
+        self.state = state
+        self.logger = logger
+        self.metrics = metrics
+        self.size = min(initial, self._ceiling())
+        if "node_cost" in state:
+            self.size = self._fit(state["node_cost"])
+
+    def _ceiling(self) -> int:
+        return int(self.state.get("ceiling", Config.PAGE_MAX_SIZE))
+
+    def _fit(self, node_cost: float) -> int:
+        size = int(self.budget // max(node_cost, 1e-9))
+        if size >= 10:
+            # Múltiplos de 10: el rate limiter ve pocas cost keys distintas
+            size -= size % 10
+        return max(Config.PAGE_MIN_SIZE, min(self._ceiling(), size))
+
+    def _resize(self, size: int, reason: str) -> None:
+        if size != self.size and self.logger:
+            self.logger.info(f"{self.name} page size {self.size} -> {size} ({reason})")
+        self.size = size
+        if self.metrics:
+            self.metrics.set("shiphero_page_size", size, operation=self.name)
+
+    def observe(self, first: int, complexity: Optional[float]) -> None:
+        """
+        Learn from a successful page and size the next one.
+
+        Args:
+            first (int): Nodes requested for the page
+            complexity (float, optional): Credits the API charged for it
+        """
+        if not complexity or first <= 0:
+            return
+        node_cost = complexity / first
+        self.state["node_cost"] = node_cost
+        size = min(self._fit(node_cost), max(first, self.size) * Config.PAGE_SIZE_GROWTH)
+        self._resize(size, f"complexity {complexity:.0f} for first={first}, budget {self.budget:.0f}")
+
+    def shrink(self, first: int, error: APIError) -> bool:
+        """
+        Halve the page size after a page failed for being too large.
+
+        Args:
+            first (int): Nodes requested for the failed page
+            error (APIError): Error raised for it
+
+        Returns:
+            bool: True if the page should be retried with the new size
+        """
+        if first <= Config.PAGE_MIN_SIZE or not is_page_too_large(error):
+            return False
+        size = max(Config.PAGE_MIN_SIZE, first // 2)
+        # Ni esta ni las próximas consultas vuelven a acercarse al tamaño que falló
+        self.state["ceiling"] = max(size, min(self._ceiling(), first * 3 // 4))
+        self._resize(size, f"retrying after: {str(error).splitlines()[0][:120]}")
+        return True
+
+
+class Paginator:
+    """
+    Walk a cursor-based connection lazily.
+
+    Records are produced page by page, so a caller that consumes them as
+    they come (or in DataFrame chunks) holds one page, or one chunk, in
+    memory instead of the whole result. With stream=True the edges of each
+    page are decoded off the socket as well.
+
+    When adaptive, page_size is only the first guess: a PageSizer resizes
+    every page from the reported complexity and retries a page that failed
+    for being too expensive with half the nodes.
+
+    With prefetch > 0 a background thread requests the next cursor as soon
+    as a page arrives and keeps up to `prefetch` raw pages queued, so the
+    network wait overlaps flattening and whatever the consumer does with
+    each page. Memory stays bounded by prefetch + 2 pages.
+
+    flatten is either a function of one node or a ColumnarFlattener, which
+    appends whole pages into column buffers; chunks(), page_chunks() and
+    to_dataframe() then build DataFrames without a dict per row.
+    """
+
+    def __init__(
+        self,
+        api: Any,
+        query: str,
+        variables: Dict[str, Any],
+        connection_path: List[str],
+        flatten: Flatten,
+        max_records: int,
+        page_size: int,
+        stream: bool = False,
+        adaptive: Optional[bool] = None,
+        size_key: Optional[str] = None,
+        prefetch: Optional[int] = None
+    ):
+        """
+        Initialize the paginator.
+
+        Args:
+            api (ShipHeroAPI): Client used to send the requests
+            query (str): GraphQL query taking $first and $after
+            variables (Dict[str, Any]): Query variables without first/after
+            connection_path (List[str]): Keys from the response to the connection,
+                e.g. ['data', 'products', 'data']
+            flatten (Callable | ColumnarFlattener): Turns a node into a record or a
+                list of records, or a page of nodes into column buffers
+            max_records (int): Maximum number of nodes to fetch
+            page_size (int): Nodes per page, or the first page size when adaptive
+            stream (bool): Decode each page incrementally instead of loading it whole
+            adaptive (bool, optional): Size pages from the reported complexity,
+                Config.PAGE_SIZE_ADAPTIVE by default
+            size_key (str, optional): Groups the paginators that share learned
+                page sizes; the operation name by default
+            prefetch (int, optional): Pages fetched ahead of the consumer,
+                Config.PAGINATION_PREFETCH by default; 0 fetches on demand
+        """
+        self.api = api
+        self.query = query
+        self.variables = variables
+        self.connection_path = connection_path
+        self.flatten = flatten
+        self.max_records = max_records
+        self.page_size = min(page_size, max_records)
+        self.stream = stream
+        self.operation = connection_path[1] if len(connection_path) > 1 else connection_path[0]
+        self.after_cursor: Optional[str] = None
+        self.has_next_page = True
+        self.records_fetched = 0
+        self.prefetch = Config.PAGINATION_PREFETCH if prefetch is None else prefetch
+        self.adaptive = Config.PAGE_SIZE_ADAPTIVE if adaptive is None else adaptive
+        self.sizer: Optional[PageSizer] = None
+        if self.adaptive:
+            budget = min(
+                Config.PAGE_MAX_COMPLEXITY,
+                api.rate_limiter.capacity * Config.PAGE_CREDIT_SHARE
+            )
+            size_key = size_key or self.operation
+            self.sizer = PageSizer(
+                size_key, self.page_size, budget, api._page_sizes.setdefault(size_key, {}),
+                api.logger, api.metrics
+            )
+
+    def _next_first(self, fetched: int) -> int:
+        size = self.sizer.size if self.sizer else self.page_size
+        return max(1, min(size, self.max_records - fetched))
+
+    def _connection(self, response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        connection = response
+        for key in self.connection_path:
+            connection = connection[key]
+        return connection
+
+    def _page_edges(self, variables: Dict[str, Any]) -> Tuple[Iterator[Dict[str, Any]], Dict[str, Any]]:
+        """Send one page request. Returns the edges and the response, complete once the edges are consumed."""
+        if self.stream:
+            # Los edges se decodifican a medida que llegan; document recibe el resto
+            document: Dict[str, Any] = {}
+            edges = self.api._stream_request(
+                self.query, variables, self.connection_path + ['edges'], document
+            )
+            return edges, document
+
+        response = self.api._make_request(self.query, variables)
+        connection = self._connection(response)
+        return iter(connection['edges'] if connection else []), response
+
+    def _flatten_edges(self, edges: Iterator[Dict[str, Any]]) -> Tuple[Batch, int]:
+        """Flatten the nodes of a page, in one trace span. Returns the rows and the node count."""
+        with self.api.tracer.span(f"flatten {self.operation}", cat="flatten") as span:
+            if isinstance(self.flatten, ColumnarFlattener):
+                records, nodes = self.flatten.flatten(edge['node'] for edge in edges)
+            else:
+                records, nodes = [], 0
+                for edge in edges:
+                    flattened = self.flatten(edge['node'])
+                    if isinstance(flattened, list):
+                        records.extend(flattened)
+                    else:
+                        records.append(flattened)
+                    nodes += 1
+            span.set(nodes=nodes, rows=len(records))
+        return records, nodes
+
+    def _request_page(
+        self,
+        after: Optional[str],
+        fetched: int,
+        consume: Callable[[Iterator[Dict[str, Any]]], Any]
+    ) -> Tuple[Any, Dict[str, Any], int]:
+        """
+        Request the page after a cursor, halving it while it fails for being too large.
+
+        Returns consume(edges), the response and the nodes requested.
+        """
+        while True:
+            first = self._next_first(fetched)
+            try:
+                edges, response = self._page_edges(dict(self.variables, first=first, after=after))
+                consumed = consume(edges)
+            except APIError as e:
+                # Nada de la página llegó al consumidor: se reintenta más chica
+                if self.sizer and self.sizer.shrink(first, e):
+                    continue
+                raise
+            if self.sizer and first == self.sizer.size:
+                # La última página, recortada a max_records, sobrestima el costo por nodo
+                self.sizer.observe(first, self.api._extract_complexity(response))
+            return consumed, response, first
+
+    def pages(self) -> Iterator[List[Record]]:
+        """
+        Yield the flattened records of each page.
+
+        Yields:
+            List[Record]: Records of one page
+
+        Raises:
+            ValidationError: If a response does not have the expected shape
+            APIError: If a page fails and cannot be retried smaller
+        """
+        for batch in self._batches():
+            yield self.flatten.records(batch) if isinstance(batch, ColumnBatch) else batch
+
+    def frames(self, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Yield one DataFrame per page.
+
+        Args:
+            columns (List[str], optional): DataFrame columns
+
+        Yields:
+            pd.DataFrame: Rows of one page
+        """
+        for batch in self._batches():
+            yield self._frame(batch, columns)
+
+    def _empty(self) -> Batch:
+        return self.flatten.empty() if isinstance(self.flatten, ColumnarFlattener) else []
+
+    def _frame(self, batch: Batch, columns: Optional[List[str]]) -> pd.DataFrame:
+        if isinstance(batch, ColumnBatch):
+            return self.flatten.frame(batch, columns)
+        return pd.DataFrame(batch, columns=columns)
+
+    def _batches(self) -> Iterator[Batch]:
+        """Yield the flattened rows of each page, as records or column buffers."""
+        try:
+            if self.prefetch > 0:
+                yield from self._prefetched_pages()
+                return
+
+            while self.records_fetched < self.max_records:
+                (records, nodes), response, _ = self._request_page(
+                    self.after_cursor, self.records_fetched, self._flatten_edges
+                )
+                self.records_fetched += nodes
+                self.api._record_page(self.operation, len(records))
+                if not nodes:
+                    self.has_next_page = False
+                    return
+                # El cursor avanza antes de entregar la página: tras cada yield,
+                # after_cursor retoma justo después de lo ya entregado
+                self.has_next_page, self.after_cursor = get_page_info(self._connection(response) or {})
+                yield records
+                if not self.has_next_page:
+                    return
+
+        except KeyError as e:
+            self.api.logger.error(f"Unexpected response format: {str(e)}")
+            raise ValidationError(f"Invalid response format: {str(e)}")
+
+    def _read_ahead(self, pages: "queue.Queue", stop: threading.Event) -> None:
+        """Fetch raw pages into the queue until the connection ends or the consumer stops."""
+        def put(item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        after, fetched = self.after_cursor, self.records_fetched
+        try:
+            while fetched < self.max_records and not stop.is_set():
+                edges, response, _ = self._request_page(after, fetched, list)
+                fetched += len(edges)
+                has_next_page, after = get_page_info(self._connection(response) or {})
+                if not put((edges, has_next_page, after)) or not edges or not has_next_page:
+                    break
+        except BaseException as e:
+            put(e)
+        finally:
+            put(_END)
+
+    def _prefetched_pages(self) -> Iterator[Batch]:
+        """Yield pages fetched by a read-ahead thread, flattening each one here."""
+        pages: "queue.Queue" = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        fetcher = threading.Thread(
+            target=self._read_ahead, args=(pages, stop), name="shiphero-prefetch", daemon=True
+        )
+        fetcher.start()
+        try:
+            while True:
+                with self.api.tracer.span("prefetch wait", cat="wait", operation=self.operation):
+                    item = pages.get()
+                if item is _END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+
+                edges, has_next_page, after_cursor = item
+                records, nodes = self._flatten_edges(edges)
+                self.records_fetched += nodes
+                self.api._record_page(self.operation, len(records))
+                if not nodes:
+                    self.has_next_page = False
+                    return
+                # after_cursor es el de la página entregada, no el de las leídas por adelantado
+                self.has_next_page, self.after_cursor = has_next_page, after_cursor
+                yield records
+                if not has_next_page:
+                    return
+        finally:
+            stop.set()
+            fetcher.join()
+
+    @property
+    def exhausted(self) -> bool:
+        """True once the last page was fetched or max_records was reached."""
+        return not self.has_next_page or self.records_fetched >= self.max_records
+
+    def resume(self, after_cursor: Optional[str], records_fetched: int = 0) -> "Paginator":
+        """
+        Continue a previous walk of the same query from a saved position.
+
+        Args:
+            after_cursor (str, optional): Cursor saved after the last committed page
+            records_fetched (int): Nodes fetched before it, counted against max_records
+
+        Returns:
+            Paginator: self, for chaining
+        """
+        self.after_cursor = after_cursor
+        self.records_fetched = records_fetched
+        return self
+
+    def __iter__(self) -> Iterator[Record]:
+        """Yield records one by one."""
+        for records in self.pages():
+            yield from records
+
+    def chunks(self, chunk_size: Optional[int] = None, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Yield the records as DataFrames of at most chunk_size rows.
+
+        Args:
+            chunk_size (int, optional): Rows per DataFrame, Config.PAGINATION_CHUNK_SIZE by default
+            columns (List[str], optional): DataFrame columns
+
+        Yields:
+            pd.DataFrame: Next chunk of records
+        """
+        chunk_size = chunk_size or Config.PAGINATION_CHUNK_SIZE
+        buffer = self._empty()
+        for batch in self._batches():
+            buffer.extend(batch)
+            while len(buffer) >= chunk_size:
+                yield self._frame(buffer[:chunk_size], columns)
+                del buffer[:chunk_size]
+        if len(buffer):
+            yield self._frame(buffer, columns)
+
+    def page_chunks(self, chunk_size: Optional[int] = None, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Yield DataFrames made of whole pages, of at least chunk_size rows but the last.
+
+        Unlike chunks(), a DataFrame never ends mid-page, so after each one
+        `after_cursor` and `records_fetched` describe exactly what was
+        delivered: the position to checkpoint together with the rows.
+
+        Args:
+            chunk_size (int, optional): Minimum rows per DataFrame, Config.PAGINATION_CHUNK_SIZE by default
+            columns (List[str], optional): DataFrame columns
+
+        Yields:
+            pd.DataFrame: Next chunk of records
+        """
+        chunk_size = chunk_size or Config.PAGINATION_CHUNK_SIZE
+        buffer = self._empty()
+        for batch in self._batches():
+            buffer.extend(batch)
+            if len(buffer) >= chunk_size or self.exhausted:
+                yield self._frame(buffer, columns)
+                buffer = self._empty()
+        if len(buffer):
+            yield self._frame(buffer, columns)
+
+    def to_dataframe(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Fetch every page into a single DataFrame.
+
+        Args:
+            columns (List[str], optional): DataFrame columns
+
+        Returns:
+            pd.DataFrame: All records
+        """
+        buffer = self._empty()
+        for batch in self._batches():
+            buffer.extend(batch)
+        return self._frame(buffer, columns)
@@ -0,0 +1,282 @@
+# utils/rate_limiter.py
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Any
+
+from config.config import Config
+from utils.exceptions import ConfigurationError
+from utils.logger import setup_logger
+from utils.metrics import get_metrics
+from utils.tracing import get_tracer
+
+
+class CreditBucket:
+    """
+    Local token bucket that mirrors ShipHero's credit model.
+
+    The account holds up to `capacity` credits and regains `refill_rate`
+    credits per second. Every query reserves its expected cost before it is
+    sent, sleeping only as long as needed for the bucket to refill, and the
+    reservation is reconciled with the `complexity` the API reports.
+
+    The state lives in memory and is shared by the threads of one process;
+    see SQLiteCreditBucket for a budget shared across processes.
+    """
+
+    backend = "memory"
+
+    def __init__(
+        self,
+        capacity: Optional[float] = None,
+        refill_rate: Optional[float] = None,
+        default_cost: Optional[float] = None
+    ):
+        """
+        Initialize the bucket full.
+
+        Args:
+            capacity (float, optional): Max credits the account can hold
+            refill_rate (float, optional): Credits restored per second
+            default_cost (float, optional): Cost assumed for unseen queries
+        """
+        self.logger = setup_logger(self.__class__.__name__)
+        self.capacity = capacity or Config.CREDIT_CAPACITY
+        self.refill_rate = refill_rate or Config.CREDIT_REFILL_RATE
+        self.default_cost = default_cost or Config.CREDIT_DEFAULT_COST
+
+        self._lock = threading.Lock()
+        self._memory_state = self._initial_state()
+
+    def _initial_state(self) -> Dict[str, Any]:
+        """State of a full bucket that has not seen any query yet."""
+        return {
+            "credits": float(self.capacity),
+            "updated_at": self._now(),
+            "costs": {},
+            "credits_used": 0.0,
+            "throttle_count": 0,
+            "throttle_seconds": 0.0
+        }
+
+    def _now(self) -> float:
+        """Clock used to measure refill time."""
+        return time.monotonic()
+
+    @contextmanager
+    def _state(self) -> Iterator[Dict[str, Any]]:
+        """
+        Give exclusive access to the bucket state, refilled up to now.
+
+        Yields:
+            Dict[str, Any]: Mutable state; changes are kept on exit
+        """
+        with self._lock:
+            self._refill(self._memory_state)
+            yield self._memory_state
+
+    def _refill(self, state: Dict[str, Any]) -> None:
+        """Add the credits restored since the last update."""
+        now = self._now()
+        elapsed = now - state["updated_at"]
+        if elapsed > 0:
+            state["credits"] = min(self.capacity, state["credits"] + elapsed * self.refill_rate)
+        state["updated_at"] = now
+
+    def estimate(self, cost_key: str) -> float:
+        """
+        Expected cost of a query, based on the last time it was seen.
+
+        Args:
+            cost_key (str): Query identifier (operation and page size)
+
+        Returns:
+            float: Expected credits
+        """
+        with self._state() as state:
+            return state["costs"].get(cost_key, self.default_cost)
+
+    def acquire(self, cost_key: str) -> float:
+        """
+        Reserve the expected cost of a query, waiting for refill if needed.
+
+        Args:
+            cost_key (str): Query identifier (operation and page size)
+
+        Returns:
+            float: Credits reserved; pass it back to settle()
+        """
+        waited = 0.0
+        while True:
+            with self._state() as state:
+                cost = min(state["costs"].get(cost_key, self.default_cost), self.capacity)
+                if state["credits"] >= cost:
+                    state["credits"] -= cost
+                    if waited:
+                        state["throttle_count"] += 1
+                        state["throttle_seconds"] += waited
+                        break
+                    return cost
+                wait = (cost - state["credits"]) / self.refill_rate
+
+            self.logger.debug(f"Waiting {wait:.2f}s for {cost:.0f} credits ({cost_key})")
+            with get_tracer().span("throttle wait", cat="wait", cost_key=cost_key, credits=cost):
+                time.sleep(wait)
+            waited += wait
+
+        operation = cost_key.split(":", 1)[0]
+        metrics = get_metrics()
+        metrics.inc("shiphero_throttle_waits_total", operation=operation)
+        metrics.inc("shiphero_throttle_sleep_seconds_total", waited, operation=operation)
+        return cost
+
+    def settle(self, cost_key: str, reserved: float, complexity: Optional[float]) -> None:
+        """
+        Reconcile a reservation with the complexity reported by the API.
+
+        Args:
+            cost_key (str): Query identifier used in acquire()
+            reserved (float): Credits reserved by acquire()
+            complexity (float, optional): Credits actually charged; None refunds
+        """
+        if not reserved and complexity is None:
+            return
+        with self._state() as state:
+            if complexity is None:
+                state["credits"] = min(self.capacity, state["credits"] + reserved)
+                return
+            state["costs"][cost_key] = float(complexity)
+            state["credits"] = min(self.capacity, state["credits"] + reserved - complexity)
+            state["credits_used"] += complexity
+
+    def sync(
+        self,
+        remaining_credits: Optional[float],
+        cost_key: Optional[str] = None,
+        required_credits: Optional[float] = None
+    ) -> None:
+        """
+        Align the bucket with the balance reported by an insufficient-credits error.
+
+        Args:
+            remaining_credits (float, optional): Credits the account has left
+            cost_key (str, optional): Query that was rejected
+            required_credits (float, optional): Credits that query needs
+        """
+        with self._state() as state:
+            if remaining_credits is not None:
+                state["credits"] = float(remaining_credits)
+            if cost_key and required_credits is not None:
+                state["costs"][cost_key] = float(required_credits)
+
+    def usage(self) -> Dict[str, Any]:
+        """
+        Current state of the bucket.
+
+        Returns:
+            Dict[str, Any]: Available credits and throttling counters
+        """
+        with self._state() as state:
+            return {
+                "backend": self.backend,
+                "capacity": self.capacity,
+                "available": round(state["credits"], 2),
+                "refill_rate": self.refill_rate,
+                "credits_used": round(state["credits_used"], 2),
+                "throttle_count": state["throttle_count"],
+                "throttle_seconds": round(state["throttle_seconds"], 3),
+                "known_costs": len(state["costs"])
+            }
+
+
+class SQLiteCreditBucket(CreditBucket):
+    """
+    Credit bucket whose state lives in a SQLite file.
+
+    Every process on the host that points at the same file draws from one
+    credit budget. Each operation runs in an immediate transaction, so the
+    file lock serializes updates across processes and threads.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: Optional[str] = None, **kwargs):
+        """
+        Initialize the bucket, creating the store if it does not exist.
+
+        Args:
+            path (str, optional): SQLite file shared by all processes
+            **kwargs: Bucket settings forwarded to CreditBucket
+        """
+        self.path = path or Config.RATE_LIMITER_DB
+        super().__init__(**kwargs)
+
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS credit_bucket ("
+                "id INTEGER PRIMARY KEY CHECK (id = 1), state TEXT NOT NULL)"
+            )
+            connection.execute(
+                "INSERT OR IGNORE INTO credit_bucket (id, state) VALUES (1, ?)",
+                (json.dumps(self._initial_state()),)
+            )
+
+    def _now(self) -> float:
+        # El reloj monotónico no es comparable entre procesos
+        return time.time()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection in autocommit mode so transactions are explicit."""
+        return sqlite3.connect(self.path, timeout=Config.RATE_LIMITER_LOCK_TIMEOUT, isolation_level=None)
+
+    @contextmanager
+    def _state(self) -> Iterator[Dict[str, Any]]:
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute("SELECT state FROM credit_bucket WHERE id = 1").fetchone()
+            state = json.loads(row[0])
+            self._refill(state)
+            try:
+                yield state
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("UPDATE credit_bucket SET state = ? WHERE id = 1", (json.dumps(state),))
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+    def usage(self) -> Dict[str, Any]:
+        usage = super().usage()
+        usage["path"] = self.path
+        return usage
+
+
+_limiter: Optional[CreditBucket] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> CreditBucket:
+    """
+    Get the process-wide credit bucket, creating it on first use.
+
+    The backend is chosen with Config.RATE_LIMITER_BACKEND ("memory" or "sqlite").
+
+    Returns:
+        CreditBucket: Shared rate limiter
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            backend = Config.RATE_LIMITER_BACKEND
+            if backend == "memory":
+                _limiter = CreditBucket()
+            elif backend == "sqlite":
+                _limiter = SQLiteCreditBucket()
+            else:
+                raise ConfigurationError(f"Unknown rate limiter backend: {backend}")
+        return _limiter
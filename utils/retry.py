@@ -0,0 +1,163 @@
+# utils/retry.py
+
+import random
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from config.config import Config
+from utils.exceptions import ShipHeroError
+
+
+def parse_time_remaining(time_remaining: Optional[str]) -> Optional[float]:
+    """
+    Parse the `time_remaining` field of an insufficient-credits error.
+
+    Args:
+        time_remaining (str, optional): Value such as "3 seconds" or "1 second."
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if it cannot be parsed
+    """
+    if time_remaining is None:
+        return None
+    if isinstance(time_remaining, (int, float)):
+        return max(float(time_remaining), 0.0)
+
+    match = re.search(r'(\d+(?:\.\d+)?)\s*(ms|millisecond|s|sec|second|m|min|minute)?', str(time_remaining))
+    if not match:
+        return None
+
+    value = float(match.group(1))
+    unit = (match.group(2) or "s").lower()
+    if unit in ("ms", "millisecond"):
+        return value / 1000
+    if unit in ("m", "min", "minute"):
+        return value * 60
+    return value
+
+
+def parse_retry_after(retry_after: Optional[str]) -> Optional[float]:
+    """
+    Parse an HTTP Retry-After header.
+
+    Args:
+        retry_after (str, optional): Delay in seconds or an HTTP date
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if absent or invalid
+    """
+    if not retry_after:
+        return None
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryableError(ShipHeroError):
+    """
+    Raised for a failed attempt that the retry policy may repeat.
+
+    Carries the error class used to pick the retry budget, the exception to
+    raise once that budget is exhausted and, when the server said so, the
+    exact number of seconds to wait.
+    """
+    def __init__(self, error_class: str, error: Exception, retry_after: Optional[float] = None):
+        self.error_class = error_class
+        self.error = error
+        self.retry_after = retry_after
+        super().__init__(str(error))
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter and a separate budget per error class.
+
+    A server-provided wait (Retry-After, time_remaining) is used as is
+    instead of the computed backoff.
+    """
+
+    NETWORK = "network"
+    SERVER = "server"
+    RATE_LIMIT = "rate_limit"
+    THROTTLE = "throttle"
+    AUTH = "auth"
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, int]] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        jitter: bool = True
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            budgets (Dict[str, int], optional): Retries allowed per error class,
+                merged over Config.RETRY_BUDGETS
+            base_delay (float, optional): Backoff for the first retry in seconds
+            max_delay (float, optional): Upper bound for any single wait
+            jitter (bool): Randomize backoff to spread concurrent clients
+        """
+        self.budgets = dict(Config.RETRY_BUDGETS, **(budgets or {}))
+        self.base_delay = Config.RETRY_DELAY if base_delay is None else base_delay
+        self.max_delay = Config.RETRY_MAX_DELAY if max_delay is None else max_delay
+        self.jitter = jitter
+
+    def start(self) -> Dict[str, int]:
+        """
+        Create the per-request retry state.
+
+        Returns:
+            Dict[str, int]: Retries used so far per error class
+        """
+        return {error_class: 0 for error_class in self.budgets}
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Backoff before the given retry, without a server hint.
+
+        Args:
+            attempt (int): Zero-based retry number within the error class
+
+        Returns:
+            float: Seconds to wait
+        """
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def next_delay(
+        self,
+        state: Dict[str, int],
+        error_class: str,
+        retry_after: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        Consume one retry of an error class and return how long to wait.
+
+        Args:
+            state (Dict[str, int]): State returned by start()
+            error_class (str): Error class of the failed attempt
+            retry_after (float, optional): Exact wait requested by the server
+
+        Returns:
+            Optional[float]: Seconds to wait, or None if the budget is exhausted
+        """
+        attempt = state.get(error_class, 0)
+        if attempt >= self.budgets.get(error_class, 0):
+            return None
+        state[error_class] = attempt + 1
+
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return self.backoff(attempt)
@@ -0,0 +1,109 @@
+# utils/singleflight.py
+
+import copy
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class _Call:
+    """An in-flight call that followers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapse identical concurrent calls into one.
+
+    While a call for a key is running, any other caller with the same key
+    waits for it and receives a copy of its result (or its exception)
+    instead of starting a second call.
+    """
+
+    def __init__(self):
+        """Initialize with no calls in flight."""
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._executed = 0
+        self._shared = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn, or wait for the in-flight call with the same key.
+
+        Args:
+            key (str): Identity of the call, e.g. a cache key of query + variables
+            fn (Callable[[], Any]): Function that performs the call
+
+        Returns:
+            Any: Result of the single execution
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            # Cada seguidor recibe su propia copia del resultado
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                # Ya no pueden sumarse seguidores: el conteo es definitivo
+                shared = call.waiters > 0
+            call.done.set()
+
+        # El original queda intacto para que los seguidores lo copien
+        return copy.deepcopy(call.result) if shared else call.result
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Calls executed and calls that shared another caller's result.
+
+        Returns:
+            Dict[str, int]: Single-flight counters
+        """
+        with self._lock:
+            return {
+                "executed": self._executed,
+                "shared": self._shared,
+                "in_flight": len(self._calls)
+            }
+
+
+_group: Optional[SingleFlight] = None
+_group_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """
+    Get the process-wide single-flight group, creating it on first use.
+
+    Returns:
+        SingleFlight: Shared single-flight group
+    """
+    global _group
+    with _group_lock:
+        if _group is None:
+            _group = SingleFlight()
+        return _group
@@ -0,0 +1,134 @@
+# utils/sync_state.py
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import pandas as pd
+from sqlalchemy import BigInteger, Column, DateTime, String, Table, Text, case, insert, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from utils.database import Base
+
+# Una fila por stream: lo que hay que saber al arrancar una carga incremental,
+# sin recorrer la tabla de hechos
+sync_state = Table(
+    "sph_sync_state",
+    Base.metadata,
+    Column("stream", String(64), primary_key=True),
+    Column("high_water_mark", DateTime, nullable=True),
+    Column("last_cursor", Text, nullable=True),
+    Column("rows_total", BigInteger, nullable=False, default=0),
+    Column("last_batch_rows", BigInteger, nullable=False, default=0),
+    Column("updated_at", DateTime, default=datetime.now, onupdate=datetime.now)
+)
+
+
+def latest_timestamp(values: pd.Series) -> Optional[datetime]:
+    """
+    Get the latest timestamp of a column as a naive UTC datetime.
+
+    Args:
+        values (pd.Series): Timestamps or ISO strings, tz-aware or naive
+
+    Returns:
+        Optional[datetime]: Maximum value, or None if the column is empty
+    """
+    # Los valores sin zona horaria ya vienen en UTC desde la API
+    values = pd.to_datetime(values, errors="coerce", utc=True).dt.tz_localize(None)
+    latest = values.max()
+    return None if pd.isna(latest) else latest.to_pydatetime()
+
+
+class SyncStateStore:
+    """
+    High-water mark, last cursor and row counts per sync stream.
+
+    Lookups are by primary key, so starting an incremental load costs the
+    same however large the synced table is. advance() runs on the caller's
+    connection, so the state commits together with the batch it describes.
+    """
+
+    # Streams conocidos
+    INVENTORY_CHANGES = "inventory_changes"
+    PRODUCTS = "products"
+    INVENTORY_SNAPSHOT = "inventory_snapshot"
+
+    def __init__(self, engine: Engine):
+        """
+        Initialize the store, creating the table if needed.
+
+        Args:
+            engine (Engine): Engine of the database that receives the synced rows
+        """
+        self.engine = engine
+        sync_state.create(engine, checkfirst=True)
+
+    def get(self, stream: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the state of a stream.
+
+        Args:
+            stream (str): Stream name, e.g. SyncStateStore.INVENTORY_CHANGES
+
+        Returns:
+            Optional[Dict[str, Any]]: State row, or None if the stream never loaded
+        """
+        with self.engine.connect() as connection:
+            row = connection.execute(select(sync_state).where(sync_state.c.stream == stream)).first()
+        return dict(row._mapping) if row else None
+
+    def ensure(self, stream: str) -> None:
+        """
+        Create the row of a stream if missing, so concurrent batches only update it.
+
+        Args:
+            stream (str): Stream name
+        """
+        if self.get(stream) is not None:
+            return
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(insert(sync_state).values(stream=stream, rows_total=0, last_batch_rows=0))
+        except IntegrityError:
+            # Otro proceso la creó entre la consulta y el insert
+            pass
+
+    def advance(
+        self,
+        connection: Connection,
+        stream: str,
+        rows: int,
+        high_water_mark: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        replace: bool = False
+    ) -> None:
+        """
+        Record a committed batch inside the caller's transaction.
+
+        The high-water mark only moves forward and rows_total is incremented
+        in SQL, so concurrent batches of the same stream do not lose updates.
+        The stream row must exist (see ensure).
+
+        Args:
+            connection (Connection): Connection of the transaction that inserted the batch
+            stream (str): Stream name
+            rows (int): Rows in the batch
+            high_water_mark (datetime, optional): Latest timestamp the batch covers
+            cursor (str, optional): Cursor after the batch
+            replace (bool): The batch replaced the whole table (full refresh)
+        """
+        values: Dict[str, Any] = {
+            "rows_total": rows if replace else sync_state.c.rows_total + rows,
+            "last_batch_rows": rows,
+            "updated_at": datetime.now()
+        }
+        if high_water_mark is not None:
+            values["high_water_mark"] = case(
+                (sync_state.c.high_water_mark.is_(None), high_water_mark),
+                (sync_state.c.high_water_mark < high_water_mark, high_water_mark),
+                else_=sync_state.c.high_water_mark
+            )
+        if cursor is not None:
+            values["last_cursor"] = cursor
+        connection.execute(update(sync_state).where(sync_state.c.stream == stream).values(**values))
@@ -0,0 +1,366 @@
+# utils/token_manager.py
+
+import atexit
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+from config.config import Config
+from utils.exceptions import AuthenticationError
+from utils.http import HTTPClient, get_http_client
+from utils.logger import setup_logger
+
+
+def decode_jwt_expiry(token: Optional[str]) -> Optional[float]:
+    """
+    Read the `exp` claim of a JWT without verifying its signature.
+
+    Args:
+        token (str, optional): Access token
+
+    Returns:
+        Optional[float]: Expiry as a Unix timestamp, or None if the token is not a JWT
+    """
+    if not token:
+        return None
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        payload = parts[1] + "=" * (-len(parts[1]) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims["exp"])
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+class TokenStore:
+    """
+    Token record per account kept in a SQLite file.
+
+    Every process on the host that points at the same file sees the same
+    tokens. Updates run in an immediate transaction, so the file lock lets
+    only one process refresh at a time and writes are atomic.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the store, creating it if it does not exist.
+
+        Args:
+            path (str, optional): SQLite file shared by all processes
+        """
+        self.path = path or Config.TOKEN_STORE
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS tokens ("
+                "email TEXT PRIMARY KEY, access_token TEXT NOT NULL, refresh_token TEXT, "
+                "expires_at REAL, updated_at REAL NOT NULL)"
+            )
+        try:
+            # Contiene credenciales: solo el usuario dueño puede leerlo
+            os.chmod(self.path, 0o600)
+        except OSError:
+            pass
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection in autocommit mode so transactions are explicit."""
+        return sqlite3.connect(self.path, timeout=Config.TOKEN_STORE_LOCK_TIMEOUT, isolation_level=None)
+
+    def load(self, email: str) -> Optional[Dict[str, Any]]:
+        """
+        Read the stored tokens of an account.
+
+        Args:
+            email (str): Account email
+
+        Returns:
+            Optional[Dict[str, Any]]: Stored record, or None if there is none
+        """
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                "SELECT access_token, refresh_token, expires_at, updated_at FROM tokens WHERE email = ?",
+                (email,)
+            ).fetchone()
+        finally:
+            connection.close()
+        return self._to_record(row)
+
+    @staticmethod
+    def _to_record(row: Optional[tuple]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        return {"access_token": row[0], "refresh_token": row[1], "expires_at": row[2], "updated_at": row[3]}
+
+    @contextmanager
+    def locked(self, email: str) -> Iterator[Dict[str, Any]]:
+        """
+        Give exclusive access to the record of an account across processes.
+
+        Args:
+            email (str): Account email
+
+        Yields:
+            Dict[str, Any]: Stored record ({} if none); it is written back on exit if changed
+        """
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT access_token, refresh_token, expires_at, updated_at FROM tokens WHERE email = ?",
+                (email,)
+            ).fetchone()
+            record = self._to_record(row) or {}
+            original = dict(record)
+            try:
+                yield record
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            if record and record != original:
+                connection.execute(
+                    "INSERT OR REPLACE INTO tokens (email, access_token, refresh_token, expires_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (email, record["access_token"], record.get("refresh_token"),
+                     record.get("expires_at"), time.time())
+                )
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+
+class TokenManager:
+    """
+    Access token shared by every module of the process.
+
+    The expiry is read from the JWT up front, and a background timer
+    refreshes the token shortly before it expires. Only one caller refreshes
+    at a time; concurrent callers wait and reuse the new token. Other
+    processes pick up a refreshed token from the shared TokenStore instead
+    of refreshing again.
+    """
+
+    def __init__(
+        self,
+        access_token: Optional[str] = None,
+        refresh_token: Optional[str] = None,
+        email: Optional[str] = None,
+        store: Optional[TokenStore] = None,
+        http: Optional[HTTPClient] = None,
+        refresh_margin: Optional[float] = None
+    ):
+        """
+        Initialize the manager with the configured tokens or newer stored ones.
+
+        Args:
+            access_token (str, optional): Initial access token
+            refresh_token (str, optional): Refresh token
+            email (str, optional): Account email
+            store (TokenStore, optional): Shared token store
+            http (HTTPClient, optional): Client used for the refresh request
+            refresh_margin (float, optional): Seconds before expiry to refresh
+        """
+        self.logger = setup_logger(self.__class__.__name__)
+        self.email = email or Config.EMAIL
+        self.store = store or TokenStore()
+        self.http = http or get_http_client()
+        self.refresh_margin = Config.TOKEN_REFRESH_MARGIN if refresh_margin is None else refresh_margin
+
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._closed = False
+
+        self._access_token = access_token or Config.ACCESS_TOKEN
+        self._refresh_token = refresh_token or Config.REFRESH_TOKEN
+        self._expires_at = decode_jwt_expiry(self._access_token)
+
+        stored = self.store.load(self.email)
+        if stored and self._is_newer(stored):
+            self._adopt(stored)
+
+    def _is_newer(self, record: Dict[str, Any]) -> bool:
+        """Whether a stored record should replace the token held in memory."""
+        if record["access_token"] == self._access_token:
+            return False
+        if record.get("expires_at") is None:
+            return False
+        return self._expires_at is None or record["expires_at"] > self._expires_at
+
+    def _adopt(self, record: Dict[str, Any]) -> None:
+        """Use a token refreshed by another process."""
+        self._access_token = record["access_token"]
+        self._refresh_token = record.get("refresh_token") or self._refresh_token
+        self._expires_at = record.get("expires_at")
+        self.logger.info("Using access token refreshed by another process")
+
+    def _expiring(self, expires_at: Optional[float]) -> bool:
+        return expires_at is not None and time.time() >= expires_at - self.refresh_margin
+
+    @property
+    def expires_at(self) -> Optional[float]:
+        """Expiry of the current token as a Unix timestamp, if known."""
+        return self._expires_at
+
+    def get_token(self) -> str:
+        """
+        Current access token, refreshed first if it is about to expire.
+
+        Returns:
+            str: Access token
+        """
+        token = self._access_token
+        if self._expiring(self._expires_at):
+            token = self.refresh(stale_token=token)
+        return token
+
+    def refresh(self, stale_token: Optional[str] = None) -> str:
+        """
+        Refresh the access token, once for all concurrent callers.
+
+        Args:
+            stale_token (str, optional): Token the caller found expired or rejected;
+                if it was already replaced, the new token is returned without a refresh
+
+        Returns:
+            str: Fresh access token
+
+        Raises:
+            AuthenticationError: If the refresh request fails
+        """
+        with self._lock:
+            if stale_token is not None and stale_token != self._access_token:
+                # Otro hilo ya lo renovó mientras esperábamos el lock
+                return self._access_token
+
+            with self.store.locked(self.email) as record:
+                if record and record["access_token"] != (stale_token or self._access_token) \
+                        and not self._expiring(record.get("expires_at")):
+                    self._adopt(record)
+                else:
+                    self._access_token, self._expires_at = self._request_new_token()
+                    record.update({
+                        "access_token": self._access_token,
+                        "refresh_token": self._refresh_token,
+                        "expires_at": self._expires_at
+                    })
+
+            self._schedule_refresh()
+            return self._access_token
+
+    def _request_new_token(self) -> tuple:
+        """Call the refresh endpoint. Returns (access_token, expires_at)."""
+        try:
+            response = self.http.post(
+                f"{Config.BASE_URL_AUTH}/auth/refresh",
+                json={
+                    "refresh_token": self._refresh_token,
+                    "email": self.email
+                }
+            )
+        except Exception as e:
+            self.logger.error(f"Error refreshing access token: {str(e)}")
+            raise AuthenticationError(f"Token refresh failed: {str(e)}")
+
+        if response.status_code != 200:
+            error_msg = f"Failed to refresh access token. Status: {response.status_code}"
+            if response.text:
+                error_msg += f", Response: {response.text}"
+            self.logger.error(error_msg)
+            raise AuthenticationError(error_msg)
+
+        try:
+            data = response.json()
+            access_token = data["access_token"]
+        except (ValueError, KeyError) as e:
+            raise AuthenticationError(f"Token refresh failed: invalid response ({str(e)})")
+
+        expires_at = decode_jwt_expiry(access_token)
+        if expires_at is None:
+            expires_at = time.time() + float(data.get("expires_in") or Config.TOKEN_DEFAULT_TTL)
+
+        self.logger.info(
+            f"Access token refreshed successfully, expires at "
+            f"{datetime.fromtimestamp(expires_at).isoformat(timespec='seconds')}"
+        )
+        return access_token, expires_at
+
+    def _schedule_refresh(self, delay: Optional[float] = None) -> None:
+        """Arm the background timer to refresh shortly before expiry."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._closed:
+            return
+        if delay is None:
+            if self._expires_at is None:
+                return
+            delay = max(self._expires_at - self.refresh_margin - time.time(), 0)
+
+        self._timer = threading.Timer(delay, self._refresh_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _refresh_in_background(self) -> None:
+        token = self._access_token
+        try:
+            self.refresh(stale_token=token)
+        except AuthenticationError:
+            # Se reintenta más tarde; mientras tanto get_token() también puede renovarlo
+            with self._lock:
+                self._schedule_refresh(Config.TOKEN_REFRESH_RETRY_DELAY)
+
+    def start(self) -> None:
+        """Start the background refresh timer."""
+        with self._lock:
+            self._schedule_refresh()
+
+    def close(self) -> None:
+        """Stop the background refresh timer."""
+        with self._lock:
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Expiry information of the current token.
+
+        Returns:
+            Dict[str, Any]: Account, expiry and seconds left
+        """
+        expires_at = self._expires_at
+        return {
+            "email": self.email,
+            "store": self.store.path,
+            "expires_at": datetime.fromtimestamp(expires_at).isoformat(timespec="seconds") if expires_at else None,
+            "seconds_left": round(expires_at - time.time()) if expires_at else None,
+            "refresh_scheduled": self._timer is not None
+        }
+
+
+_manager: Optional[TokenManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_token_manager() -> TokenManager:
+    """
+    Get the process-wide token manager, creating and starting it on first use.
+
+    Returns:
+        TokenManager: Shared token manager
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = TokenManager()
+            _manager.start()
+            atexit.register(_manager.close)
+        return _manager
@@ -0,0 +1,236 @@
+# utils/tracing.py
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config.config import Config
+
+
+class Span:
+    """One timed phase of a run, nested under the span that was open when it started."""
+
+    __slots__ = ("name", "cat", "args", "span_id", "parent_id", "tid", "start_ns")
+
+    def __init__(self, name: str, cat: str, args: Dict[str, Any], span_id: int, parent_id: Optional[int]):
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.tid = threading.get_ident()
+        self.start_ns = time.perf_counter_ns()
+
+    def set(self, **attributes) -> None:
+        """Attach attributes to the span, e.g. the ShipHero request_id."""
+        self.args.update(attributes)
+
+
+class _NullSpan:
+    """Stand-in returned while tracing is off."""
+
+    def set(self, **attributes) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Collect nested spans and dump them as Chrome trace JSON.
+
+    Spans nest per thread: a span opened while another is open on the same
+    thread becomes its child. The output loads in chrome://tracing or
+    Perfetto. Tracing is off until start() is called; while off, a span
+    costs a single attribute check.
+    """
+
+    def __init__(self, max_events: Optional[int] = None):
+        """
+        Initialize a stopped tracer.
+
+        Args:
+            max_events (int, optional): Spans kept; later ones are counted as dropped
+        """
+        self.max_events = max_events or Config.TRACE_MAX_EVENTS
+        self.enabled = False
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._events: List[Dict[str, Any]] = []
+        self._thread_names: Dict[int, str] = {}
+        self._next_id = 0
+        self._origin_ns = time.perf_counter_ns()
+
+    def start(self) -> None:
+        """Start recording spans."""
+        self.enabled = True
+
+    def stop(self) -> None:
+        """Stop recording spans; recorded ones are kept."""
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Drop every recorded span."""
+        with self._lock:
+            self._events.clear()
+            self._thread_names.clear()
+            self.dropped = 0
+            self._origin_ns = time.perf_counter_ns()
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name: str, cat: str = "app", **attributes) -> Iterator[Any]:
+        """
+        Time a block as a span.
+
+        Args:
+            name (str): Span name, e.g. 'graphql inventory_changes'
+            cat (str): Category shown in the viewer ('api', 'flatten', 'db', 'export'...)
+            **attributes: Span arguments
+
+        Yields:
+            Span: Call .set() on it to add attributes while it is open
+        """
+        if not self.enabled:
+            yield _NULL_SPAN
+            return
+
+        stack = self._stack()
+        with self._lock:
+            self._next_id += 1
+            span_id = self._next_id
+        span = Span(name, cat, attributes, span_id, stack[-1].span_id if stack else None)
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            # Un generador abandonado puede cerrar sus spans fuera de orden
+            if stack and stack[-1] is span:
+                stack.pop()
+            elif span in stack:
+                stack.remove(span)
+            self._record(span, time.perf_counter_ns())
+
+    def _record(self, span: Span, end_ns: int) -> None:
+        args = dict(span.args, span_id=span.span_id)
+        if span.parent_id is not None:
+            args["parent_id"] = span.parent_id
+        event = {
+            "name": span.name,
+            "cat": span.cat,
+            "ph": "X",
+            "ts": (span.start_ns - self._origin_ns) / 1000,
+            "dur": (end_ns - span.start_ns) / 1000,
+            "pid": os.getpid(),
+            "tid": span.tid,
+            "args": args
+        }
+        with self._lock:
+            if len(self._events) >= self.max_events:
+                self.dropped += 1
+                return
+            self._events.append(event)
+            if span.tid not in self._thread_names:
+                self._thread_names[span.tid] = threading.current_thread().name
+
+    def events(self) -> List[Dict[str, Any]]:
+        """
+        Recorded spans as Chrome trace complete events.
+
+        Returns:
+            List[Dict[str, Any]]: Events in completion order
+        """
+        with self._lock:
+            return list(self._events)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        Build the Chrome trace document.
+
+        Returns:
+            Dict[str, Any]: {'traceEvents': [...]} with thread name metadata
+        """
+        with self._lock:
+            metadata = [
+                {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": thread_name}}
+                for tid, thread_name in self._thread_names.items()
+            ]
+            return {
+                "traceEvents": metadata + sorted(self._events, key=lambda event: event["ts"]),
+                "displayTimeUnit": "ms",
+                "otherData": {"dropped_spans": self.dropped}
+            }
+
+    def write(self, path: str) -> str:
+        """
+        Write the trace as Chrome trace JSON.
+
+        Args:
+            path (str): Output file
+
+        Returns:
+            str: Path written
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_chrome_trace(), file)
+        return path
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """
+    Get the process-wide tracer, creating it on first use.
+
+    Returns:
+        Tracer: Shared tracer
+    """
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
+
+
+def traced(name: Optional[str] = None, cat: str = "app") -> Callable:
+    """
+    Decorate a function so every call is a span of the shared tracer.
+
+    Args:
+        name (str, optional): Span name, the function's qualified name by default
+        cat (str): Span category
+
+    Returns:
+        Callable: Decorator
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = get_tracer()
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(span_name, cat):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator